@@ -0,0 +1,46 @@
+"""Metaclass-free abstract base used by the ai_client_api contracts.
+
+``abc.ABC`` routes every ``isinstance``/``issubclass`` check through
+``ABCMeta.__instancecheck__``. The contracts here never register virtual
+subclasses, so a plain class that tracks ``__abstractmethods__`` itself keeps
+instantiation guarded while ``isinstance`` stays on the builtin fast path.
+"""
+
+from __future__ import annotations
+
+from typing import TypeVar
+
+__all__ = ["Abstract", "abstractmethod"]
+
+_F = TypeVar("_F")
+
+
+def abstractmethod(funcobj: _F) -> _F:
+    """Mark a method (or the getter wrapped by ``property``) as abstract."""
+    funcobj.__isabstractmethod__ = True  # type: ignore[attr-defined]
+    return funcobj
+
+
+class Abstract:
+    """Base class that refuses instantiation while abstract methods remain.
+
+    Assigning ``__abstractmethods__`` on a type sets CPython's abstract flag, so
+    ``object.__new__`` raises ``TypeError`` exactly as it does for ``ABC``
+    subclasses without any extra per-instance work.
+    """
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        """Collect abstract members declared on, or inherited by, the subclass."""
+        super().__init_subclass__(**kwargs)
+        abstracts = {
+            name
+            for name, value in vars(cls).items()
+            if getattr(value, "__isabstractmethod__", False)
+        }
+        for base in cls.__bases__:
+            for name in getattr(base, "__abstractmethods__", ()):
+                if getattr(getattr(cls, name, None), "__isabstractmethod__", False):
+                    abstracts.add(name)
+        cls.__abstractmethods__ = frozenset(abstracts)  # type: ignore[attr-defined]
@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
-from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
+from ai_client_api._bases import Abstract, abstractmethod
+
 if TYPE_CHECKING:
     from collections.abc import Sequence
 
@@ -13,9 +14,11 @@ if TYPE_CHECKING:
 __all__ = ["Client", "get_client"]
 
 
-class Client(ABC):
+class Client(Abstract):
     """The contract for AI services."""
 
+    __slots__ = ()
+
     @abstractmethod
     def generate_response(
         self,
@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
-from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Any
 
+from ai_client_api._bases import Abstract, abstractmethod
+
 if TYPE_CHECKING:
     from collections.abc import Sequence
 
@@ -18,9 +19,11 @@ __all__ = [
 ]
 
 
-class ContentBlock(ABC):
+class ContentBlock(Abstract):
     """Abstract content block inside a chat message."""
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def type(self) -> str:
@@ -69,9 +72,11 @@ class ContentBlock(ABC):
         raise NotImplementedError
 
 
-class Message(ABC):
+class Message(Abstract):
     """Abstract chat message composed of content blocks."""
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def role(self) -> str:
@@ -90,9 +95,11 @@ class Message(ABC):
         raise NotImplementedError
 
 
-class ToolDefinition(ABC):
+class ToolDefinition(Abstract):
     """Abstract definition of an available tool."""
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def name(self) -> str:
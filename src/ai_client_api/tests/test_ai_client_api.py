@@ -136,3 +136,16 @@ def test_client_cannot_instantiate_directly() -> None:
     """Client remains abstract until an implementation provides generate_response."""
     with pytest.raises(TypeError):
         Client()  # type: ignore[abstract]
+
+
+def test_partial_implementation_stays_abstract() -> None:
+    """Subclasses missing an abstract member cannot be instantiated."""
+
+    class _PartialMessage(Message):
+        @property
+        def role(self) -> str:
+            return "user"
+
+    assert type(Message) is type
+    with pytest.raises(TypeError, match=r"content.*to_dict"):
+        _PartialMessage()  # type: ignore[abstract]
@@ -7,17 +7,31 @@ models used across the workspace.
 
 from __future__ import annotations
 
+import asyncio
+import json
 import os
+import sys
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
-
-import anthropic
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+    from types import ModuleType
 
 import ai_client_api
 from ai_client_api import Client, Message, ToolDefinition
-from claude_client_impl.models_impl import ClaudeContentBlock, ClaudeMessage
+from claude_client_impl.models_impl import TYPE_TEXT, TYPE_TOOL_USE, ClaudeContentBlock, ClaudeMessage
+
+# The orchestrator imports this module before its own load_dotenv() runs, so .env is loaded
+# here (when python-dotenv is installed) before the model is resolved once for all clients.
+try:
+    from dotenv import load_dotenv
+except ImportError:  # pragma: no cover - python-dotenv is optional for this package
+    pass
+else:
+    load_dotenv()
+
+_DEFAULT_MODEL = os.environ.get("ANTHROPIC_MODEL", "claude-haiku-4-5-20251001")
+_DEFAULT_MAX_TOKENS = 1024
 
 # ---------------------------------------------------------------------------
 # Client implementation
@@ -35,6 +49,7 @@ class ClaudeClient(Client):
         _client: Anthropic SDK client.
         _model: Model name used for requests.
         _max_tokens: Max tokens for each completion.
+        _base_kwargs: Request arguments that are fixed for the client's lifetime.
 
     """
 
@@ -43,9 +58,11 @@ class ClaudeClient(Client):
         key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         if not key:
             raise RuntimeError("ANTHROPIC_API_KEY is required.")  # noqa: TRY003, EM101
-        self._client = anthropic.Anthropic(api_key=key)
-        self._model = os.environ.get("ANTHROPIC_MODEL", "claude-haiku-4-5-20251001")
-        self._max_tokens = 1024
+        self._api_key = key
+        self._client = _get_anthropic().Anthropic(api_key=key)
+        self._model = _DEFAULT_MODEL
+        self._max_tokens = _DEFAULT_MAX_TOKENS
+        self._base_kwargs: dict[str, Any] = {"model": self._model, "max_tokens": self._max_tokens}
 
     def generate_response(
         self,
@@ -64,26 +81,81 @@ class ClaudeClient(Client):
             Provider-agnostic Message that may include tool_use blocks.
 
         """
-        serialized_messages = [message.to_dict() for message in messages]
-        request_kwargs: dict[str, Any] = {
-            "model": self._model,
-            "max_tokens": self._max_tokens,
-            "messages": serialized_messages,
-        }
+        api_response = self._client.messages.create(**self._build_request(messages, system, tools))
+        return to_message(api_response)
+
+    async def agenerate_response(
+        self,
+        messages: Sequence[Message],
+        system: str | None = None,
+        tools: Sequence[ToolDefinition] | None = None,
+    ) -> Message:
+        """Async variant of generate_response for callers that own an event loop.
+
+        Independent requests can be awaited together (e.g. with asyncio.gather) so their
+        network time overlaps. Each call uses its own AsyncAnthropic client, scoped to the
+        running event loop and closed afterwards, like generate_responses_batch.
+        """
+        (reply,) = await _create_concurrently(self._api_key, [self._build_request(messages, system, tools)])
+        return reply
+
+    def generate_responses_batch(
+        self,
+        batch: Sequence[Sequence[Message]],
+        system: str | None = None,
+        tools: Sequence[ToolDefinition] | None = None,
+    ) -> list[Message]:
+        """Run independent conversations concurrently and return their replies in order.
+
+        Every conversation shares the same system prompt and tools. This starts its own
+        event loop, so it must be called from synchronous code; async callers should
+        gather agenerate_response instead.
+
+        Args:
+            batch: One message history per request.
+            system: Optional system prompt applied to every request.
+            tools: Optional tool definitions applied to every request.
+
+        Returns:
+            Replies in the same order as ``batch``.
+
+        """
+        requests = [self._build_request(messages, system, tools) for messages in batch]
+        return asyncio.run(_create_concurrently(self._api_key, requests))
+
+    def generate_response_stream(
+        self,
+        messages: Sequence[Message],
+        system: str | None = None,
+        tools: Sequence[ToolDefinition] | None = None,
+    ) -> Iterator[ClaudeContentBlock]:
+        """Stream a Claude reply, yielding each content block as soon as it completes.
+
+        Takes the same arguments as generate_response. Callers can start acting on
+        early blocks (e.g. dispatching a tool call) while later ones are still being
+        generated. The SDK stream is closed when the iterator is exhausted or closed.
+
+        Yields:
+            ClaudeContentBlock for every text and tool_use block, in response order.
+
+        """
+        request_kwargs = self._build_request(messages, system, tools)
+        with self._client.messages.create(**request_kwargs, stream=True) as events:
+            yield from iter_content_blocks(events)
+
+    def _build_request(
+        self,
+        messages: Sequence[Message],
+        system: str | None,
+        tools: Sequence[ToolDefinition] | None,
+    ) -> dict[str, Any]:
+        """Build the Messages API keyword arguments shared by both response paths."""
+        request_kwargs: dict[str, Any] = {**self._base_kwargs, "messages": _serialize_messages(messages)}
         if system:
             request_kwargs["system"] = system.strip()
         if tools:
-            request_kwargs["tools"] = [
-                {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "input_schema": tool.input_schema,
-                }
-                for tool in tools
-            ]
-
-        api_response = self._client.messages.create(**request_kwargs)
-        return to_message(api_response)
+            request_kwargs["tools"] = [tool.to_dict() for tool in tools]
+        return request_kwargs
 
 
 # ---------------------------------------------------------------------------
@@ -101,29 +173,108 @@ def get_client_impl() -> ClaudeClient:
 # ---------------------------------------------------------------------------
 
 
+def _get_anthropic() -> ModuleType:
+    """Import the Anthropic SDK on first use.
+
+    The SDK pulls in httpx and pydantic, so importing this package (or just the
+    ai_client_api contracts through it) stays cheap until a client is constructed.
+    """
+    import anthropic  # noqa: PLC0415
+
+    return anthropic
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Resolve the deferred ``anthropic`` module attribute on first access."""
+    if name == "anthropic":
+        return _get_anthropic()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: TRY003, EM102
+
+
+def _serialize_messages(messages: Sequence[Message]) -> list[dict[str, Any]]:
+    """Serialize a message history for a Messages API request."""
+    return [msg.to_dict() for msg in messages]
+
+
+def _build_text(block: Any) -> ClaudeContentBlock:  # noqa: ANN401
+    return ClaudeContentBlock._new_text(block.text)  # noqa: SLF001
+
+
+def _build_tool_use(block: Any) -> ClaudeContentBlock:  # noqa: ANN401
+    return ClaudeContentBlock._new_tool_use(block.id, block.name, block.input or {})  # noqa: SLF001
+
+
+# SDK block type -> converter. Unlisted types (thinking, server_tool_use, ...) are dropped.
+_BLOCK_BUILDERS: dict[str, Callable[[Any], ClaudeContentBlock]] = {
+    TYPE_TEXT: _build_text,
+    TYPE_TOOL_USE: _build_tool_use,
+}
+
+
+async def _create_concurrently(api_key: str, requests: list[dict[str, Any]]) -> list[Message]:
+    """Send prepared requests concurrently on a client scoped to the running event loop.
+
+    AsyncAnthropic's connection pool is bound to the loop it first runs on, so a client
+    is never kept beyond the call that created it.
+    """
+    async with _get_anthropic().AsyncAnthropic(api_key=api_key) as client:
+        responses = await asyncio.gather(*(client.messages.create(**request) for request in requests))
+    return [to_message(response) for response in responses]
+
+
 def to_message(api_response: Any) -> ClaudeMessage:  # noqa: ANN401
     """Convert an Anthropic Messages API response into a ClaudeMessage."""
-    blocks: list[ClaudeContentBlock] = []
-    for block in api_response.content:
-        if block.type == "text":
-            blocks.append(ClaudeContentBlock(block_type="text", text=block.text))
-        elif block.type == "tool_use":
-            blocks.append(
-                ClaudeContentBlock(
-                    block_type="tool_use",
-                    tool_call_id=block.id,
-                    name=block.name,
-                    tool_input=block.input or {},
-                )
-            )
+    builders = _BLOCK_BUILDERS
+    blocks = [build(block) for block in api_response.content if (build := builders.get(block.type)) is not None]
     return ClaudeMessage(role="assistant", content=blocks)
 
 
+def iter_content_blocks(events: Iterable[Any]) -> Iterator[ClaudeContentBlock]:
+    """Convert raw Messages API stream events into ClaudeContentBlocks as each block stops.
+
+    Text and tool-input deltas are collected per block index and joined once at
+    content_block_stop; other block and delta types are ignored, matching to_message.
+    """
+    pending: dict[int, tuple[Any, str, list[str]]] = {}
+    for event in events:
+        event_type = event.type
+        if event_type == "content_block_delta":
+            entry = pending.get(event.index)
+            if entry is None:
+                continue
+            delta = event.delta
+            if delta.type == "text_delta":
+                entry[2].append(delta.text)
+            elif delta.type == "input_json_delta":
+                entry[2].append(delta.partial_json)
+        elif event_type == "content_block_start":
+            start = event.content_block
+            # SDK strings are not interned; interning once here lets the checks below
+            # (and _finish_block) compare by identity.
+            block_type = sys.intern(start.type)
+            if block_type is TYPE_TEXT or block_type is TYPE_TOOL_USE:
+                pending[event.index] = (start, block_type, [])
+        elif event_type == "content_block_stop":
+            entry = pending.pop(event.index, None)
+            if entry is not None:
+                yield _finish_block(*entry)
+
+
+def _finish_block(start: Any, block_type: str, parts: list[str]) -> ClaudeContentBlock:  # noqa: ANN401
+    """Build the block announced by content_block_start from its joined deltas."""
+    joined = "".join(parts)
+    if block_type is TYPE_TEXT:
+        return ClaudeContentBlock._new_text(start.text + joined)  # noqa: SLF001
+    tool_input = json.loads(joined) if joined else start.input or {}
+    return ClaudeContentBlock._new_tool_use(start.id, start.name, tool_input)  # noqa: SLF001
+
+
 # ---------------------------------------------------------------------------
 # Factory registration
 # ---------------------------------------------------------------------------
 
 
 def register() -> None:
-    """Bind the Claude client factory into ai_client_api.get_client."""
-    ai_client_api.get_client = get_client_impl
+    """Bind the Claude client factory into ai_client_api.get_client (idempotent)."""
+    if ai_client_api.get_client is not get_client_impl:
+        ai_client_api.get_client = get_client_impl
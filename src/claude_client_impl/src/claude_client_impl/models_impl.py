@@ -2,14 +2,35 @@
 
 from __future__ import annotations
 
+import json
+import sys
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Callable, Sequence
 
 import ai_client_api
 from ai_client_api import models
 
+# Block types are interned everywhere a block is built, so code dispatching on a
+# ClaudeContentBlock's type can compare against these with ``is``.
+TYPE_TEXT = sys.intern("text")
+TYPE_TOOL_USE = sys.intern("tool_use")
+TYPE_TOOL_RESULT = sys.intern("tool_result")
+
+
+def _stdlib_json_dumps(obj: Any) -> bytes:  # noqa: ANN401
+    """Encode ``obj`` as compact UTF-8 JSON, byte-compatible with orjson's defaults."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# orjson is an optional speedup (the ``fast-json`` extra); fall back to the stdlib.
+_json_dumps: Callable[[Any], bytes]
+try:
+    from orjson import dumps as _json_dumps
+except ImportError:  # pragma: no cover - depends on installed extras
+    _json_dumps = _stdlib_json_dumps
+
 # ---------------------------------------------------------------------------
 # Claude models
 # ---------------------------------------------------------------------------
@@ -18,6 +39,18 @@ from ai_client_api import models
 class ClaudeContentBlock(models.ContentBlock):
     """Content block for Claude responses (text/tool_use/tool_result)."""
 
+    __slots__ = (
+        "_cached_dict",
+        "_content",
+        "_id",
+        "_input",
+        "_name",
+        "_text",
+        "_to_dict_impl",
+        "_tool_use_id",
+        "_type",
+    )
+
     def __init__(  # noqa: PLR0913
         self,
         *,
@@ -30,13 +63,55 @@ class ClaudeContentBlock(models.ContentBlock):
         content: object | None = None,
     ) -> None:
         """Create a Claude content block payload."""
-        self._type = block_type
+        self._type = sys.intern(block_type)
         self._id = tool_call_id
         self._text = text
         self._name = name
         self._input = tool_input
         self._tool_use_id = tool_use_id
         self._content = content
+        shape = (
+            tool_call_id is not None,
+            text is not None,
+            name is not None,
+            tool_input is not None,
+            tool_use_id is not None,
+            content is not None,
+        )
+        self._to_dict_impl: Callable[[ClaudeContentBlock], dict[str, Any]] = _SHAPE_BUILDERS.get(
+            shape, ClaudeContentBlock._generic_to_dict
+        )
+        self._cached_dict: dict[str, Any] | None = None
+
+    @classmethod
+    def _new_text(cls, text: str) -> ClaudeContentBlock:
+        """Build a text block positionally, skipping keyword-argument __init__."""
+        self = cls.__new__(cls)
+        self._type = TYPE_TEXT
+        self._id = None
+        self._text = text
+        self._name = None
+        self._input = None
+        self._tool_use_id = None
+        self._content = None
+        self._to_dict_impl = cls._text_to_dict
+        self._cached_dict = None
+        return self
+
+    @classmethod
+    def _new_tool_use(cls, tool_call_id: str, name: str, tool_input: dict[str, Any]) -> ClaudeContentBlock:
+        """Build a tool_use block positionally, skipping keyword-argument __init__."""
+        self = cls.__new__(cls)
+        self._type = TYPE_TOOL_USE
+        self._id = tool_call_id
+        self._text = None
+        self._name = name
+        self._input = tool_input
+        self._tool_use_id = None
+        self._content = None
+        self._to_dict_impl = cls._tool_use_to_dict
+        self._cached_dict = None
+        return self
 
     @property
     def type(self) -> str:
@@ -74,7 +149,31 @@ class ClaudeContentBlock(models.ContentBlock):
         return self._content
 
     def to_dict(self) -> dict[str, Any]:
-        """Return this block as a JSON-serializable dict."""
+        """Return this block as a JSON-serializable dict.
+
+        Blocks are immutable, so the payload is built on first use (with its own copy of
+        the tool input) and reused; history blocks are re-sent on every turn. The same
+        dict is returned every time and must be treated as read-only.
+        """
+        cached = self._cached_dict
+        if cached is None:
+            cached = self._cached_dict = self._to_dict_impl(self)
+        return cached
+
+    def _text_to_dict(self) -> dict[str, Any]:
+        """Serialize a block that only carries text."""
+        return {"type": self._type, "text": self._text}
+
+    def _tool_use_to_dict(self) -> dict[str, Any]:
+        """Serialize a block that carries a tool call."""
+        return {"type": self._type, "id": self._id, "name": self._name, "input": dict(self._input or {})}
+
+    def _tool_result_to_dict(self) -> dict[str, Any]:
+        """Serialize a block that carries a tool result."""
+        return {"type": self._type, "tool_use_id": self._tool_use_id, "content": self._content}
+
+    def _generic_to_dict(self) -> dict[str, Any]:
+        """Serialize any block shape, emitting only the fields that are set."""
         payload: dict[str, Any] = {"type": self._type}
         if self._id is not None:
             payload["id"] = self._id
@@ -83,7 +182,7 @@ class ClaudeContentBlock(models.ContentBlock):
         if self._name is not None:
             payload["name"] = self._name
         if self._input is not None:
-            payload["input"] = self._input
+            payload["input"] = dict(self._input)
         if self._tool_use_id is not None:
             payload["tool_use_id"] = self._tool_use_id
         if self._content is not None:
@@ -91,13 +190,25 @@ class ClaudeContentBlock(models.ContentBlock):
         return payload
 
 
+# Keyed by which of (id, text, name, input, tool_use_id, content) are set, so the
+# common block shapes skip the per-field None checks on every serialization.
+_SHAPE_BUILDERS: dict[tuple[bool, ...], Callable[[ClaudeContentBlock], dict[str, Any]]] = {
+    (False, True, False, False, False, False): ClaudeContentBlock._text_to_dict,  # noqa: SLF001
+    (True, False, True, True, False, False): ClaudeContentBlock._tool_use_to_dict,  # noqa: SLF001
+    (False, False, False, False, True, True): ClaudeContentBlock._tool_result_to_dict,  # noqa: SLF001
+}
+
+
 class ClaudeMessage(models.Message):
     """Chat message composed of Claude content blocks."""
 
+    __slots__ = ("_cached_dict", "_content", "_role")
+
     def __init__(self, role: str, content: Sequence[models.ContentBlock]) -> None:
-        """Create a Claude message from content blocks."""
+        """Create a Claude message from content blocks (frozen into a tuple)."""
         self._role = role
-        self._content: list[models.ContentBlock] = list(content)
+        self._content: tuple[models.ContentBlock, ...] = content if type(content) is tuple else tuple(content)
+        self._cached_dict: dict[str, Any] | None = None
 
     @property
     def role(self) -> str:
@@ -105,23 +216,41 @@ class ClaudeMessage(models.Message):
         return self._role
 
     @property
-    def content(self) -> list[models.ContentBlock]:
-        """Get the content blocks for this message."""
+    def content(self) -> tuple[models.ContentBlock, ...]:
+        """Get the (immutable) content blocks for this message."""
         return self._content
 
     def to_dict(self) -> dict[str, Any]:
-        """Return this message as a JSON-serializable dict."""
-        return {"role": self._role, "content": [block.to_dict() for block in self._content]}
+        """Return this message as a JSON-serializable dict.
+
+        The content is frozen at construction, so the payload is built once and reused
+        each time the message is re-sent as conversation history. The same dict is
+        returned every time and must be treated as read-only.
+        """
+        cached = self._cached_dict
+        if cached is None:
+            cached = self._cached_dict = {
+                "role": self._role,
+                "content": [block.to_dict() for block in self._content],
+            }
+        return cached
+
+    def to_json_bytes(self) -> bytes:
+        """Return this message encoded as compact UTF-8 JSON (orjson when installed)."""
+        return _json_dumps(self.to_dict())
 
 
 class ClaudeToolDefinition(models.ToolDefinition):
     """Tool definition passed to Claude to enable tool_use blocks."""
 
+    __slots__ = ("_cached_dict", "_description", "_input_schema", "_name")
+
     def __init__(self, name: str, description: str, input_schema: dict[str, Any]) -> None:
         """Create a Claude tool definition."""
         self._name = name
         self._description = description
         self._input_schema = input_schema
+        self._cached_dict: dict[str, Any] | None = None
 
     @property
     def name(self) -> str:
@@ -139,12 +268,20 @@ class ClaudeToolDefinition(models.ToolDefinition):
         return self._input_schema
 
     def to_dict(self) -> dict[str, Any]:
-        """Return this tool definition as a JSON-serializable dict."""
-        return {
-            "name": self._name,
-            "description": self._description,
-            "input_schema": self._input_schema,
-        }
+        """Return this tool definition as a JSON-serializable dict.
+
+        Tool definitions are immutable, so the payload is built once (with its own copy of
+        the schema) and reused for every request that offers this tool. The same dict is
+        returned every time and must be treated as read-only.
+        """
+        cached = self._cached_dict
+        if cached is None:
+            cached = self._cached_dict = {
+                "name": self._name,
+                "description": self._description,
+                "input_schema": dict(self._input_schema),
+            }
+        return cached
 
 
 # ---------------------------------------------------------------------------
@@ -194,10 +331,17 @@ def tool_definition_impl(
 
 
 def register() -> None:
-    """Register Claude factory helpers with the abstract API."""
-    ai_client_api.message = message_impl
-    ai_client_api.content_block = content_block_impl
-    ai_client_api.tool_definition = tool_definition_impl
-    models.message = message_impl
-    models.content_block = content_block_impl
-    models.tool_definition = tool_definition_impl
+    """Register Claude factory helpers with the abstract API.
+
+    Safe to call repeatedly: each module namespace is only updated (in one batch)
+    when a binding is missing, so repeat calls leave module dicts untouched.
+    """
+    bindings = {
+        "message": message_impl,
+        "content_block": content_block_impl,
+        "tool_definition": tool_definition_impl,
+    }
+    for module in (ai_client_api, models):
+        namespace = vars(module)
+        if any(namespace.get(name) is not impl for name, impl in bindings.items()):
+            namespace.update(bindings)
@@ -2,20 +2,35 @@
 
 from __future__ import annotations
 
+import copy
 import importlib
-import os
-from typing import Any
+import json
+from types import SimpleNamespace
+from typing import Any, ClassVar, Self
 
-import pytest  # noqa: TC002
+import pytest
 from claude_client_impl.claude_impl import (
     ClaudeClient,
+    _serialize_messages,
     get_client_impl,
+    iter_content_blocks,
     register,
     to_message,
 )
-from claude_client_impl.models_impl import ClaudeContentBlock, ClaudeMessage
+from claude_client_impl.models_impl import (
+    TYPE_TEXT,
+    TYPE_TOOL_RESULT,
+    TYPE_TOOL_USE,
+    ClaudeContentBlock,
+    ClaudeMessage,
+    ClaudeToolDefinition,
+    _stdlib_json_dumps,
+    message_impl,
+)
+from claude_client_impl.models_impl import register as register_models
 
 import ai_client_api
+from claude_client_impl import claude_impl
 
 
 class _DummyBlock(ai_client_api.ContentBlock):
@@ -139,7 +154,7 @@ def test_generate_response_serializes_and_calls_sdk(monkeypatch: pytest.MonkeyPa
     # ASSERT
     assert result is dummy_reply
     assert captured == {
-        "model": os.environ.get("ANTHROPIC_MODEL", "claude-haiku-4-5-20251001"),
+        "model": claude_impl._DEFAULT_MODEL,
         "max_tokens": 1024,
         "messages": [{"role": "user", "content": [{"type": "text", "text": "Hi Claude"}]}],
         "system": "sys prompt",
@@ -181,6 +196,7 @@ def test_to_message_converts_response_object() -> None:
             self.content = [
                 _StubBlock(block_type="text", text="hi"),
                 _StubBlock(block_type="tool_use", tool_call_id="t1", name="tool"),
+                _StubBlock(block_type="thinking"),
             ]
 
     # ACT
@@ -194,6 +210,162 @@ def test_to_message_converts_response_object() -> None:
     assert result.content[1].id == "t1"
     assert result.content[1].name == "tool"
     assert result.content[1].input == {"foo": "bar"}
+    assert result.to_dict()["content"] == [
+        {"type": "text", "text": "hi"},
+        {"type": "tool_use", "id": "t1", "name": "tool", "input": {"foo": "bar"}},
+    ]
+
+
+def _stream_events() -> list[SimpleNamespace]:
+    """Raw stream events for a text block followed by a tool_use block."""
+
+    def delta(index: int, **fields: str) -> SimpleNamespace:
+        return SimpleNamespace(type="content_block_delta", index=index, delta=SimpleNamespace(**fields))
+
+    return [
+        SimpleNamespace(type="message_start"),
+        SimpleNamespace(type="content_block_start", index=0, content_block=SimpleNamespace(type="text", text="")),
+        delta(0, type="text_delta", text="Hel"),
+        delta(0, type="text_delta", text="lo"),
+        SimpleNamespace(type="content_block_stop", index=0),
+        SimpleNamespace(
+            type="content_block_start",
+            index=1,
+            content_block=SimpleNamespace(type="tool_use", id="t1", name="tool", input={}),
+        ),
+        delta(1, type="input_json_delta", partial_json='{"foo": '),
+        delta(1, type="input_json_delta", partial_json='"bar"}'),
+        SimpleNamespace(type="content_block_stop", index=1),
+        SimpleNamespace(type="content_block_start", index=2, content_block=SimpleNamespace(type="thinking")),
+        delta(2, type="thinking_delta", thinking="hmm"),
+        SimpleNamespace(type="content_block_stop", index=2),
+        SimpleNamespace(type="message_stop"),
+    ]
+
+
+def test_iter_content_blocks_joins_deltas_per_block() -> None:
+    """Stream events become blocks at content_block_stop; unsupported blocks are skipped."""
+    blocks = list(iter_content_blocks(_stream_events()))
+
+    assert [block.to_dict() for block in blocks] == [
+        {"type": "text", "text": "Hello"},
+        {"type": "tool_use", "id": "t1", "name": "tool", "input": {"foo": "bar"}},
+    ]
+
+
+def test_generate_response_stream_yields_blocks(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Streaming requests reuse the request payload and close the SDK stream."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    captured: dict[str, Any] = {}
+
+    class _StubStream:
+        closed = False
+
+        def __enter__(self) -> list[SimpleNamespace]:
+            return _stream_events()
+
+        def __exit__(self, *exc_info: object) -> None:
+            _StubStream.closed = True
+
+    class _StubMessages:
+        def create(self, **kwargs: Any) -> _StubStream:
+            captured.update(kwargs)
+            return _StubStream()
+
+    class _StubAnthropic:
+        def __init__(self, api_key: str) -> None:
+            self.messages = _StubMessages()
+
+    monkeypatch.setattr("claude_client_impl.claude_impl.anthropic.Anthropic", _StubAnthropic)
+    message = ClaudeMessage(role="user", content=[ClaudeContentBlock(block_type="text", text="Hi")])
+
+    blocks = list(ClaudeClient().generate_response_stream([message], system="sys"))
+
+    assert [block.type for block in blocks] == ["text", "tool_use"]
+    assert captured["stream"] is True
+    assert captured["system"] == "sys"
+    assert captured["messages"] == [{"role": "user", "content": [{"type": "text", "text": "Hi"}]}]
+    assert _StubStream.closed
+
+
+class _StubAsyncAnthropic:
+    """Async SDK stand-in that echoes each request's last user text back as a reply."""
+
+    instances: ClassVar[list[_StubAsyncAnthropic]] = []
+
+    def __init__(self, api_key: str) -> None:
+        self.api_key = api_key
+        self.requests: list[dict[str, Any]] = []
+        self.closed = False
+        self.messages = self
+        _StubAsyncAnthropic.instances.append(self)
+
+    async def create(self, **kwargs: Any) -> SimpleNamespace:
+        self.requests.append(kwargs)
+        text = kwargs["messages"][-1]["content"][0]["text"]
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text.upper())])
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.closed = True
+
+
+def _user_turn(text: str) -> list[ClaudeMessage]:
+    return [ClaudeMessage(role="user", content=[ClaudeContentBlock(block_type="text", text=text)])]
+
+
+async def test_agenerate_response_scopes_async_client_per_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Each async call sends the shared payload through its own closed AsyncAnthropic."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(_StubAsyncAnthropic, "instances", [])
+    monkeypatch.setattr("claude_client_impl.claude_impl.anthropic.AsyncAnthropic", _StubAsyncAnthropic)
+    client = ClaudeClient()
+
+    first = await client.agenerate_response(_user_turn("a"), system="sys")
+    await client.agenerate_response(_user_turn("b"))
+
+    assert first.content[0].text == "A"
+    first_client, second_client = _StubAsyncAnthropic.instances
+    assert first_client.closed
+    assert second_client.closed
+    assert first_client.api_key == "test-key"
+    assert first_client.requests[0]["system"] == "sys"
+    assert "system" not in second_client.requests[0]
+
+
+def test_generate_responses_batch_preserves_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Batched requests run on a scoped async client and come back in input order."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(_StubAsyncAnthropic, "instances", [])
+    monkeypatch.setattr("claude_client_impl.claude_impl.anthropic.AsyncAnthropic", _StubAsyncAnthropic)
+
+    replies = ClaudeClient().generate_responses_batch([_user_turn("x"), _user_turn("y")], system="sys")
+
+    assert [reply.content[0].text for reply in replies] == ["X", "Y"]
+    (async_client,) = _StubAsyncAnthropic.instances
+    assert async_client.closed
+    assert all(request["system"] == "sys" for request in async_client.requests)
+
+
+def test_anthropic_sdk_is_resolved_lazily() -> None:
+    """The module-level anthropic attribute resolves to the SDK on demand."""
+    claude_impl = importlib.import_module("claude_client_impl.claude_impl")
+
+    assert claude_impl.anthropic is importlib.import_module("anthropic")
+    with pytest.raises(AttributeError):
+        _ = claude_impl.not_a_real_attribute
+
+
+def test_model_is_resolved_once_at_import(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Clients use the module-level model; ANTHROPIC_MODEL is not re-read per client."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_MODEL", "ignored-after-import")
+    assert ClaudeClient()._model == claude_impl._DEFAULT_MODEL
+
+    monkeypatch.setattr(claude_impl, "_DEFAULT_MODEL", "claude-test")
+    assert ClaudeClient()._base_kwargs == {"model": "claude-test", "max_tokens": 1024}
 
 
 def test_get_client_impl_returns_new_instance(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -214,3 +386,153 @@ def test_register_binds_factory(monkeypatch: pytest.MonkeyPatch) -> None:
 
     # ASSERT
     assert ai_client_api.get_client is get_client_impl
+
+
+def test_models_use_slots() -> None:
+    """Claude models store attributes in slots rather than a per-instance dict."""
+    block = ClaudeContentBlock(block_type="text", text="hi")
+    message = ClaudeMessage(role="user", content=[block])
+
+    assert not hasattr(block, "__dict__")
+    assert not hasattr(message, "__dict__")
+
+
+def test_block_serialization_matches_set_fields() -> None:
+    """Each block shape serializes only the fields that were provided."""
+    tool_use = ClaudeContentBlock(block_type="tool_use", tool_call_id="t1", name="tool", tool_input={"a": 1})
+    tool_result = ClaudeContentBlock(block_type="tool_result", tool_use_id="t1", content="done")
+    mixed = ClaudeContentBlock(block_type="tool_use", tool_call_id="t2", name="tool")
+
+    assert tool_use.to_dict() == {"type": "tool_use", "id": "t1", "name": "tool", "input": {"a": 1}}
+    assert tool_result.to_dict() == {"type": "tool_result", "tool_use_id": "t1", "content": "done"}
+    assert mixed.to_dict() == {"type": "tool_use", "id": "t2", "name": "tool"}
+
+
+def test_tool_definition_serialization_is_cached() -> None:
+    """Tool definitions build their payload once, from a snapshot of the schema."""
+    schema: dict[str, Any] = {"type": "object"}
+    tool = ClaudeToolDefinition(name="foo", description="desc", input_schema=schema)
+
+    first = tool.to_dict()
+    schema["required"] = ["x"]
+
+    assert tool.to_dict() is first
+    assert first == {"name": "foo", "description": "desc", "input_schema": {"type": "object"}}
+
+
+def test_message_serialization_is_cached() -> None:
+    """Messages freeze their content and reuse one payload built from the block payloads."""
+    tool_input = {"a": 1}
+    block = ClaudeContentBlock(block_type="tool_use", tool_call_id="t1", name="tool", tool_input=tool_input)
+    blocks = [block]
+    msg = ClaudeMessage(role="user", content=blocks)
+    blocks.append(ClaudeContentBlock(block_type="text", text="later"))
+
+    first = msg.to_dict()
+    tool_input["b"] = 3
+
+    assert msg.content == (block,)
+    assert msg.to_dict() is first
+    assert first["content"][0] is block.to_dict()
+    assert first == {"role": "user", "content": [{"type": "tool_use", "id": "t1", "name": "tool", "input": {"a": 1}}]}
+
+    frozen = (block,)
+    assert ClaudeMessage(role="user", content=frozen).content is frozen
+
+
+def test_requests_never_mutate_cached_payloads(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Building and sending requests leaves the shared read-only payloads untouched."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+
+    class _StubMessages:
+        def create(self, **_kwargs: Any) -> Any:
+            return SimpleNamespace(content=[])
+
+    class _StubAnthropic:
+        def __init__(self, api_key: str) -> None:
+            self.api_key = api_key
+            self.messages = _StubMessages()
+
+    monkeypatch.setattr("claude_client_impl.claude_impl.anthropic.Anthropic", _StubAnthropic)
+    history = [
+        ClaudeMessage(role="user", content=[ClaudeContentBlock(block_type="text", text="hi")]),
+        ClaudeMessage(
+            role="assistant",
+            content=[ClaudeContentBlock(block_type="tool_use", tool_call_id="t1", name="foo", tool_input={"a": 1})],
+        ),
+        ClaudeMessage(role="user", content=[ClaudeContentBlock(block_type="tool_result", tool_use_id="t1", content="ok")]),
+    ]
+    tools = [ClaudeToolDefinition(name="foo", description="desc", input_schema={"type": "object"})]
+    payloads = [msg.to_dict() for msg in history] + [tool.to_dict() for tool in tools]
+    snapshots = copy.deepcopy(payloads)
+
+    client = ClaudeClient()
+    for _ in range(2):
+        client.generate_response(messages=history, system="sys", tools=tools)
+
+    after = [msg.to_dict() for msg in history] + [tool.to_dict() for tool in tools]
+    assert after == snapshots
+    assert all(a is b for a, b in zip(payloads, after, strict=True))
+
+
+def test_message_json_bytes_round_trip() -> None:
+    """to_json_bytes encodes the same payload as to_dict, with either backend."""
+    msg = ClaudeMessage(role="user", content=[ClaudeContentBlock(block_type="text", text="héllo")])
+
+    encoded = msg.to_json_bytes()
+
+    assert json.loads(encoded) == msg.to_dict()
+    assert _stdlib_json_dumps(msg.to_dict()) == encoded
+
+
+def test_serialize_messages_handles_mixed_implementations() -> None:
+    """Claude and foreign Message implementations serialize to the same shape."""
+    claude_msg = ClaudeMessage(role="assistant", content=[ClaudeContentBlock(block_type="text", text="a")])
+    dummy_msg = _DummyMessage(role="user", content=[_DummyBlock(block_type="text", text="b")])
+
+    assert _serialize_messages([claude_msg, dummy_msg]) == [
+        {"role": "assistant", "content": [{"type": "text", "text": "a"}]},
+        {"role": "user", "content": [{"type": "text", "text": "b"}]},
+    ]
+
+
+@pytest.mark.parametrize(("block_type", "interned"), [("TEXT", TYPE_TEXT), ("TOOL_RESULT", TYPE_TOOL_RESULT)])
+def test_block_type_is_interned(block_type: str, interned: str) -> None:
+    """Caller-supplied block types are interned on construction."""
+    block = ClaudeContentBlock(block_type=block_type.lower(), text="hi")
+
+    assert block.type is interned
+
+
+def test_iter_content_blocks_interns_sdk_block_types() -> None:
+    """Block types read from the SDK match the interned constants even when built at runtime."""
+    text_type, tool_type = "TEXT".lower(), "TOOL_USE".lower()
+    events = [
+        SimpleNamespace(type="content_block_start", index=0, content_block=SimpleNamespace(type=text_type, text="hi")),
+        SimpleNamespace(type="content_block_stop", index=0),
+        SimpleNamespace(
+            type="content_block_start",
+            index=1,
+            content_block=SimpleNamespace(type=tool_type, id="t1", name="tool", input={"a": 1}),
+        ),
+        SimpleNamespace(type="content_block_stop", index=1),
+    ]
+
+    blocks = list(iter_content_blocks(events))
+
+    assert [block.type for block in blocks] == [TYPE_TEXT, TYPE_TOOL_USE]
+    assert blocks[0].type is TYPE_TEXT
+    assert blocks[1].type is TYPE_TOOL_USE
+    assert blocks[1].input == {"a": 1}
+
+
+def test_register_models_is_idempotent(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Registering model factories rebinds stale entries and leaves repeat calls as no-ops."""
+    monkeypatch.setattr(ai_client_api, "message", object(), raising=False)
+
+    register_models()
+    bound = dict(vars(ai_client_api))
+    register_models()
+
+    assert ai_client_api.message is message_impl
+    assert vars(ai_client_api) == bound
@@ -1,14 +1,25 @@
 """Discord gateway listener that forwards messages to the orchestrator."""
 
 import asyncio
+import atexit
+import contextlib
 import logging
 import os
+import re
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 
+import aiohttp
 import discord
 import requests
 from discord import app_commands
 from dotenv import load_dotenv
 from orchestrator.models import IncomingMessage, OrchestratorReply
+from pydantic import TypeAdapter
+from pydantic_core import from_json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
@@ -19,19 +30,82 @@ PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL")
 AUTH_PROVIDERS = os.environ.get("AUTH_PROVIDERS", "google")
 AUTH_PROVIDERS_LIST = [provider.strip() for provider in AUTH_PROVIDERS.split(",") if provider.strip()] or ["google"]
 DISCORD_MAX_LEN = 2000
+_NON_WHITESPACE = re.compile(r"\S")
 DEFAULT_TIMEOUT_SECONDS = 60.0
+ORCHESTRATOR_MAX_CONNECTIONS = 32
+# DMs arriving within the window are coalesced into one /events/messages POST when the
+# batch size is above 1. The orchestrator runs a batch's turns concurrently (one user's in
+# order), but its replies come back in one response, so each waits for the whole batch;
+# the default of 1 keeps one POST per message.
+ORCHESTRATOR_BATCH_MAX = max(1, int(os.environ.get("ORCHESTRATOR_BATCH_MAX", "1")))
+ORCHESTRATOR_BATCH_WINDOW_SECONDS = 0.05
+# When enabled with a single auth provider, DMs from users known to be signed out get
+# the login banner straight from the listener instead of a full orchestrator turn.
+REQUIRE_LOGIN = os.environ.get("REQUIRE_LOGIN", "").strip().lower() in {"1", "true", "yes"}
+# The common single-provider deployment is resolved once here instead of per DM.
+_SINGLE_PROVIDER = AUTH_PROVIDERS_LIST[0] if len(AUTH_PROVIDERS_LIST) == 1 else None
+# The gate looks the sender up on every DM, so signed-in answers are kept briefly. Signed-out
+# ones are not, so a user who just finished signing in gets through on their next DM; a stale
+# signed-in answer only forwards a DM the orchestrator then answers with its own status check.
+LOGIN_GATE_TTL_SECONDS = 30.0
+_LOGIN_GATE_CACHE_MAX = 10_000
+_SIGNED_IN_UNTIL: dict[tuple[str, str], float] = {}
 
 if not DISCORD_BOT_TOKEN:
     raise RuntimeError("DISCORD_BOT_TOKEN is required.")  # noqa: TRY003, EM101
 if not PUBLIC_BASE_URL:
     raise RuntimeError("PUBLIC_BASE_URL is required.")  # noqa: TRY003, EM101
-ORCHESTRATOR_URL = f"{PUBLIC_BASE_URL.rstrip('/')}/events/message"
+_PUBLIC_BASE = PUBLIC_BASE_URL.rstrip("/")
+_PROVIDER_DISPLAY = {provider: provider.capitalize() for provider in AUTH_PROVIDERS_LIST}
+ORCHESTRATOR_URL = f"{_PUBLIC_BASE}/events/message"
+ORCHESTRATOR_BATCH_URL = f"{_PUBLIC_BASE}/events/messages"
+
+# Bodies are encoded/decoded by pydantic-core directly to/from JSON bytes.
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_INCOMING_BATCH = TypeAdapter(list[IncomingMessage])
+_REPLY_BATCH = TypeAdapter(list[OrchestratorReply])
+
+# Keep-alive session for the blocking status lookups so they reuse pooled TCP/TLS
+# connections instead of handshaking per request.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.1))
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+atexit.register(_SESSION.close)
+# Status lookups run on their own small pool of warm workers, sized under the session's
+# connection pool, instead of the loop's default executor shared with discord.py.
+_STATUS_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="auth-status")
+atexit.register(_STATUS_EXECUTOR.shutdown, wait=False)
+
+
+class _ListenerClient(discord.Client):
+    """discord.Client that owns the aiohttp session used to post DMs to the orchestrator."""
+
+    def __init__(self, *, intents: discord.Intents) -> None:
+        super().__init__(intents=intents)
+        self._orchestrator_session: aiohttp.ClientSession | None = None
+
+    def orchestrator_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it inside the running event loop on first use."""
+        session = self._orchestrator_session
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=ORCHESTRATOR_MAX_CONNECTIONS)
+            session = self._orchestrator_session = aiohttp.ClientSession(connector=connector)
+        return session
+
+    async def close(self) -> None:
+        """Close the orchestrator session along with the gateway connection."""
+        await _BATCHER.close()
+        if self._orchestrator_session is not None:
+            await self._orchestrator_session.close()
+        await super().close()
+
 
 intents = discord.Intents.default()
 intents.message_content = True
-client = discord.Client(intents=intents)
+client = _ListenerClient(intents=intents)
 tree = app_commands.CommandTree(client)
-AUTH_PROVIDER_CHOICES = [app_commands.Choice(name=provider.capitalize(), value=provider) for provider in AUTH_PROVIDERS_LIST]
+AUTH_PROVIDER_CHOICES = [app_commands.Choice(name=name, value=provider) for provider, name in _PROVIDER_DISPLAY.items()]
 
 
 # ---------------------------------------------------------------------------
@@ -39,29 +113,31 @@ AUTH_PROVIDER_CHOICES = [app_commands.Choice(name=provider.capitalize(), value=p
 # ---------------------------------------------------------------------------
 
 
-def _chunk_text(text: str, max_len: int = DISCORD_MAX_LEN) -> list[str]:
-    if not text:
-        return []
-    chunks = []
-    while text:
-        if len(text) <= max_len:
-            chunks.append(text)
-            break
-        split_at = text.rfind("\n", 0, max_len)
+def _chunk_text(text: str, max_len: int = DISCORD_MAX_LEN) -> Iterator[str]:
+    # Walk a start offset instead of re-slicing the remainder, which copied the rest of
+    # the reply for every chunk. Splits still prefer the last newline, then space.
+    # Chunks are yielded so the first one can be sent before the rest are split.
+    start, end = 0, len(text)
+    while start < end:
+        if end - start <= max_len:
+            yield text[start:]
+            return
+        limit = start + max_len
+        split_at = text.rfind("\n", start, limit)
         if split_at == -1:
-            split_at = text.rfind(" ", 0, max_len)
+            split_at = text.rfind(" ", start, limit)
         if split_at == -1:
-            split_at = max_len
-        chunks.append(text[:split_at].rstrip())
-        text = text[split_at:].lstrip()
-    return chunks
+            split_at = limit
+        yield text[start:split_at].rstrip()
+        next_start = _NON_WHITESPACE.search(text, split_at)
+        start = next_start.start() if next_start else end
 
 
 def _is_logged_in(user_id: str, provider: str) -> bool | None:
     try:
-        response = requests.get(_build_auth_url("status", user_id, provider), timeout=5.0)
+        response = _SESSION.get(_build_auth_url("status", user_id, provider), timeout=5.0)
         response.raise_for_status()
-        payload = response.json()
+        payload = from_json(response.content)
     except (requests.RequestException, ValueError, TypeError):
         return None
     if not isinstance(payload, dict):
@@ -69,52 +145,175 @@ def _is_logged_in(user_id: str, provider: str) -> bool | None:
     return bool(payload.get("logged_in"))
 
 
+async def _is_logged_in_async(user_id: str, provider: str) -> bool | None:
+    """Run the blocking status lookup in a worker thread so the gateway loop keeps running."""
+    return await asyncio.get_running_loop().run_in_executor(_STATUS_EXECUTOR, _is_logged_in, user_id, provider)
+
+
 def _build_auth_url(action: str, user_id: str, provider: str) -> str:
-    if not PUBLIC_BASE_URL:
+    if not _PUBLIC_BASE:
         raise RuntimeError("PUBLIC_BASE_URL is required.")  # noqa: TRY003, EM101
-    base = PUBLIC_BASE_URL.rstrip("/")
-    return f"{base}/auth/{provider}/{action}?user_id={user_id}"
+    return f"{_PUBLIC_BASE}/auth/{provider}/{action}?user_id={user_id}"
+
+
+# (title/button label, description template) per auth action.
+_AUTH_ACTIONS = {
+    "login": ("Sign in", "Use the buttons below to sign in to your {provider} account."),
+    "logout": ("Sign out", "Use the buttons below to sign out of your {provider} account."),
+}
+
+
+def _build_auth_embed(action: str, provider: str | None) -> discord.Embed:
+    try:
+        title, text = _AUTH_ACTIONS[action]
+    except KeyError:
+        raise ValueError(f"Unsupported auth action: {action}") from None  # noqa: TRY003, EM102
+    return discord.Embed(
+        title=title,
+        description=text.format(provider=(provider or "").capitalize()),
+        color=0xED4245,
+    )
+
+
+# The embed text only depends on (action, provider); only the button URL is per user.
+# Templates exist for the configured providers only and are never added at runtime, so
+# provider strings arriving in replies cannot grow the cache.
+_EMBED_TEMPLATES: dict[tuple[str, str | None], discord.Embed] = {
+    (action, provider): _build_auth_embed(action, provider)
+    for provider in AUTH_PROVIDERS_LIST
+    for action in _AUTH_ACTIONS
+}
 
 
 def _auth_banner(action: str, url: str, provider: str | None) -> tuple[discord.Embed, discord.ui.View]:
-    provider_name = (provider or "").capitalize()
-    if action == "login":
-        title = "Sign in"
-        button_label = "Sign in"
-        text = f"Use the buttons below to sign in to your {provider_name} account."
-    elif action == "logout":
-        title = "Sign out"
-        button_label = "Sign out"
-        text = f"Use the buttons below to sign out of your {provider_name} account."
-    else:
-        raise ValueError(f"Unsupported auth action: {action}")  # noqa: TRY003, EM102
+    template = _EMBED_TEMPLATES.get((action, provider))
+    if template is None:
+        template = _build_auth_embed(action, provider)
 
+    # Views hold per-interaction state (and a future bound to the running loop), so
+    # they are still created per call. Embeds are copied so callers can mutate them.
     view = discord.ui.View()
     view.add_item(
         discord.ui.Button(
-            label=button_label,
+            label=template.title,
             style=discord.ButtonStyle.link,
             url=url,
         )
     )
-    embed = discord.Embed(
-        title=title,
-        description=text,
-        color=0xED4245,
-    )
-    return embed, view
+    return template.copy(), view
 
 
-def _send_to_orchestrator(
+async def _send_to_orchestrator(
     url: str,
     message: IncomingMessage,
     *,
     timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
 ) -> OrchestratorReply:
-    """Post the normalized message to the orchestrator and parse its reply."""
-    response = requests.post(url, json=message.model_dump(), timeout=timeout_seconds)
-    response.raise_for_status()
-    return OrchestratorReply.model_validate(response.json())
+    """Post the normalized message to the orchestrator and parse its reply.
+
+    Runs on the event loop over the client's pooled aiohttp session, so concurrent DMs
+    do not each hold a worker thread while the orchestrator (and Claude) respond.
+    """
+    session = client.orchestrator_session()
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+    async with session.post(url, data=message.model_dump_json(), headers=_JSON_HEADERS, timeout=timeout) as response:
+        response.raise_for_status()
+        body = await response.read()
+    return OrchestratorReply.model_validate_json(body)
+
+
+async def _send_batch_to_orchestrator(
+    url: str,
+    messages: list[IncomingMessage],
+    *,
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+) -> list[OrchestratorReply]:
+    """Post several normalized messages in one request and parse the replies in order."""
+    session = client.orchestrator_session()
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+    async with session.post(url, data=_INCOMING_BATCH.dump_json(messages), headers=_JSON_HEADERS, timeout=timeout) as response:
+        response.raise_for_status()
+        body = await response.read()
+    replies = _REPLY_BATCH.validate_json(body)
+    if len(replies) != len(messages):
+        raise ValueError(f"Expected {len(messages)} replies, got {len(replies)}")  # noqa: TRY003, EM102
+    return replies
+
+
+class _MessageBatcher:
+    """Coalesce messages submitted within a short window into one batched orchestrator POST."""
+
+    def __init__(self, max_items: int, window_seconds: float) -> None:
+        self._max_items = max_items
+        self._window_seconds = window_seconds
+        self._queue: asyncio.Queue[tuple[IncomingMessage, asyncio.Future[OrchestratorReply]]] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._inflight: set[asyncio.Task[None]] = set()
+
+    async def submit(self, message: IncomingMessage) -> OrchestratorReply:
+        """Queue a message for the next flush and wait for its reply."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop(self._queue))
+        future: asyncio.Future[OrchestratorReply] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, future))
+        return await future
+
+    async def close(self) -> None:
+        """Stop the flush loop and any in-flight flushes; their callers are cancelled."""
+        tasks = [*self._inflight, *([self._task] if self._task is not None else [])]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._queue = None
+        self._task = None
+
+    async def _flush_loop(self, queue: asyncio.Queue[tuple[IncomingMessage, asyncio.Future[OrchestratorReply]]]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self._window_seconds
+            while len(batch) < self._max_items:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except TimeoutError:
+                    break
+            # Flush concurrently so one slow batch does not hold back the next window.
+            flush = asyncio.create_task(self._flush(batch))
+            self._inflight.add(flush)
+            flush.add_done_callback(self._inflight.discard)
+
+    async def _flush(self, batch: list[tuple[IncomingMessage, asyncio.Future[OrchestratorReply]]]) -> None:
+        try:
+            replies = await _send_batch_to_orchestrator(ORCHESTRATOR_BATCH_URL, [message for message, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:  # noqa: BLE001 - surfaced to each waiting on_message call
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), reply in zip(batch, replies, strict=True):
+            if not future.done():
+                future.set_result(reply)
+
+
+_BATCHER = _MessageBatcher(ORCHESTRATOR_BATCH_MAX, ORCHESTRATOR_BATCH_WINDOW_SECONDS)
+
+
+async def _deliver(message: IncomingMessage) -> OrchestratorReply:
+    """Send a message to the orchestrator, through the batcher when batching is enabled."""
+    if ORCHESTRATOR_BATCH_MAX > 1:
+        return await _BATCHER.submit(message)
+    return await _send_to_orchestrator(ORCHESTRATOR_URL, message)
 
 
 # ---------------------------------------------------------------------------
@@ -135,15 +334,16 @@ async def login_command(interaction: discord.Interaction, provider: app_commands
         None.
 
     """
-    provider_name = provider.value.capitalize()
-    status = _is_logged_in(str(interaction.user.id), provider.value)
+    provider_name = _PROVIDER_DISPLAY[provider.value]
+    user_id = str(interaction.user.id)
+    status = await _is_logged_in_async(user_id, provider.value)
     if status is True:
         await interaction.response.send_message(
             f"You are already signed in to your {provider_name} account.",
             ephemeral=True,
         )
         return
-    login_url = _build_auth_url("login", str(interaction.user.id), provider.value)
+    login_url = _build_auth_url("login", user_id, provider.value)
     embed, view = _auth_banner("login", login_url, provider.value)
     await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
@@ -161,15 +361,17 @@ async def logout_command(interaction: discord.Interaction, provider: app_command
         None.
 
     """
-    provider_name = provider.value.capitalize()
-    status = _is_logged_in(str(interaction.user.id), provider.value)
+    provider_name = _PROVIDER_DISPLAY[provider.value]
+    user_id = str(interaction.user.id)
+    _SIGNED_IN_UNTIL.pop((user_id, provider.value), None)
+    status = await _is_logged_in_async(user_id, provider.value)
     if status is False:
         await interaction.response.send_message(
             f"You are not signed in to your {provider_name} account.",
             ephemeral=True,
         )
         return
-    logout_url = _build_auth_url("logout", str(interaction.user.id), provider.value)
+    logout_url = _build_auth_url("logout", user_id, provider.value)
     embed, view = _auth_banner("logout", logout_url, provider.value)
     await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
@@ -189,6 +391,30 @@ async def on_ready() -> None:
         logger.exception("Failed to sync slash commands")
 
 
+async def _send_login_gate(message: discord.Message, user_id: str) -> bool:
+    """Send the login banner and return True when a DM sender is known to be signed out."""
+    provider = _SINGLE_PROVIDER
+    if not REQUIRE_LOGIN or provider is None:
+        return False
+    key = (user_id, provider)
+    now = time.monotonic()
+    if _SIGNED_IN_UNTIL.get(key, 0.0) > now:
+        return False
+    status = await _is_logged_in_async(user_id, provider)
+    if status is True:
+        if len(_SIGNED_IN_UNTIL) >= _LOGIN_GATE_CACHE_MAX:
+            # Entries are inserted in expiry order, so the first one is the oldest.
+            del _SIGNED_IN_UNTIL[next(iter(_SIGNED_IN_UNTIL))]
+        _SIGNED_IN_UNTIL.pop(key, None)
+        _SIGNED_IN_UNTIL[key] = now + LOGIN_GATE_TTL_SECONDS
+    # Unknown status (None) falls through so the orchestrator can still answer.
+    if status is not False:
+        return False
+    embed, view = _auth_banner("login", _build_auth_url("login", user_id, provider), provider)
+    await message.channel.send(embed=embed, view=view)
+    return True
+
+
 @client.event
 async def on_message(message: discord.Message) -> None: # noqa: C901
     """Forward DM messages to the orchestrator and post the reply.
@@ -200,30 +426,32 @@ async def on_message(message: discord.Message) -> None: # noqa: C901
         None.
 
     """
-    if not isinstance(message.channel, discord.DMChannel):
-        return
-
-    if message.author.bot:
+    # ChannelType is an enum, so this is an identity check rather than an isinstance
+    # walk. Only one-to-one DMs are private; group DMs and guild channels fall out here.
+    if message.channel.type is not discord.ChannelType.private or message.author.bot:
         return
 
     content = (message.content or "").strip()
     if not content:
         return
 
-    incoming = IncomingMessage(
+    # Snowflake IDs are stringified once and shared by the gate and the payload.
+    user_id = str(message.author.id)
+    if await _send_login_gate(message, user_id):
+        return
+
+    # Every field is a str built right here, so pydantic validation would be wasted work.
+    # Replies still arrive over the wire and are validated when parsed.
+    incoming = IncomingMessage.model_construct(
         provider="discord",
         channel_id=str(message.channel.id),
-        user_id=str(message.author.id),
+        user_id=user_id,
         content=content,
         message_id=str(message.id),
     )
 
     try:
-        reply_obj = await asyncio.to_thread(
-            _send_to_orchestrator,
-            ORCHESTRATOR_URL,
-            incoming,
-        )
+        reply_obj = await _deliver(incoming)
     except Exception:
         logger.exception("Failed to call orchestrator")
         return
@@ -246,6 +474,8 @@ async def on_message(message: discord.Message) -> None: # noqa: C901
         return
 
     if reply:
+        # Sent one at a time on purpose: Discord shows messages in arrival order and
+        # discord.py already serializes sends to a channel behind its rate limiter.
         for part in _chunk_text(reply):
             await message.channel.send(part)
 
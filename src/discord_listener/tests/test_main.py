@@ -2,68 +2,245 @@
 
 from __future__ import annotations
 
+import ast
+import asyncio
 import importlib
-import runpy
+import json
 import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
 from types import ModuleType, SimpleNamespace
-from typing import TYPE_CHECKING, Any
-from unittest.mock import Mock, call
+from typing import TYPE_CHECKING, Any, Self, cast
+from unittest.mock import AsyncMock, Mock, call
 
+import discord
 import pytest
-import requests
 from orchestrator.models import IncomingMessage, OrchestratorReply
+from requests import RequestException, Session
 
 if TYPE_CHECKING:
-    from pathlib import Path
+    from collections.abc import Awaitable, Callable, Iterator
+
+
+_LISTENER_MODULE = "discord_listener.main"
 
 
 def _import_module_fresh() -> ModuleType:
-    if "discord_listener.main" in sys.modules:
-        del sys.modules["discord_listener.main"]
-    return importlib.import_module("discord_listener.main")
+    # Only the listener module is evicted; discord, requests, orchestrator.models, etc.
+    # stay cached in sys.modules, so the fresh import re-runs just this module's body.
+    sys.modules.pop(_LISTENER_MODULE, None)
+    return importlib.import_module(_LISTENER_MODULE)
 
 
-@pytest.fixture
-def discord_module(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> ModuleType:
-    """Reload the discord listener module with stable environment settings."""
-    monkeypatch.setenv("DISCORD_BOT_TOKEN", "test-token")
-    monkeypatch.setenv("PUBLIC_BASE_URL", "https://example.com")
-    monkeypatch.setenv("AUTH_PROVIDERS", "google")
+_STABLE_ENV = {
+    "DISCORD_BOT_TOKEN": "test-token",
+    "PUBLIC_BASE_URL": "https://example.com",
+    "AUTH_PROVIDERS": "google",
+}
+# Left unset so the listener's defaults apply.
+_UNSET_ENV = ("REQUIRE_LOGIN", "ORCHESTRATOR_BATCH_MAX")
 
-    import discord_listener.main as module
 
+def _set_stable_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Per-key entries are the cheapest exact undo: swapping os.environ for a dict would hide
+    # the values from child processes, and patch.dict restores by rewriting every variable.
+    for name, value in _STABLE_ENV.items():
+        monkeypatch.setenv(name, value)
+    for name in _UNSET_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def _reload(module: ModuleType) -> ModuleType:
+    # The import-failure tests drop the entry from sys.modules; reload needs it back.
+    sys.modules[module.__name__] = module
     return importlib.reload(module)
 
 
-class TestDiscordListenerHelpers:
-    """Unit tests for helper utilities."""
+@pytest.fixture(scope="session")
+def _listener_module() -> ModuleType:
+    """Load the discord listener module once per session with stable environment settings.
+
+    A first import already reads the stable settings, so the module body only runs a second
+    time when another suite imported the listener earlier under its own environment.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        _set_stable_env(monkeypatch)
+        module = sys.modules.get(_LISTENER_MODULE)
+        if module is None:
+            return importlib.import_module(_LISTENER_MODULE)
+        return _reload(module)
+
+
+@pytest.fixture
+def discord_module(_listener_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> ModuleType:
+    """Return the shared listener module; per-test attribute patches are undone by monkeypatch."""
+    _set_stable_env(monkeypatch)
+    return _listener_module
+
+
+@pytest.fixture
+def reload_discord_module(discord_module: ModuleType) -> Iterator[Callable[[], ModuleType]]:
+    """Reload the shared module under the test's environment, then restore the stable one.
+
+    The stable namespace is snapshotted and put back in place afterwards, so only the
+    test's own reload executes the module body. The dict is updated in place because the
+    module's functions hold it as their globals.
+    """
+    stable = dict(vars(discord_module))
+    yield lambda: _reload(discord_module)
+    sys.modules[discord_module.__name__] = discord_module
+    namespace = vars(discord_module)
+    namespace.clear()
+    namespace.update(stable)
+
+
+@pytest.fixture(autouse=True)
+def mock_requests(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """Replace blocking HTTP on every ``requests.Session`` with per-test configurable mocks.
+
+    Patching the class also covers the session a module reload builds, so no test can reach
+    the network through ``_SESSION`` by forgetting a stub.
+    """
+    mocks = SimpleNamespace(get=Mock(), post=Mock())
+    monkeypatch.setattr(Session, "get", mocks.get)
+    monkeypatch.setattr(Session, "post", mocks.post)
+    return mocks
+
+
+def _dm_channel(channel_id: int = 123) -> SimpleNamespace:
+    return SimpleNamespace(id=channel_id, type=discord.ChannelType.private, send=AsyncMock())
+
+
+class _DummyHTTPResponse:
+    """aiohttp response double usable as ``async with session.post(...) as response``."""
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.raise_for_status = Mock()
 
-    def test_chunk_text_empty(self, discord_module: ModuleType) -> None:
-        """Empty text yields no chunks."""
-        assert discord_module._chunk_text("") == []
+    async def read(self) -> bytes:
+        return self.body
 
-    def test_chunk_text_splits_on_newline(self, discord_module: ModuleType) -> None:
-        """Text splits on newline boundaries when possible."""
-        text = "hello\nworld"
-        assert discord_module._chunk_text(text, max_len=8) == ["hello", "world"]
+    async def __aenter__(self) -> Self:
+        return self
 
-    def test_chunk_text_falls_back_to_fixed_width(self, discord_module: ModuleType) -> None:
-        """Long text without spaces splits by length."""
-        text = "abcdefghij"
-        assert discord_module._chunk_text(text, max_len=4) == ["abcd", "efgh", "ij"]
+    async def __aexit__(self, *_exc_info: object) -> None:
+        return None
+
+
+def _inline_is_logged_in(module: ModuleType) -> Callable[[str, str], Awaitable[bool | None]]:
+    async def lookup(user_id: str, provider: str) -> bool | None:
+        return cast("bool | None", module._is_logged_in(user_id, provider))
+
+    return lookup
+
+
+def _assert_ephemeral_text(response: AsyncMock, fragment: str) -> None:
+    response.send_message.assert_awaited_once()
+    assert response.send_message.call_args.kwargs == {"ephemeral": True}
+    assert fragment in response.send_message.call_args.args[0]
+
+
+def _assert_ephemeral_banner(response: AsyncMock, banner: _FakeBanner) -> None:
+    response.send_message.assert_awaited_once_with(embed=banner.embed, view=banner.view, ephemeral=True)
+
+
+def _interaction(user_id: int) -> SimpleNamespace:
+    return SimpleNamespace(user=SimpleNamespace(id=user_id), response=AsyncMock())
+
+
+@dataclass
+class _FakeBanner:
+    """Sentinel embed/view pair returned by the stubbed ``_auth_banner``, plus its calls."""
+
+    embed: object = field(default_factory=object)
+    view: object = field(default_factory=object)
+    calls: list[tuple[Any, ...]] = field(default_factory=list)
+
+    def build(self, *args: Any) -> tuple[object, object]:
+        self.calls.append(args)
+        return self.embed, self.view
+
+
+@dataclass
+class _DMEnv:
+    """DM test harness: set ``reply``/``error`` to steer the stubbed orchestrator call."""
+
+    channel: SimpleNamespace
+    banner: _FakeBanner
+    reply: OrchestratorReply = field(default_factory=lambda: OrchestratorReply(reply=""))
+    error: Exception | None = None
+    forwarded: list[IncomingMessage] = field(default_factory=list)
+
+    async def send(self, _url: str, incoming: IncomingMessage, **_kwargs: Any) -> OrchestratorReply:
+        self.forwarded.append(incoming)
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+    def message(self, content: str = "hi", *, bot: bool = False, channel: object = None) -> SimpleNamespace:
+        return SimpleNamespace(
+            channel=self.channel if channel is None else channel,
+            author=SimpleNamespace(bot=bot, id=456),
+            content=content,
+            id=789,
+        )
+
+
+@pytest.fixture
+def fake_banner(discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> _FakeBanner:
+    """Replace _auth_banner with a stub that records its arguments and returns sentinel objects."""
+    banner = _FakeBanner()
+    monkeypatch.setattr(discord_module, "_auth_banner", banner.build)
+    return banner
 
-    def test_is_logged_in_true_false(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+
+@pytest.fixture
+def dm_env(discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch, fake_banner: _FakeBanner) -> _DMEnv:
+    """Stub the orchestrator call for DM tests and expose the channel, reply, and forwarded payloads."""
+    env = _DMEnv(channel=_dm_channel(), banner=fake_banner)
+    monkeypatch.setattr(discord_module, "_send_to_orchestrator", env.send)
+    return env
+
+
+class TestDiscordListenerHelpers:
+    """Unit tests for helper utilities."""
+
+    @pytest.mark.parametrize(
+        ("text", "max_len", "expected"),
+        [
+            ("", 100, []),
+            ("hello\nworld", 8, ["hello", "world"]),
+            ("abcdefghij", 4, ["abcd", "efgh", "ij"]),
+            ("ab  \n  cd", 3, ["ab", "cd"]),
+        ],
+        ids=["empty", "newline", "fixed-width", "separator-whitespace"],
+    )
+    def test_chunk_text(self, discord_module: ModuleType, text: str, max_len: int, expected: list[str]) -> None:
+        """Text splits on newlines, then spaces, then fixed width, dropping separator whitespace."""
+        assert list(discord_module._chunk_text(text, max_len=max_len)) == expected
+
+    def test_chunk_text_long_reply_keeps_words(self, discord_module: ModuleType) -> None:
+        """Multi-chunk replies stay within the limit and keep every word."""
+        text = " ".join(f"word{i}" for i in range(500))
+        max_len = 50
+        chunks = list(discord_module._chunk_text(text, max_len=max_len))
+        assert all(0 < len(chunk) <= max_len for chunk in chunks)
+        assert " ".join(chunks).split() == text.split()
+
+    def test_is_logged_in_true_false(self, discord_module: ModuleType, mock_requests: SimpleNamespace) -> None:
         """HTTP lookup returns True/False based on response payload."""
         response_true = Mock()
         response_true.raise_for_status = Mock()
-        response_true.json.return_value = {"logged_in": True}
+        response_true.content = b'{"logged_in": true}'
 
         response_false = Mock()
         response_false.raise_for_status = Mock()
-        response_false.json.return_value = {"logged_in": False}
+        response_false.content = b'{"logged_in": false}'
 
-        mock_get = Mock(side_effect=[response_true, response_false])
-        monkeypatch.setattr(discord_module.requests, "get", mock_get)
+        mock_get = mock_requests.get
+        mock_get.side_effect = [response_true, response_false]
 
         assert discord_module._is_logged_in("u1", "google") is True
         assert discord_module._is_logged_in("u2", "google") is False
@@ -76,44 +253,91 @@ class TestDiscordListenerHelpers:
             ]
         )
 
-    def test_is_logged_in_handles_errors(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Request errors return None instead of raising."""
-        monkeypatch.setattr(
-            discord_module.requests,
-            "get",
-            Mock(side_effect=requests.RequestException("boom")),
-        )
+    @pytest.mark.parametrize(
+        "outcome",
+        [RequestException("boom"), Mock(content=b"<html>"), Mock(content=b"[true]")],
+        ids=["request-error", "invalid-json", "non-object"],
+    )
+    def test_is_logged_in_unknown_status(
+        self, discord_module: ModuleType, mock_requests: SimpleNamespace, outcome: object
+    ) -> None:
+        """Request errors and malformed status bodies return None instead of raising."""
+        mock_requests.get.side_effect = [outcome]
         assert discord_module._is_logged_in("u1", "google") is None
 
-    def test_build_auth_url_strips_slash(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Base URLs with trailing slashes are normalized."""
-        monkeypatch.setattr(discord_module, "PUBLIC_BASE_URL", "https://example.com/")
-        url = discord_module._build_auth_url("login", "123", "google")
+    def test_session_reuses_pooled_connections(self, discord_module: ModuleType) -> None:
+        """Orchestrator calls share one keep-alive session with a retrying pooled adapter."""
+        adapter = discord_module._SESSION.get_adapter("https://example.com")
+        assert adapter is discord_module._ADAPTER
+        assert discord_module._SESSION.get_adapter("http://example.com") is adapter
+        assert adapter.max_retries.total
+
+    def test_build_auth_url_strips_slash(
+        self, reload_discord_module: Callable[[], ModuleType], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Base URLs with trailing slashes are normalized once at import."""
+        monkeypatch.setenv("PUBLIC_BASE_URL", "https://example.com/")
+        module = reload_discord_module()
+        url = module._build_auth_url("login", "123", "google")
         assert url == "https://example.com/auth/google/login?user_id=123"
+        assert module.ORCHESTRATOR_URL == "https://example.com/events/message"
 
     def test_build_auth_url_requires_base(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
         """Missing base URL raises a helpful error."""
-        monkeypatch.setattr(discord_module, "PUBLIC_BASE_URL", None)
+        monkeypatch.setattr(discord_module, "_PUBLIC_BASE", "")
         with pytest.raises(RuntimeError, match="PUBLIC_BASE_URL is required"):
             discord_module._build_auth_url("login", "123", "google")
 
-    @pytest.mark.asyncio
-    async def test_auth_banner_login_contains_button(self, discord_module: ModuleType) -> None:
-        """Login banners include a link button and provider branding."""
-        embed, view = discord_module._auth_banner("login", "https://example.com/login", "google")
-        assert embed.title == "Sign in"
+    @pytest.mark.parametrize(("action", "label"), [("login", "Sign in"), ("logout", "Sign out")])
+    async def test_auth_banner_contains_button(self, discord_module: ModuleType, action: str, label: str) -> None:
+        """Login and logout banners include a link button and provider branding."""
+        url = f"https://example.com/{action}"
+        embed, view = discord_module._auth_banner(action, url, "google")
+        assert embed.title == label
         assert "Google" in embed.description
         assert len(view.children) == 1
         button = view.children[0]
-        assert button.label == "Sign in"
-        assert button.url == "https://example.com/login"
+        assert button.label == label
+        assert button.url == url
+
+    async def test_status_lookup_runs_off_event_loop(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+        """The blocking status lookup is offloaded to the dedicated status worker pool."""
+        seen: list[tuple[str, str, int, str]] = []
+
+        def fake_lookup(user_id: str, provider: str) -> bool:
+            seen.append((user_id, provider, threading.get_ident(), threading.current_thread().name))
+            return True
+
+        monkeypatch.setattr(discord_module, "_is_logged_in", fake_lookup)
+
+        assert await discord_module._is_logged_in_async("u1", "google") is True
+        assert seen[0][:2] == ("u1", "google")
+        assert seen[0][2] != threading.get_ident()
+        assert seen[0][3].startswith("auth-status")
+
+    async def test_auth_banner_reuses_embed_template(self, discord_module: ModuleType) -> None:
+        """Banners copy a cached embed so per-call edits never leak into the template."""
+        first, _ = discord_module._auth_banner("login", "https://example.com/a", "google")
+        first.title = "changed"
+        second, view = discord_module._auth_banner("login", "https://example.com/b", "google")
+        assert second.title == "Sign in"
+        assert "Google" in second.description
+        assert view.children[0].url == "https://example.com/b"
+
+    async def test_auth_banner_does_not_cache_unconfigured_providers(self, discord_module: ModuleType) -> None:
+        """Providers outside AUTH_PROVIDERS still get a banner but never enter the template cache."""
+        cached = len(discord_module._EMBED_TEMPLATES)
+        embed, _ = discord_module._auth_banner("login", "https://example.com/a", "outlook")
+        assert "Outlook" in embed.description
+        assert ("login", "outlook") not in discord_module._EMBED_TEMPLATES
+        assert len(discord_module._EMBED_TEMPLATES) == cached
 
     def test_auth_banner_rejects_unknown_action(self, discord_module: ModuleType) -> None:
         """Unsupported actions raise a ValueError."""
         with pytest.raises(ValueError, match="Unsupported auth action"):
             discord_module._auth_banner("refresh", "https://example.com", "google")
 
-    def test_send_to_orchestrator_posts_payload(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_send_to_orchestrator_posts_payload(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
         """Requests are posted and parsed into orchestrator replies."""
         message = IncomingMessage(
             provider="discord",
@@ -122,18 +346,12 @@ class TestDiscordListenerHelpers:
             content="hello",
             message_id="m1",
         )
-        mock_response = Mock()
-        mock_response.raise_for_status = Mock()
-        mock_response.json.return_value = {
-            "reply": "hi",
-            "login_url": None,
-            "logout_url": None,
-            "provider": None,
-        }
-        mock_post = Mock(return_value=mock_response)
-        monkeypatch.setattr(discord_module.requests, "post", mock_post)
-
-        reply = discord_module._send_to_orchestrator(
+
+        response = _DummyHTTPResponse(b'{"reply": "hi", "login_url": null, "logout_url": null, "provider": null}')
+        mock_post = Mock(return_value=response)
+        monkeypatch.setattr(discord_module.client, "orchestrator_session", lambda: SimpleNamespace(post=mock_post))
+
+        reply = await discord_module._send_to_orchestrator(
             "https://example.com/events/message",
             message,
             timeout_seconds=3.5,
@@ -142,20 +360,83 @@ class TestDiscordListenerHelpers:
         assert reply.reply == "hi"
         mock_post.assert_called_once_with(
             "https://example.com/events/message",
-            json=message.model_dump(),
-            timeout=3.5,
+            data=message.model_dump_json(),
+            headers={"Content-Type": "application/json"},
+            timeout=discord_module.aiohttp.ClientTimeout(total=3.5),
         )
+        response.raise_for_status.assert_called_once_with()
 
-    @pytest.mark.asyncio
-    async def test_auth_banner_logout_contains_button(self, discord_module: ModuleType) -> None:
-        """Logout banners include a link button and provider branding."""
-        embed, view = discord_module._auth_banner("logout", "https://example.com/logout", "google")
-        assert embed.title == "Sign out"
-        assert "Google" in embed.description
-        assert len(view.children) == 1
-        button = view.children[0]
-        assert button.label == "Sign out"
-        assert button.url == "https://example.com/logout"
+    async def test_send_batch_posts_list_and_checks_length(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Batched posts send a JSON array and reject a reply count mismatch."""
+        mock_post = Mock(side_effect=[_DummyHTTPResponse(b'[{"reply": "a"}]'), _DummyHTTPResponse(b"[]")])
+        monkeypatch.setattr(discord_module.client, "orchestrator_session", lambda: SimpleNamespace(post=mock_post))
+        incoming = IncomingMessage(provider="discord", channel_id="c", user_id="u", content="a")
+
+        replies = await discord_module._send_batch_to_orchestrator("https://example.com/events/messages", [incoming])
+
+        assert [reply.reply for reply in replies] == ["a"]
+        assert json.loads(mock_post.call_args.kwargs["data"]) == [incoming.model_dump()]
+        with pytest.raises(ValueError, match="Expected 1 replies"):
+            await discord_module._send_batch_to_orchestrator("https://example.com/events/messages", [incoming])
+
+    async def test_batcher_coalesces_concurrent_messages(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Messages submitted within the window share one batched POST and get their own replies."""
+        posted: list[tuple[str, list[str]]] = []
+
+        async def fake_send_batch(url: str, messages: list[IncomingMessage], **_kwargs: Any) -> list[OrchestratorReply]:
+            posted.append((url, [message.content for message in messages]))
+            return [OrchestratorReply(reply=message.content.upper()) for message in messages]
+
+        monkeypatch.setattr(discord_module, "_send_batch_to_orchestrator", fake_send_batch)
+        batcher = discord_module._MessageBatcher(max_items=8, window_seconds=0.01)
+        messages = [IncomingMessage(provider="discord", channel_id="c", user_id="u", content=text) for text in ("a", "b")]
+
+        replies = await asyncio.gather(*(batcher.submit(message) for message in messages))
+        await batcher.close()
+
+        assert [reply.reply for reply in replies] == ["A", "B"]
+        assert posted == [(discord_module.ORCHESTRATOR_BATCH_URL, ["a", "b"])]
+
+    async def test_batcher_propagates_errors(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A failed batch POST raises for every waiting caller."""
+
+        async def failing_send_batch(*_args: Any, **_kwargs: Any) -> list[OrchestratorReply]:
+            error_message = "boom"
+            raise RuntimeError(error_message)
+
+        monkeypatch.setattr(discord_module, "_send_batch_to_orchestrator", failing_send_batch)
+        batcher = discord_module._MessageBatcher(max_items=1, window_seconds=0.01)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await batcher.submit(IncomingMessage(provider="discord", channel_id="c", user_id="u", content="a"))
+        await batcher.close()
+
+    async def test_deliver_uses_batcher_only_when_enabled(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Batch size 1 keeps the direct per-message POST."""
+        direct = OrchestratorReply(reply="direct")
+        batched = OrchestratorReply(reply="batched")
+
+        async def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
+            return direct
+
+        async def fake_submit(*_args: Any) -> OrchestratorReply:
+            return batched
+
+        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
+        monkeypatch.setattr(discord_module._BATCHER, "submit", fake_submit)
+        incoming = IncomingMessage(provider="discord", channel_id="c", user_id="u", content="a")
+
+        assert await discord_module._deliver(incoming) is direct
+        monkeypatch.setattr(discord_module, "ORCHESTRATOR_BATCH_MAX", 4)
+        assert await discord_module._deliver(incoming) is batched
+
+    async def test_orchestrator_session_is_shared_and_closed(self, discord_module: ModuleType) -> None:
+        """The client reuses one aiohttp session until it is closed with the client."""
+        session = discord_module.client.orchestrator_session()
+
+        assert discord_module.client.orchestrator_session() is session
+        await discord_module.client.close()
+        assert session.closed
 
 
 class TestDiscordListenerConfig:
@@ -179,327 +460,217 @@ class TestDiscordListenerConfig:
 class TestDiscordListenerCommands:
     """Unit tests for slash command handlers."""
 
-    @pytest.mark.asyncio
+    @pytest.fixture(autouse=True)
+    def _inline_status_lookup(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Run the stubbed status lookup inline; the executor hop is covered by its own test."""
+        monkeypatch.setattr(discord_module, "_is_logged_in_async", _inline_is_logged_in(discord_module))
+
     async def test_login_command_already_logged_in(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
         """Login command returns status message when already logged in."""
         monkeypatch.setattr(discord_module, "_is_logged_in", lambda *_: True)
+        interaction = _interaction(123)
 
-        class DummyResponse:
-            def __init__(self) -> None:
-                self.calls: list[tuple[tuple[object, ...], dict[str, object]]] = []
-
-            async def send_message(self, *args: object, **kwargs: object) -> None:
-                self.calls.append((args, kwargs))
+        await discord_module.login_command.callback(interaction, SimpleNamespace(value="google"))
 
-        interaction = SimpleNamespace(user=SimpleNamespace(id=123), response=DummyResponse())
-        provider = SimpleNamespace(value="google")
+        _assert_ephemeral_text(interaction.response, "already signed in")
 
-        await discord_module.login_command.callback(interaction, provider)
-
-        assert interaction.response.calls[0][1]["ephemeral"] is True
-        assert "already signed in" in interaction.response.calls[0][0][0]
-
-    @pytest.mark.asyncio
-    async def test_login_command_sends_banner(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_login_command_sends_banner(
+        self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch, fake_banner: _FakeBanner
+    ) -> None:
         """Login command builds a banner when user is signed out."""
         monkeypatch.setattr(discord_module, "_is_logged_in", lambda *_: False)
         monkeypatch.setattr(discord_module, "_build_auth_url", lambda *_: "https://example.com/login")
-        banner = (object(), object())
-
-        def fake_banner(*_args: Any, **_kwargs: Any) -> tuple[object, object]:
-            return banner
+        interaction = _interaction(456)
 
-        monkeypatch.setattr(discord_module, "_auth_banner", fake_banner)
+        await discord_module.login_command.callback(interaction, SimpleNamespace(value="google"))
 
-        class DummyResponse:
-            def __init__(self) -> None:
-                self.calls: list[dict[str, object]] = []
+        _assert_ephemeral_banner(interaction.response, fake_banner)
+        assert fake_banner.calls == [("login", "https://example.com/login", "google")]
 
-            async def send_message(self, *args: object, **kwargs: object) -> None:
-                self.calls.append(kwargs)
-
-        interaction = SimpleNamespace(user=SimpleNamespace(id=456), response=DummyResponse())
-        provider = SimpleNamespace(value="google")
-
-        await discord_module.login_command.callback(interaction, provider)
-
-        assert interaction.response.calls[0]["embed"] is banner[0]
-        assert interaction.response.calls[0]["view"] is banner[1]
-        assert interaction.response.calls[0]["ephemeral"] is True
-
-    @pytest.mark.asyncio
     async def test_logout_command_not_logged_in(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
         """Logout command returns status message when signed out."""
         monkeypatch.setattr(discord_module, "_is_logged_in", lambda *_: False)
+        interaction = _interaction(789)
 
-        class DummyResponse:
-            def __init__(self) -> None:
-                self.calls: list[tuple[tuple[object, ...], dict[str, object]]] = []
-
-            async def send_message(self, *args: object, **kwargs: object) -> None:
-                self.calls.append((args, kwargs))
+        await discord_module.logout_command.callback(interaction, SimpleNamespace(value="google"))
 
-        interaction = SimpleNamespace(user=SimpleNamespace(id=789), response=DummyResponse())
-        provider = SimpleNamespace(value="google")
+        _assert_ephemeral_text(interaction.response, "not signed in")
 
-        await discord_module.logout_command.callback(interaction, provider)
-
-        assert interaction.response.calls[0][1]["ephemeral"] is True
-        assert "not signed in" in interaction.response.calls[0][0][0]
-
-    @pytest.mark.asyncio
-    async def test_logout_command_sends_banner(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_logout_command_sends_banner(
+        self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch, fake_banner: _FakeBanner
+    ) -> None:
         """Logout command sends a banner when user is signed in."""
         monkeypatch.setattr(discord_module, "_is_logged_in", lambda *_: True)
         monkeypatch.setattr(discord_module, "_build_auth_url", lambda *_: "https://example.com/logout")
-        banner = (object(), object())
-
-        def fake_banner(*_args: Any, **_kwargs: Any) -> tuple[object, object]:
-            return banner
-
-        monkeypatch.setattr(discord_module, "_auth_banner", fake_banner)
-
-        class DummyResponse:
-            def __init__(self) -> None:
-                self.calls: list[dict[str, object]] = []
-
-            async def send_message(self, *args: object, **kwargs: object) -> None:
-                self.calls.append(kwargs)
+        interaction = _interaction(321)
 
-        interaction = SimpleNamespace(user=SimpleNamespace(id=321), response=DummyResponse())
-        provider = SimpleNamespace(value="google")
+        await discord_module.logout_command.callback(interaction, SimpleNamespace(value="google"))
 
-        await discord_module.logout_command.callback(interaction, provider)
-
-        assert interaction.response.calls[0]["embed"] is banner[0]
-        assert interaction.response.calls[0]["view"] is banner[1]
-        assert interaction.response.calls[0]["ephemeral"] is True
+        _assert_ephemeral_banner(interaction.response, fake_banner)
+        assert fake_banner.calls == [("logout", "https://example.com/logout", "google")]
 
 
 class TestDiscordListenerEvents:
     """Unit tests for event handlers."""
 
-    @pytest.mark.asyncio
-    async def test_on_message_sends_reply(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_on_message_sends_reply(self, discord_module: ModuleType, dm_env: _DMEnv) -> None:
         """DM messages trigger orchestrator calls and replies."""
+        dm_env.reply = OrchestratorReply(reply="hi")
 
-        class DummyDMChannel:
-            def __init__(self) -> None:
-                self.id = 123
-                self.sent: list[tuple[tuple[object, ...], dict[str, object]]] = []
-
-            async def send(self, *args: object, **kwargs: object) -> None:
-                self.sent.append((args, kwargs))
-
-        monkeypatch.setattr(discord_module.discord, "DMChannel", DummyDMChannel)
-
-        channel = DummyDMChannel()
-        author = SimpleNamespace(bot=False, id=456)
-        message = SimpleNamespace(channel=channel, author=author, content="hello", id=789)
-
-        reply = OrchestratorReply(reply="hi", login_url=None, logout_url=None, provider=None)
-
-        def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
-            return reply
-
-        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
-
-        async def fake_to_thread(fn: Any, *args: Any, **kwargs: Any) -> Any:
-            return fn(*args, **kwargs)
-
-        monkeypatch.setattr(discord_module.asyncio, "to_thread", fake_to_thread)
-
-        await discord_module.on_message(message)
-
-        assert channel.sent == [(("hi",), {})]
-
-    @pytest.mark.asyncio
-    async def test_on_message_sends_login_banner(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Login actions send both reply text and a banner."""
-
-        class DummyDMChannel:
-            def __init__(self) -> None:
-                self.id = 555
-                self.sent: list[tuple[tuple[object, ...], dict[str, object]]] = []
-
-            async def send(self, *args: object, **kwargs: object) -> None:
-                self.sent.append((args, kwargs))
-
-        monkeypatch.setattr(discord_module.discord, "DMChannel", DummyDMChannel)
-
-        channel = DummyDMChannel()
-        author = SimpleNamespace(bot=False, id=101)
-        message = SimpleNamespace(channel=channel, author=author, content="help", id=202)
+        await discord_module.on_message(dm_env.message("hello"))
 
-        reply = OrchestratorReply(
-            reply="please sign in",
-            login_url="https://example.com/auth/google/login",
-            logout_url=None,
-            provider="google",
-        )
-
-        def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
-            return reply
-
-        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
-
-        async def fake_to_thread(fn: Any, *args: Any, **kwargs: Any) -> Any:
-            return fn(*args, **kwargs)
-
-        monkeypatch.setattr(discord_module.asyncio, "to_thread", fake_to_thread)
-
-        banner = (object(), object())
-
-        def fake_banner(*_args: Any, **_kwargs: Any) -> tuple[object, object]:
-            return banner
-
-        monkeypatch.setattr(discord_module, "_auth_banner", fake_banner)
-
-        await discord_module.on_message(message)
-
-        assert channel.sent[0][0][0] == "please sign in"
-        assert channel.sent[1][1]["embed"] is banner[0]
-        assert channel.sent[1][1]["view"] is banner[1]
-
-    @pytest.mark.asyncio
-    async def test_on_message_sends_logout_banner(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Logout actions send both reply text and a banner."""
-
-        class DummyDMChannel:
-            def __init__(self) -> None:
-                self.id = 999
-                self.sent: list[tuple[tuple[object, ...], dict[str, object]]] = []
-
-            async def send(self, *args: object, **kwargs: object) -> None:
-                self.sent.append((args, kwargs))
-
-        monkeypatch.setattr(discord_module.discord, "DMChannel", DummyDMChannel)
-
-        channel = DummyDMChannel()
-        author = SimpleNamespace(bot=False, id=404)
-        message = SimpleNamespace(channel=channel, author=author, content="logout", id=505)
-
-        reply = OrchestratorReply(
-            reply="signed out",
-            login_url=None,
-            logout_url="https://example.com/auth/google/logout",
-            provider="google",
+        dm_env.channel.send.assert_awaited_once_with("hi")
+        assert IncomingMessage.model_validate_json(dm_env.forwarded[0].model_dump_json()) == IncomingMessage(
+            provider="discord",
+            channel_id="123",
+            user_id="456",
+            content="hello",
+            message_id="789",
         )
 
-        def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
-            return reply
-
-        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
-
-        async def fake_to_thread(fn: Any, *args: Any, **kwargs: Any) -> Any:
-            return fn(*args, **kwargs)
-
-        monkeypatch.setattr(discord_module.asyncio, "to_thread", fake_to_thread)
-
-        banner = (object(), object())
-
-        def fake_banner(*_args: Any, **_kwargs: Any) -> tuple[object, object]:
-            return banner
-
-        monkeypatch.setattr(discord_module, "_auth_banner", fake_banner)
-
-        await discord_module.on_message(message)
-
-        assert channel.sent[0][0][0] == "signed out"
-        assert channel.sent[1][1]["embed"] is banner[0]
-        assert channel.sent[1][1]["view"] is banner[1]
-
-    @pytest.mark.asyncio
-    async def test_on_message_ignores_non_dm(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Non-DM messages are ignored."""
-
-        class DummyDMChannel:
-            pass
-
-        class DummyChannel:
-            pass
-
-        monkeypatch.setattr(discord_module.discord, "DMChannel", DummyDMChannel)
-
-        def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
-            error_message = "send_to_orchestrator should not be called"
-            raise AssertionError(error_message)
-
-        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
-
-        message = SimpleNamespace(channel=DummyChannel(), author=SimpleNamespace(bot=False), content="hi", id=1)
-        await discord_module.on_message(message)
-
-    @pytest.mark.asyncio
-    async def test_on_message_ignores_bot(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Bot messages are ignored."""
-
-        class DummyDMChannel:
-            pass
-
-        monkeypatch.setattr(discord_module.discord, "DMChannel", DummyDMChannel)
-
-        def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
-            error_message = "send_to_orchestrator should not be called"
-            raise AssertionError(error_message)
-
-        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
-
-        message = SimpleNamespace(channel=DummyDMChannel(), author=SimpleNamespace(bot=True), content="hi", id=1)
-        await discord_module.on_message(message)
-
-    @pytest.mark.asyncio
-    async def test_on_message_ignores_empty_content(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Empty messages are ignored."""
-
-        class DummyDMChannel:
-            pass
-
-        monkeypatch.setattr(discord_module.discord, "DMChannel", DummyDMChannel)
-
-        def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
-            error_message = "send_to_orchestrator should not be called"
+    @pytest.mark.parametrize(
+        ("action", "reply"),
+        [
+            ("login", OrchestratorReply(reply="please sign in", login_url="https://example.com/auth/google/login", provider="google")),
+            ("logout", OrchestratorReply(reply="signed out", logout_url="https://example.com/auth/google/logout", provider="google")),
+        ],
+    )
+    async def test_on_message_sends_auth_banner(
+        self, discord_module: ModuleType, dm_env: _DMEnv, action: str, reply: OrchestratorReply
+    ) -> None:
+        """Login/logout actions send both the reply text and a banner."""
+        dm_env.reply = reply
+
+        await discord_module.on_message(dm_env.message())
+
+        url = reply.login_url or reply.logout_url
+        assert dm_env.banner.calls == [(action, url, "google")]
+        assert dm_env.channel.send.await_args_list == [
+            call(reply.reply),
+            call(embed=dm_env.banner.embed, view=dm_env.banner.view),
+        ]
+
+    @pytest.mark.parametrize(
+        ("content", "bot", "channel_type"),
+        [
+            ("hi", False, discord.ChannelType.text),
+            ("hi", False, discord.ChannelType.group),
+            ("hi", True, discord.ChannelType.private),
+            ("  ", False, discord.ChannelType.private),
+        ],
+        ids=["guild-channel", "group-dm", "bot-author", "empty-content"],
+    )
+    async def test_on_message_ignores(
+        self,
+        discord_module: ModuleType,
+        dm_env: _DMEnv,
+        content: str,
+        bot: bool,  # noqa: FBT001
+        channel_type: discord.ChannelType,
+    ) -> None:
+        """Non-DM channels, bot authors, and blank messages never reach the orchestrator."""
+        channel = SimpleNamespace(type=channel_type)
+
+        await discord_module.on_message(dm_env.message(content, bot=bot, channel=channel))
+
+        assert dm_env.forwarded == []
+
+    @pytest.mark.parametrize(("status", "forwarded"), [(False, False), (None, True), (True, True)])
+    async def test_on_message_login_gate(
+        self,
+        discord_module: ModuleType,
+        monkeypatch: pytest.MonkeyPatch,
+        dm_env: _DMEnv,
+        status: bool | None,  # noqa: FBT001
+        forwarded: bool,  # noqa: FBT001
+    ) -> None:
+        """With REQUIRE_LOGIN, only users known to be signed out skip the orchestrator."""
+        monkeypatch.setattr(discord_module, "REQUIRE_LOGIN", True)
+        monkeypatch.setattr(discord_module, "_SIGNED_IN_UNTIL", {})
+
+        async def fake_status(*_args: Any) -> bool | None:
+            return status
+
+        monkeypatch.setattr(discord_module, "_is_logged_in_async", fake_status)
+        dm_env.reply = OrchestratorReply(reply="hello")
+
+        await discord_module.on_message(dm_env.message())
+
+        assert bool(dm_env.forwarded) is forwarded
+        if forwarded:
+            dm_env.channel.send.assert_awaited_once_with("hello")
+        else:
+            assert dm_env.banner.calls == [("login", "https://example.com/auth/google/login?user_id=456", "google")]
+            dm_env.channel.send.assert_awaited_once_with(embed=dm_env.banner.embed, view=dm_env.banner.view)
+
+    async def test_login_gate_caches_signed_in_users_only(
+        self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch, fake_banner: _FakeBanner
+    ) -> None:
+        """Signed-in answers skip the lookup until they expire or /logout runs; signed-out ones are re-checked."""
+        monkeypatch.setattr(discord_module, "REQUIRE_LOGIN", True)
+        monkeypatch.setattr(discord_module, "_SIGNED_IN_UNTIL", {})
+        statuses = {"1": True, "2": False}
+        lookups: list[str] = []
+
+        async def fake_status(user_id: str, _provider: str) -> bool | None:
+            lookups.append(user_id)
+            return statuses[user_id]
+
+        monkeypatch.setattr(discord_module, "_is_logged_in_async", fake_status)
+        channel = SimpleNamespace(send=AsyncMock())
+        message = SimpleNamespace(channel=channel)
+
+        for _ in range(2):
+            assert await discord_module._send_login_gate(message, "1") is False
+            assert await discord_module._send_login_gate(message, "2") is True
+        assert lookups == ["1", "2", "2"]
+        assert [url for _, url, _ in fake_banner.calls] == ["https://example.com/auth/google/login?user_id=2"] * 2
+
+        await discord_module.logout_command.callback(_interaction(1), SimpleNamespace(value="google"))
+        lookups.clear()
+        assert await discord_module._send_login_gate(message, "1") is False
+        assert lookups == ["1"]
+
+        monkeypatch.setattr(discord_module, "LOGIN_GATE_TTL_SECONDS", 0.0)
+        discord_module._SIGNED_IN_UNTIL.clear()
+        for _ in range(2):
+            assert await discord_module._send_login_gate(message, "1") is False
+        assert lookups == ["1", "1", "1"]
+
+    async def test_login_gate_skipped_with_multiple_providers(
+        self,
+        discord_module: ModuleType,
+        reload_discord_module: Callable[[], ModuleType],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """The single-provider fast path is resolved at import and off for multi-provider setups."""
+        assert discord_module._SINGLE_PROVIDER == "google"
+        monkeypatch.setenv("AUTH_PROVIDERS", "google,outlook")
+        monkeypatch.setenv("REQUIRE_LOGIN", "true")
+        module = reload_discord_module()
+        assert module.REQUIRE_LOGIN is True
+        assert module._SINGLE_PROVIDER is None
+
+        async def fake_status(*_args: Any) -> bool | None:
+            error_message = "status should not be looked up"
             raise AssertionError(error_message)
 
-        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
+        monkeypatch.setattr(module, "_is_logged_in_async", fake_status)
+        assert await module._send_login_gate(SimpleNamespace(), "1") is False
 
-        message = SimpleNamespace(channel=DummyDMChannel(), author=SimpleNamespace(bot=False), content="  ", id=1)
-        await discord_module.on_message(message)
-
-    @pytest.mark.asyncio
-    async def test_on_message_handles_orchestrator_error(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_on_message_handles_orchestrator_error(
+        self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch, dm_env: _DMEnv
+    ) -> None:
         """Orchestrator errors are logged and do not crash."""
-
-        class DummyDMChannel:
-            def __init__(self) -> None:
-                self.id = 777
-                self.sent: list[tuple[tuple[object, ...], dict[str, object]]] = []
-
-            async def send(self, *args: object, **kwargs: object) -> None:
-                self.sent.append((args, kwargs))
-
-        monkeypatch.setattr(discord_module.discord, "DMChannel", DummyDMChannel)
-
-        def fake_send(*_args: Any, **_kwargs: Any) -> OrchestratorReply:
-            error_message = "boom"
-            raise RuntimeError(error_message)
-
-        monkeypatch.setattr(discord_module, "_send_to_orchestrator", fake_send)
-
-        async def fake_to_thread(fn: Any, *args: Any, **kwargs: Any) -> Any:
-            return fn(*args, **kwargs)
-
-        monkeypatch.setattr(discord_module.asyncio, "to_thread", fake_to_thread)
+        dm_env.error = RuntimeError("boom")
         log_mock = Mock()
         monkeypatch.setattr(discord_module.logger, "exception", log_mock)
 
-        channel = DummyDMChannel()
-        message = SimpleNamespace(channel=channel, author=SimpleNamespace(bot=False, id=1), content="hi", id=2)
-        await discord_module.on_message(message)
+        await discord_module.on_message(dm_env.message())
 
         log_mock.assert_called_once()
+        dm_env.channel.send.assert_not_awaited()
 
-    @pytest.mark.asyncio
     async def test_on_ready_logs_sync_error(self, discord_module: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
         """on_ready logs sync failures."""
         log_mock = Mock()
@@ -522,23 +693,19 @@ def test_main_runs_client(discord_module: ModuleType, monkeypatch: pytest.Monkey
     run_mock.assert_called_once_with(discord_module.DISCORD_BOT_TOKEN)
 
 
-def test_main_runs_when_invoked_as_script(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
-    """Module executes main when run as __main__."""
-    monkeypatch.setenv("DISCORD_BOT_TOKEN", "token")
-    monkeypatch.setenv("PUBLIC_BASE_URL", "https://example.com")
-    monkeypatch.setenv("AUTH_PROVIDERS", "google")
-
-    if "discord_listener.main" in sys.modules:
-        del sys.modules["discord_listener.main"]
-
-    import discord as discord_lib
-
-    run_mock = Mock()
-
-    def fake_run(self: discord_lib.Client, token: str) -> None:
-        run_mock(token)
+def test_main_runs_when_invoked_as_script(discord_module: ModuleType) -> None:
+    """The module's ``__main__`` guard calls main()."""
+    path = discord_module.__file__
+    assert path is not None
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    guard = next(
+        node
+        for node in tree.body
+        if isinstance(node, ast.If) and ast.unparse(node.test) == "__name__ == '__main__'"
+    )
+    main_mock = Mock()
 
-    monkeypatch.setattr(discord_lib.Client, "run", fake_run)
+    # Only the guard block is compiled, against the real file name so coverage maps it.
+    exec(compile(ast.Module(body=[guard], type_ignores=[]), path, "exec"), {"__name__": "__main__", "main": main_mock})  # noqa: S102
 
-    runpy.run_module("discord_listener.main", run_name="__main__")
-    run_mock.assert_called_once_with("token")
+    main_mock.assert_called_once_with()
@@ -5,6 +5,7 @@ of the GmailClient class, mocking all external dependencies.
 """
 
 import os
+from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, Mock, patch
 
@@ -15,6 +16,12 @@ from google.oauth2.credentials import Credentials
 from gmail_client_impl.gmail_impl import GmailClient
 
 
+@pytest.fixture(autouse=True)
+def _isolated_cwd(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Run each test in its own directory so a saved ``token.json`` never lands in the repo."""
+    monkeypatch.chdir(tmp_path)
+
+
 class TestGmailClientAuthentication:
     """Test cases for GmailClient authentication logic."""
 
@@ -1,9 +1,10 @@
 """Unit tests for gmail_impl helper behavior not covered elsewhere."""
 
-import builtins
 import importlib
 import os
 import sqlite3
+import sys
+from collections.abc import Iterator
 from pathlib import Path
 from unittest.mock import Mock, patch
 
@@ -28,24 +29,16 @@ class TestGmailImplEnvLoading:
         monkeypatch.delenv("TEST_ENV_KEY", raising=False)
         monkeypatch.delenv("EMPTY", raising=False)
 
-        original_import = builtins.__import__
-
-        def fake_import(
-            name: str,
-            globalns: dict[str, object] | None = None,
-            localns: dict[str, object] | None = None,
-            fromlist: tuple[str, ...] = (),
-            level: int = 0,
-        ) -> object:
-            if name == "dotenv":
-                error_message = "dotenv not installed"
-                raise ImportError(error_message)
-            return original_import(name, globalns, localns, fromlist, level)
-
-        monkeypatch.setattr(builtins, "__import__", fake_import)
+        # A None entry makes `from dotenv import ...` raise ImportError without a Python-level
+        # hook on every other import performed by the reload below.
+        monkeypatch.setitem(sys.modules, "dotenv", None)
 
+        # The .env fallback lives in gmail_impl alone, so only that module is reloaded; the
+        # package's re-exports are rebound to the fresh objects instead of re-importing it.
         importlib.reload(gmail_impl)
-        importlib.reload(importlib.import_module("gmail_client_impl"))
+        package = sys.modules["gmail_client_impl"]
+        for name in ("GmailClient", "get_client_for_user_impl", "get_client_impl"):
+            setattr(package, name, getattr(gmail_impl, name))
 
         assert os.environ.get("TEST_ENV_KEY") == "from_env"
         assert os.environ.get("EMPTY") == ""
@@ -109,6 +102,56 @@ class TestGmailClientForUser:
         mock_load.assert_called_once_with("user-123")
 
 
+_MEMORY_AUTH_DB_URI = "file:gmail-auth-tests?mode=memory&cache=shared"
+
+
+@pytest.fixture(scope="module")
+def _memory_auth_seed(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Iterator[tuple[sqlite3.Connection, Path]]:
+    """Create the shared in-memory schema and the marker path once per module.
+
+    The marker is an empty file that only satisfies ``_load_refresh_token``'s
+    existence check; the open seeding connection keeps the database alive.
+    """
+    seed = sqlite3.connect(_MEMORY_AUTH_DB_URI, uri=True)
+    seed.execute(
+        "CREATE TABLE oauth_tokens (user_id TEXT, provider TEXT, refresh_token TEXT, scopes TEXT)"
+    )
+    seed.commit()
+    marker = tmp_path_factory.mktemp("auth") / "auth.db"
+    marker.touch()
+    try:
+        yield seed, marker
+    finally:
+        seed.close()
+
+
+@pytest.fixture
+def memory_auth_db(
+    monkeypatch: pytest.MonkeyPatch,
+    _memory_auth_seed: tuple[sqlite3.Connection, Path],
+) -> Iterator[sqlite3.Connection]:
+    """Serve ``_load_refresh_token`` from the shared in-memory database.
+
+    Every connect is redirected to the in-memory URI, and rows a test inserts are
+    cleared afterwards so the module-scoped schema stays empty between tests.
+    """
+    seed, marker = _memory_auth_seed
+    real_connect = sqlite3.connect
+    monkeypatch.setattr(gmail_impl.GmailClient, "AUTH_DB_PATH", marker)
+    monkeypatch.setattr(
+        sqlite3,
+        "connect",
+        lambda *_args, **_kwargs: real_connect(_MEMORY_AUTH_DB_URI, uri=True),
+    )
+    try:
+        yield seed
+    finally:
+        seed.execute("DELETE FROM oauth_tokens")
+        seed.commit()
+
+
 class TestRefreshTokenHelpers:
     """Tests for refresh token loading helpers."""
 
@@ -161,44 +204,23 @@ class TestRefreshTokenHelpers:
 
         assert dummy_conn.closed is True
 
-    def test_load_refresh_token_missing_token_raises(
-        self,
-        monkeypatch: pytest.MonkeyPatch,
-        tmp_path: Path,
-    ) -> None:
+    @pytest.mark.usefixtures("memory_auth_db")
+    def test_load_refresh_token_missing_token_raises(self) -> None:
         """Missing refresh token should raise a helpful error."""
-        db_path = tmp_path / "auth.db"
-        conn = sqlite3.connect(db_path)
-        conn.execute(
-            "CREATE TABLE oauth_tokens (user_id TEXT, provider TEXT, refresh_token TEXT, scopes TEXT)"
-        )
-        conn.commit()
-        conn.close()
-
-        monkeypatch.setattr(gmail_impl.GmailClient, "AUTH_DB_PATH", db_path)
-
         with pytest.raises(RuntimeError, match=r"No OAuth token found\."):
             gmail_impl._load_refresh_token("user-3")
 
     def test_load_refresh_token_falls_back_to_default_scopes(
         self,
         monkeypatch: pytest.MonkeyPatch,
-        tmp_path: Path,
+        memory_auth_db: sqlite3.Connection,
     ) -> None:
         """Invalid scopes JSON falls back to configured default scopes."""
-        db_path = tmp_path / "auth.db"
-        conn = sqlite3.connect(db_path)
-        conn.execute(
-            "CREATE TABLE oauth_tokens (user_id TEXT, provider TEXT, refresh_token TEXT, scopes TEXT)"
-        )
-        conn.execute(
+        memory_auth_db.execute(
             "INSERT INTO oauth_tokens VALUES (?, ?, ?, ?)",
             ("user-4", "google", "refresh-token", "not-json"),
         )
-        conn.commit()
-        conn.close()
-
-        monkeypatch.setattr(gmail_impl.GmailClient, "AUTH_DB_PATH", db_path)
+        memory_auth_db.commit()
         monkeypatch.setattr(gmail_impl.GmailClient, "OAUTH_SCOPES", "scope-1, scope-2")
 
         refresh_token, scopes = gmail_impl._load_refresh_token("user-4")
@@ -4,15 +4,27 @@ from __future__ import annotations
 
 import json
 import os
+import re
 import secrets
-import sqlite3
 import time
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import PlainTextResponse, RedirectResponse
 from google_auth_oauthlib.flow import Flow
+from requests.adapters import HTTPAdapter
+
+from orchestrator import db_pool
+from orchestrator.tools.auth import invalidate_auth_status, lookup_auth_status
+from orchestrator.tools.mail import invalidate_mail_client
+
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Iterator
 
 load_dotenv()
 
@@ -25,6 +37,34 @@ PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL")
 GOOGLE_OAUTH_SCOPES = os.environ.get("GOOGLE_OAUTH_SCOPES", "https://mail.google.com/")
 STATE_TTL_SECONDS = 600
 GOOGLE_PROVIDER = "google"
+_TOKEN_ADAPTER = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+_SCOPES_SEPARATOR = re.compile(r"\s*,\s*")
+
+# Each query is one module-level string, so pooled connections' statement caches reuse the
+# compiled statement instead of re-preparing it per request.
+_SQL_INSERT_STATE = "INSERT INTO oauth_state (state, user_id, provider, created_at) VALUES (?, ?, ?, ?)"
+_SQL_PRUNE_STATES = "DELETE FROM oauth_state WHERE created_at < ?"
+# Validates and consumes in one statement (RETURNING needs SQLite 3.35+).
+_SQL_CONSUME_STATE = "DELETE FROM oauth_state WHERE state = ? AND provider = ? AND created_at >= ? RETURNING user_id"
+_SQL_SELECT_REFRESH_TOKEN = "SELECT refresh_token FROM oauth_tokens WHERE user_id = ? AND provider = ?"  # noqa: S105
+_SQL_DELETE_TOKEN = "DELETE FROM oauth_tokens WHERE user_id = ? AND provider = ?"  # noqa: S105
+_SQL_UPSERT_TOKEN = """
+    INSERT INTO oauth_tokens (
+        user_id,
+        provider,
+        refresh_token,
+        access_token,
+        expires_at,
+        scopes,
+        updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, provider) DO UPDATE SET
+        refresh_token = excluded.refresh_token,
+        access_token = excluded.access_token,
+        expires_at = excluded.expires_at,
+        scopes = excluded.scopes,
+        updated_at = excluded.updated_at
+"""  # noqa: S105
 
 
 # ---------------------------------------------------------------------------
@@ -59,20 +99,21 @@ def oauth_callback(state: str | None = None, code: str | None = None) -> PlainTe
     now = int(time.time())
     with _open_db() as conn:
         user_id = _consume_state(conn, state, GOOGLE_PROVIDER, now)
-        if not user_id:
-            raise HTTPException(status_code=400, detail="Invalid or expired state.")
-        flow = _build_flow(state=state)
-        flow.fetch_token(code=code)
-        creds = flow.credentials
+    if not user_id:
+        raise HTTPException(status_code=400, detail="Invalid or expired state.")
+    # The token exchange is a network round trip, so no pooled connection is held across it.
+    flow = _build_flow(state=state)
+    flow.fetch_token(code=code)
+    creds = flow.credentials
+    expires_at = int(creds.expiry.timestamp()) if creds.expiry else None
+    scopes = list(creds.scopes or _parse_scopes(GOOGLE_OAUTH_SCOPES))
 
+    with _open_db() as conn:
         refresh_token = creds.refresh_token
         if not refresh_token:
             refresh_token = _get_existing_refresh_token(conn, user_id, GOOGLE_PROVIDER)
         if not refresh_token:
             raise HTTPException(status_code=400, detail="No refresh token returned. Please revoke access and retry.")
-
-        expires_at = int(creds.expiry.timestamp()) if creds.expiry else None
-        scopes = list(creds.scopes or _parse_scopes(GOOGLE_OAUTH_SCOPES))
         _upsert_token(
             conn,
             user_id=user_id,
@@ -83,6 +124,8 @@ def oauth_callback(state: str | None = None, code: str | None = None) -> PlainTe
             scopes=scopes,
             now=now,
         )
+    invalidate_auth_status(user_id, GOOGLE_PROVIDER)
+    invalidate_mail_client(user_id)
     return PlainTextResponse("Google authorization complete. You can close this window.")
 
 
@@ -91,32 +134,44 @@ def oauth_logout(user_id: str) -> PlainTextResponse:
     """Delete stored tokens for a user and end the session."""
     if not user_id:
         raise HTTPException(status_code=400, detail="user_id is required.")
-    with _open_db() as conn:
-        conn.execute(
-            "DELETE FROM oauth_tokens WHERE user_id = ? AND provider = ?",
-            (user_id, GOOGLE_PROVIDER),
-        )
-        conn.commit()
+    with _open_db() as conn, conn:
+        conn.execute(_SQL_DELETE_TOKEN, (user_id, GOOGLE_PROVIDER))
+    invalidate_auth_status(user_id, GOOGLE_PROVIDER)
+    invalidate_mail_client(user_id)
     return PlainTextResponse("Signed out. You can close this window.")
 
 
 @router.get("/auth/google/status")
 def oauth_status(user_id: str) -> dict[str, bool]:
-    """Return whether a user is logged in for Google."""
+    """Return whether a user is logged in for Google.
+
+    Served from the auth tools' status cache, which the callback and logout routes invalidate.
+    """
     if not user_id:
         raise HTTPException(status_code=400, detail="user_id is required.")
-    try:
-        conn = _open_db()
-        try:
-            row = conn.execute(
-                "SELECT 1 FROM oauth_tokens WHERE user_id = ? AND provider = ? LIMIT 1",
-                (user_id, GOOGLE_PROVIDER),
-            ).fetchone()
-        finally:
-            conn.close()
-    except sqlite3.Error as exc:
-        raise HTTPException(status_code=500, detail="Auth DB error.") from exc
-    return {"logged_in": row is not None}
+    logged_in = lookup_auth_status(user_id, GOOGLE_PROVIDER, AUTH_DB_PATH)
+    if logged_in is None:
+        raise HTTPException(status_code=500, detail="Auth DB error.")
+    return {"logged_in": logged_in}
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+
+def run_db_maintenance(now: int | None = None) -> int:
+    """Prune expired OAuth states and compact the auth DB; return the number of states pruned.
+
+    Runs periodically off the request path, so logins and callbacks never pay for cleanup.
+    Expired states are already rejected by _consume_state, so pruning is only housekeeping.
+    """
+    cutoff = (int(time.time()) if now is None else now) - STATE_TTL_SECONDS
+    with _open_db() as conn:
+        with conn:
+            pruned = conn.execute(_SQL_PRUNE_STATES, (cutoff,)).rowcount
+        db_pool.compact(conn)
+    return pruned
 
 
 # ---------------------------------------------------------------------------
@@ -124,76 +179,49 @@ def oauth_status(user_id: str) -> dict[str, bool]:
 # ---------------------------------------------------------------------------
 
 
-def _parse_scopes(raw_scopes: str) -> list[str]:
-    """Split and trim a comma-separated scopes string."""
-    return [scope.strip() for scope in raw_scopes.split(",") if scope.strip()]
+@lru_cache(maxsize=8)
+def _parse_scopes(raw_scopes: str) -> tuple[str, ...]:
+    """Split and trim a comma-separated scopes string.
 
+    The input is the configured scopes setting, so parses are cached; the tuple keeps the
+    shared result immutable.
+    """
+    return tuple(scope for scope in _SCOPES_SEPARATOR.split(raw_scopes.strip()) if scope)
 
-def _open_db() -> sqlite3.Connection:
-    """Open the auth SQLite DB and ensure schema exists."""
-    conn = sqlite3.connect(AUTH_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    _init_db(conn)
-    return conn
+
+@contextmanager
+def _open_db() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled auth DB connection; the pool creates the schema once."""
+    with db_pool.get_conn(AUTH_DB_PATH) as conn:
+        yield conn
 
 
 def _init_db(conn: sqlite3.Connection) -> None:
     """Create OAuth state/token tables when missing."""
-    conn.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS oauth_state (
-            state TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            provider TEXT NOT NULL,
-            created_at INTEGER NOT NULL
-        );
-        CREATE TABLE IF NOT EXISTS oauth_tokens (
-            user_id TEXT NOT NULL,
-            provider TEXT NOT NULL,
-            refresh_token TEXT NOT NULL,
-            access_token TEXT,
-            expires_at INTEGER,
-            scopes TEXT,
-            updated_at INTEGER NOT NULL,
-            PRIMARY KEY (user_id, provider)
-        );
-        """
-    )
-    conn.commit()
+    db_pool.init_schema(conn)
 
 
 def _store_state(conn: sqlite3.Connection, state: str, user_id: str, provider: str, now: int) -> None:
     """Persist an OAuth state token for CSRF protection."""
-    conn.execute(
-        "INSERT INTO oauth_state (state, user_id, provider, created_at) VALUES (?, ?, ?, ?)",
-        (state, user_id, provider, now),
-    )
-    conn.commit()
+    with conn:
+        conn.execute(_SQL_INSERT_STATE, (state, user_id, provider, now))
 
 
 def _consume_state(conn: sqlite3.Connection, state: str, provider: str, now: int) -> str | None:
-    """Validate and consume a stored state token, pruning expired ones."""
-    conn.execute("DELETE FROM oauth_state WHERE created_at < ?", (now - STATE_TTL_SECONDS,))
-    row = conn.execute(
-        "SELECT user_id FROM oauth_state WHERE state = ? AND provider = ?",
-        (state, provider),
-    ).fetchone()
+    """Validate and consume a stored state token; expired tokens never match."""
+    with conn:
+        row = conn.execute(_SQL_CONSUME_STATE, (state, provider, now - STATE_TTL_SECONDS)).fetchone()
     if not row:
         return None
-    conn.execute("DELETE FROM oauth_state WHERE state = ?", (state,))
-    conn.commit()
-    return str(row["user_id"])
+    return str(row[0])
 
 
 def _get_existing_refresh_token(conn: sqlite3.Connection, user_id: str, provider: str) -> str | None:
     """Return a stored refresh token for the user/provider if present."""
-    row = conn.execute(
-        "SELECT refresh_token FROM oauth_tokens WHERE user_id = ? AND provider = ?",
-        (user_id, provider),
-    ).fetchone()
+    row = conn.execute(_SQL_SELECT_REFRESH_TOKEN, (user_id, provider)).fetchone()
     if not row:
         return None
-    return str(row["refresh_token"])
+    return str(row[0])
 
 
 def _upsert_token(  # noqa: PLR0913
@@ -208,58 +236,66 @@ def _upsert_token(  # noqa: PLR0913
     now: int,
 ) -> None:
     """Insert or update stored OAuth tokens for a user."""
-    conn.execute(
-        """
-        INSERT INTO oauth_tokens (
-            user_id,
-            provider,
-            refresh_token,
-            access_token,
-            expires_at,
-            scopes,
-            updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id, provider) DO UPDATE SET
-            refresh_token = excluded.refresh_token,
-            access_token = excluded.access_token,
-            expires_at = excluded.expires_at,
-            scopes = excluded.scopes,
-            updated_at = excluded.updated_at
-        """,
-        (
-            user_id,
-            provider,
-            refresh_token,
-            access_token,
-            expires_at,
-            json.dumps(scopes),
-            now,
-        ),
-    )
-    conn.commit()
+    with conn:
+        conn.execute(
+            _SQL_UPSERT_TOKEN,
+            (
+                user_id,
+                provider,
+                refresh_token,
+                access_token,
+                expires_at,
+                json.dumps(scopes),
+                now,
+            ),
+        )
 
 
 def _build_flow(state: str | None = None) -> Flow:
     """Construct a Google OAuth flow for the configured client and scopes."""
-    if not PUBLIC_BASE_URL:
+    client_config, scopes, redirect_uri = _flow_settings(
+        PUBLIC_BASE_URL,
+        GOOGLE_OAUTH_CLIENT_ID,
+        GOOGLE_OAUTH_CLIENT_SECRET,
+        GOOGLE_OAUTH_SCOPES,
+    )
+    flow = Flow.from_client_config(
+        client_config,
+        scopes=scopes,
+        redirect_uri=redirect_uri,
+        state=state,
+    )
+    # Every flow gets its own OAuth2Session (it carries per-login state), so the connection
+    # pool lives in a shared adapter: token exchanges reuse warm TLS connections to Google.
+    flow.oauth2session.mount("https://", _TOKEN_ADAPTER)
+    return flow
+
+
+@lru_cache(maxsize=1)
+def _flow_settings(
+    public_base_url: str | None,
+    client_id: str | None,
+    client_secret: str | None,
+    raw_scopes: str,
+) -> tuple[dict[str, dict[str, str]], tuple[str, ...], str]:
+    """Validate the OAuth settings and build the client config, redirect URI, and scopes.
+
+    The settings are fixed for the process, so login and callback requests reuse one
+    validated result; failures raise (and are not cached) until the settings are fixed.
+    """
+    if not public_base_url:
         raise HTTPException(status_code=500, detail="PUBLIC_BASE_URL is not configured.")
-    if not GOOGLE_OAUTH_CLIENT_ID or not GOOGLE_OAUTH_CLIENT_SECRET:
+    if not client_id or not client_secret:
         raise HTTPException(status_code=500, detail="Google OAuth client is not configured.")
-    scopes = _parse_scopes(GOOGLE_OAUTH_SCOPES)
+    scopes = _parse_scopes(raw_scopes)
     if not scopes:
         raise HTTPException(status_code=500, detail="GOOGLE_OAUTH_SCOPES is empty.")
-    redirect_uri = f"{PUBLIC_BASE_URL.rstrip('/')}/auth/google/callback"
     client_config = {
         "web": {
-            "client_id": GOOGLE_OAUTH_CLIENT_ID,
-            "client_secret": GOOGLE_OAUTH_CLIENT_SECRET,
+            "client_id": client_id,
+            "client_secret": client_secret,
             "auth_uri": "https://accounts.google.com/o/oauth2/auth",
             "token_uri": "https://oauth2.googleapis.com/token",
         }
     }
-    return Flow.from_client_config(
-        client_config,
-        scopes=scopes,
-        redirect_uri=redirect_uri,
-        state=state,
-    )
+    return client_config, scopes, f"{public_base_url.rstrip('/')}/auth/google/callback"
@@ -6,31 +6,97 @@ maintains short conversation history, and exposes health/auth endpoints.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
-from pathlib import Path
+import sqlite3
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
+from importlib import resources
+from typing import TYPE_CHECKING
 
 from fastapi import FastAPI
 
 import claude_client_impl  # noqa: F401  # ensure AI implementation registers itself
 from ai_client_api import ContentBlock, Message, content_block, get_client, message
-from orchestrator import tools  # noqa: F401  # register tool modules
+from orchestrator import (
+    db_pool,
+    google_auth_routes,
+    tools,  # noqa: F401  # register tool modules
+)
 from orchestrator.google_auth_routes import router as auth_router
 from orchestrator.models import IncomingMessage, OrchestratorReply
 from orchestrator.tools import registry
 
-app = FastAPI(title="Orchestrator Service", version="0.1.0")
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+# Built once: json.dumps() constructs a new encoder on every call made with non-default options.
+_TOOL_OUTPUT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+# Retried with when the fast encoder rejects an output: non-str keys (which orjson refuses)
+# are coerced by the stdlib, and unknown values are encoded through str().
+_TOOL_OUTPUT_FALLBACK_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
+# orjson is an optional speedup (the ``fast-json`` extra); fall back to the stdlib encoder.
+_encode_tool_output: Callable[[object], str]
+try:
+    from orjson import dumps as _orjson_dumps
+except ImportError:  # pragma: no cover - depends on installed extras
+    _encode_tool_output = _TOOL_OUTPUT_ENCODER.encode
+else:
+
+    def _encode_tool_output(output: object) -> str:
+        return _orjson_dumps(output).decode()
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Build the auth DB pool (and its schema) at startup, maintain it, and close it on shutdown."""
+    if not PUBLIC_BASE_URL:
+        # Chat still works without it; only login/logout links are unavailable.
+        logger.warning("PUBLIC_BASE_URL is not set; login and logout links cannot be built.")
+    db_pool.get_pool(google_auth_routes.AUTH_DB_PATH)
+    maintenance = asyncio.create_task(_auth_db_maintenance_loop())
+    try:
+        yield
+    finally:
+        maintenance.cancel()
+        with suppress(asyncio.CancelledError):
+            await maintenance
+        db_pool.close_all()
+
+
+async def _auth_db_maintenance_loop() -> None:
+    """Periodically prune expired OAuth states and compact the auth DB off the event loop."""
+    while True:
+        await asyncio.sleep(AUTH_DB_MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            pruned = await asyncio.to_thread(google_auth_routes.run_db_maintenance)
+        except sqlite3.Error:
+            logger.exception("Auth DB maintenance failed")
+        else:
+            logger.debug("Auth DB maintenance pruned %d expired states", pruned)
+
+
+app = FastAPI(title="Orchestrator Service", version="0.1.0", lifespan=_lifespan)
 app.include_router(auth_router)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("orchestrator")
 
-SYSTEM_PROMPT = Path("src/orchestrator/system.txt").read_text(encoding="utf-8").strip()
+# Shipped inside the package so the prompt loads regardless of the worker's working directory.
+SYSTEM_PROMPT = resources.files("orchestrator").joinpath("system.txt").read_text(encoding="utf-8").strip()
 PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL")
 AUTH_PROVIDER = os.environ.get("AUTH_PROVIDER")
 HISTORY_MAX = 10
-CONVERSATION_HISTORY: dict[str, list[Message]] = {}
+AUTH_DB_MAINTENANCE_INTERVAL_SECONDS = 300.0
+CONVERSATION_HISTORY: dict[str, deque[Message]] = {}
+# Weak values: a user's lock lives only while a turn holds or awaits it, so idle users
+# do not accumulate entries in a long-running process.
+_USER_LOCKS: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
 
 
 # ---------------------------------------------------------------------------
@@ -46,7 +112,32 @@ async def health() -> dict[str, str]:
 
 @app.post("/events/message", response_model=OrchestratorReply)
 async def handle_message(incoming_message: IncomingMessage) -> OrchestratorReply:
-    """Handle inbound chat messages from listeners."""
+    """Handle inbound chat messages from listeners.
+
+    Claude and tool calls block, so they run in worker threads; a per-user lock keeps one
+    user's turns (and their history) in order while other users proceed concurrently.
+    """
+    async with _user_lock(incoming_message.user_id):
+        return await _run_turn(incoming_message)
+
+
+@app.post("/events/messages", response_model=list[OrchestratorReply])
+async def handle_messages(incoming_messages: list[IncomingMessage]) -> list[OrchestratorReply]:
+    """Handle a batch of coalesced listener messages, replying in arrival order.
+
+    Messages run concurrently; handle_message's per-user lock still runs one user's turns
+    in the order received, so only different users' turns overlap.
+    """
+    return list(await asyncio.gather(*(handle_message(incoming_message) for incoming_message in incoming_messages)))
+
+
+# ---------------------------------------------------------------------------
+# Message/tool helpers
+# ---------------------------------------------------------------------------
+
+
+async def _run_turn(incoming_message: IncomingMessage) -> OrchestratorReply:
+    """Run one user turn: call the AI, execute requested tools, and record history."""
     ai = get_client()
     tool_defs = registry.list_definitions() or None
     logger.info("User message: %s", incoming_message.content)
@@ -56,32 +147,43 @@ async def handle_message(incoming_message: IncomingMessage) -> OrchestratorReply
     )
 
     messages = _load_history(incoming_message.user_id)
+    turn_start = len(messages)
     messages.append(user_message)
 
     while True:
-        ai_message = ai.generate_response(
+        ai_message = await asyncio.to_thread(
+            ai.generate_response,
             messages=messages,
             system=SYSTEM_PROMPT,
             tools=tool_defs,
         )
         messages.append(ai_message)
-        logger.info("AI message: %s", _message_to_text(ai_message))
-        logger.info("AI blocks: %s", ai_message.to_dict())
+        ai_text = _message_to_text(ai_message)
+        logger.info("AI message: %s", ai_text)
+        # Serializing every block is only worth it when someone is reading debug logs.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("AI blocks: %s", ai_message.to_dict())
         tool_blocks = _tool_uses(ai_message)
         if not tool_blocks:
-            reply = _message_to_text(ai_message)
-            _save_history(incoming_message.user_id, messages)
-            return OrchestratorReply(reply=reply)
-
+            _append_history(incoming_message.user_id, messages[turn_start:])
+            return OrchestratorReply(reply=ai_text)
+
+        user_id = incoming_message.user_id
+        outputs: list[object] | None = None
+        if _AUTH_ACTION_TOOLS.isdisjoint(block.name for block in tool_blocks):
+            # No call can end the turn early, so the independent lookups run concurrently.
+            outputs = await asyncio.gather(*(_call_tool(block, user_id) for block in tool_blocks))
         tool_results: list[ContentBlock] = []
-        for block in tool_blocks:
+        for index, block in enumerate(tool_blocks):
+            # A login/logout action ends the turn and the tools after it must not run (they
+            # may delete or mark mail), so with one in the turn the calls stay sequential.
+            output = outputs[index] if outputs is not None else await _call_tool(block, user_id)
             tool_name = block.name or ""
-            output = registry.run_tool(tool_name, block.input or {}, user_id=incoming_message.user_id)
             logger.info("Tool result (%s): %s", tool_name, output)
-            reply_override = _resolve_tool_action(output, incoming_message.user_id, _message_to_text(ai_message))
+            reply_override = _resolve_tool_action(output, user_id, ai_text)
             if reply_override:
                 logger.info("Reply override: %s", reply_override)
-                _save_history(incoming_message.user_id, messages)
+                _append_history(user_id, messages[turn_start:])
                 return reply_override
             tool_results.append(
                 content_block(
@@ -94,9 +196,9 @@ async def handle_message(incoming_message: IncomingMessage) -> OrchestratorReply
         messages.append(message(role="user", content=tool_results))
 
 
-# ---------------------------------------------------------------------------
-# Message/tool helpers
-# ---------------------------------------------------------------------------
+async def _call_tool(block: ContentBlock, user_id: str) -> object:
+    """Run one requested tool in a worker thread."""
+    return await asyncio.to_thread(registry.run_tool, block.name or "", block.input or {}, user_id=user_id)
 
 
 def _message_to_text(message: Message) -> str:
@@ -114,38 +216,56 @@ def _tool_output_to_text(output: object) -> str:
     if isinstance(output, str):
         return output
     try:
-        return json.dumps(output, ensure_ascii=True)
-    except TypeError:
+        return _encode_tool_output(output)
+    except TypeError:  # orjson.JSONEncodeError subclasses TypeError
+        pass
+    try:
+        return _TOOL_OUTPUT_FALLBACK_ENCODER.encode(output)
+    except (TypeError, ValueError):  # e.g. tuple keys or circular references
         return str(output)
 
 
 def _build_auth_url(action: str, user_id: str, provider: str) -> str:
     """Build a login/logout URL for the given provider/user."""
-    if not PUBLIC_BASE_URL:
+    # A single f-string over the cached prefix; faster than str.format or %-formatting.
+    return f"{_auth_url_prefix(PUBLIC_BASE_URL)}{provider}/{action}?user_id={user_id}"
+
+
+@lru_cache(maxsize=1)
+def _auth_url_prefix(public_base_url: str | None) -> str:
+    """Validate PUBLIC_BASE_URL and build the ``<base>/auth/`` prefix once per configured value."""
+    if not public_base_url:
         error_message = "PUBLIC_BASE_URL is required."
         raise RuntimeError(error_message)
-    base = PUBLIC_BASE_URL.rstrip("/")
-    return f"{base}/auth/{provider}/{action}?user_id={user_id}"
+    return f"{public_base_url.rstrip('/')}/auth/"
+
+
+# Tools whose output may be a login/logout action that replaces the turn's reply.
+_AUTH_ACTION_TOOLS = frozenset({"request_login", "request_logout"})
+
+# Action code -> the OrchestratorReply field that carries its auth URL; the code doubles
+# as the auth route's path segment.
+_ACTION_URL_FIELDS = {"login": "login_url", "logout": "logout_url"}
 
 
 def _resolve_tool_action(output: object, user_id: str, ai_text: str | None = None) -> OrchestratorReply | None:
     """Translate tool outputs into action replies when login/logout is requested."""
-    if not isinstance(output, dict):
+    # Most outputs are plain data (emails, statuses), so bail out before any other lookup.
+    if not isinstance(output, dict) or output.get("type") != "action":
         return None
-    action_type = output.get("type")
     code = output.get("code")
+    if not isinstance(code, str):
+        return None
+    url_field = _ACTION_URL_FIELDS.get(code)
     provider = output.get("provider")
-    if not isinstance(provider, str):
+    if url_field is None or not isinstance(provider, str):
         return None
-    if action_type == "action" and code == "login":
-        reply = (ai_text or "").strip()
-        login_url = _build_auth_url("login", user_id, provider)
-        return OrchestratorReply(reply=reply, login_url=login_url, provider=provider)
-    if action_type == "action" and code == "logout":
-        reply = (ai_text or "").strip()
-        logout_url = _build_auth_url("logout", user_id, provider)
-        return OrchestratorReply(reply=reply, logout_url=logout_url, provider=provider)
-    return None
+    reply = (ai_text or "").strip()
+    return OrchestratorReply(
+        reply=reply,
+        provider=provider,
+        **{url_field: _build_auth_url(code, user_id, provider)},
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -153,17 +273,30 @@ def _resolve_tool_action(output: object, user_id: str, ai_text: str | None = Non
 # ---------------------------------------------------------------------------
 
 
+def _user_lock(key: str) -> asyncio.Lock:
+    """Return the lock serializing a user's turns, creating it when none is in use."""
+    lock = _USER_LOCKS.get(key)
+    if lock is None:
+        lock = _USER_LOCKS[key] = asyncio.Lock()
+    return lock
+
+
 def _load_history(key: str) -> list[Message]:
-    """Load conversation history for a user."""
-    return CONVERSATION_HISTORY.get(key, []).copy()
+    """Return a working copy of a user's (already text-only) conversation history."""
+    history = CONVERSATION_HISTORY.get(key)
+    return list(history) if history else []
+
 
+def _append_history(key: str, turn_messages: list[Message]) -> None:
+    """Append one turn's messages to a user's history, keeping only their text blocks.
 
-def _save_history(key: str, messages: list[Message]) -> None:
-    """Persist conversation history for a user."""
-    history: list[Message] = []
-    for msg in messages:
+    Stored messages are filtered once, at insertion, and the bounded deque drops the oldest
+    entries itself, so earlier turns are never rebuilt.
+    """
+    history = CONVERSATION_HISTORY.get(key)
+    if history is None:
+        history = CONVERSATION_HISTORY[key] = deque(maxlen=HISTORY_MAX)
+    for msg in turn_messages:
         text_blocks = [block for block in msg.content if block.type == "text" and block.text]
-        if not text_blocks:
-            continue
-        history.append(message(role=msg.role, content=text_blocks))
-    CONVERSATION_HISTORY[key] = history[-HISTORY_MAX:]
+        if text_blocks:
+            history.append(message(role=msg.role, content=text_blocks))
@@ -2,36 +2,84 @@
 
 import os
 import sqlite3
+import threading
+import time
 
 from ai_client_api import tool_definition
+from orchestrator import db_pool
 from orchestrator.tools.registry import register_tool
 
 AUTH_DB_PATH = os.environ.get("ORCHESTRATOR_AUTH_DB", "orchestrator_auth.db")
 AUTH_PROVIDERS = os.environ.get("AUTH_PROVIDERS", "google")
 AUTH_PROVIDERS_LIST = [provider.strip() for provider in AUTH_PROVIDERS.split(",") if provider.strip()] or ["google"]
 
+# Status lookups run on every tool call (and back the oauth_status route), so they borrow
+# pooled connections (which keep the compiled status statement in their statement caches)
+# instead of reconnecting per query. EXISTS always yields exactly one 0/1 row.
+_AUTH_STATUS_SQL = "SELECT EXISTS (SELECT 1 FROM oauth_tokens WHERE user_id = ? AND provider = ?)"
+_AUTH_LOCK = threading.Lock()
+
+# Users tend to check status, sign in, and chat in quick succession, so recent answers
+# are kept briefly. The OAuth routes call invalidate_auth_status() whenever they write
+# or delete a token, so the TTL only bounds staleness from writers outside this process.
+AUTH_STATUS_TTL_SECONDS = 30.0
+_AUTH_STATUS_CACHE_MAX = 10_000
+_AUTH_STATUS_CACHE: dict[tuple[str, str, str], tuple[float, bool]] = {}
+# Every DB path a status was cached for, so invalidation reaches each of them.
+_AUTH_STATUS_DB_PATHS: set[str] = set()
+# Bumped by every invalidation; a lookup that raced with one does not cache its answer.
+_AUTH_STATUS_GENERATION = 0
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
-def _is_logged_in(user_id: str | None, provider: str) -> bool | None:
-    """Return True/False if a token exists for the user/provider; None on missing user or DB errors."""
+def lookup_auth_status(user_id: str | None, provider: str, db_path: str | os.PathLike[str] | None = None) -> bool | None:
+    """Return True/False if a token exists for the user/provider; None on missing user or DB errors.
+
+    Answers are cached per DB path (``AUTH_DB_PATH`` by default) for ``AUTH_STATUS_TTL_SECONDS``.
+    """
     if not user_id:
         return None
+    path = AUTH_DB_PATH if db_path is None else os.fspath(db_path)
+    key = (path, user_id, provider)
+    now = time.monotonic()
+    with _AUTH_LOCK:
+        cached = _AUTH_STATUS_CACHE.get(key)
+        generation = _AUTH_STATUS_GENERATION
+    if cached is not None and cached[0] > now:
+        return cached[1]
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        try:
-            row = conn.execute(
-                "SELECT 1 FROM oauth_tokens WHERE user_id = ? AND provider = ? LIMIT 1",
-                (user_id, provider),
-            ).fetchone()
-        finally:
-            conn.close()
+        with db_pool.get_conn(path) as conn:
+            logged_in = bool(conn.execute(_AUTH_STATUS_SQL, (user_id, provider)).fetchone()[0])
     except sqlite3.Error:
         return None
-    return row is not None
+    with _AUTH_LOCK:
+        if generation != _AUTH_STATUS_GENERATION:
+            return logged_in
+        if len(_AUTH_STATUS_CACHE) >= _AUTH_STATUS_CACHE_MAX:
+            # Entries are inserted in expiry order, so the first one is the oldest.
+            del _AUTH_STATUS_CACHE[next(iter(_AUTH_STATUS_CACHE))]
+        _AUTH_STATUS_CACHE.pop(key, None)
+        _AUTH_STATUS_CACHE[key] = (now + AUTH_STATUS_TTL_SECONDS, logged_in)
+        _AUTH_STATUS_DB_PATHS.add(path)
+    return logged_in
+
+
+def _is_logged_in(user_id: str | None, provider: str) -> bool | None:
+    """Return the cached sign-in status from the configured auth DB."""
+    return lookup_auth_status(user_id, provider)
+
+
+def invalidate_auth_status(user_id: str, provider: str) -> None:
+    """Drop cached sign-in status for the user/provider after its tokens change."""
+    global _AUTH_STATUS_GENERATION  # noqa: PLW0603
+    with _AUTH_LOCK:
+        _AUTH_STATUS_GENERATION += 1
+        for path in _AUTH_STATUS_DB_PATHS:
+            _AUTH_STATUS_CACHE.pop((path, user_id, provider), None)
 
 
 def _validate_provider(provider: str | None) -> dict[str, str] | None:
@@ -4,8 +4,12 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from http import HTTPStatus
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from googleapiclient.errors import HttpError
 
@@ -20,8 +24,66 @@ else:
 
 from mail_client_api import get_client_for_user  # noqa: E402
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from mail_client_api import Client
+
 logger = logging.getLogger("orchestrator.mail_tools")
 
+# Building a user's client reads their token from the auth DB, refreshes the access token
+# over the network, and builds the Gmail service, so clients are reused across tool calls.
+# The Google credentials refresh themselves when the access token expires; the TTL only
+# bounds how long a client outlives a token change made outside this process. The OAuth
+# routes call invalidate_mail_client() whenever they write or delete a token.
+MAIL_CLIENT_TTL_SECONDS = 300.0
+_MAIL_CLIENT_CACHE_MAX = 1024
+_MAIL_CLIENTS: dict[str, tuple[float, Client]] = {}
+_MAIL_CLIENTS_LOCK = threading.Lock()
+# The Gmail service's HTTP transport is not thread-safe, so concurrent tool calls for the
+# same user take turns with the shared client. Weak values: a user's lock lives only while
+# a call holds or awaits it, so past users do not accumulate entries.
+_USER_CLIENT_LOCKS: weakref.WeakValueDictionary[str, threading.Lock] = weakref.WeakValueDictionary()
+# Bumped by every invalidation; a client built while one raced is used once, not cached.
+_MAIL_CLIENT_GENERATION = 0
+
+# Error responses are fixed (MAIL_PROVIDER is read once at import), so they are built once;
+# _mail_error_response hands out copies.
+_LOGIN_REQUIRED: dict[str, str] = {
+    "type": "error",
+    "code": "login_required",
+    "message": f"Please sign in to your {MAIL_PROVIDER.capitalize()} account to continue.",
+}
+_SERVICE_ERROR: dict[str, str] = {
+    "type": "error",
+    "code": "service_error",
+    "message": "Mail service error, please retry later.",
+}
+_UNKNOWN_ERROR: dict[str, str] = {
+    "type": "error",
+    "code": "unknown_error",
+    "message": "Unexpected mail error.",
+}
+_STATUS_RESPONSES: dict[int | None, dict[str, str]] = {
+    HTTPStatus.NOT_FOUND: {
+        "type": "error",
+        "code": "invalid_message_id",
+        "message": "Message id not found. Please list emails first.",
+    },
+    HTTPStatus.BAD_REQUEST: {
+        "type": "error",
+        "code": "invalid_request",
+        "message": "Invalid request parameters. Please list emails first.",
+    },
+    HTTPStatus.UNAUTHORIZED: _LOGIN_REQUIRED,
+    HTTPStatus.FORBIDDEN: _LOGIN_REQUIRED,
+    HTTPStatus.TOO_MANY_REQUESTS: _SERVICE_ERROR,
+    HTTPStatus.INTERNAL_SERVER_ERROR: _SERVICE_ERROR,
+    HTTPStatus.BAD_GATEWAY: _SERVICE_ERROR,
+    HTTPStatus.SERVICE_UNAVAILABLE: _SERVICE_ERROR,
+    HTTPStatus.GATEWAY_TIMEOUT: _SERVICE_ERROR,
+}
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -34,61 +96,15 @@ def _mail_error_response(exc: Exception) -> dict[str, Any]:
         status = getattr(exc, "status_code", None)
         if status is None and hasattr(exc, "resp"):
             status = getattr(exc.resp, "status", None)
-
-        if status == HTTPStatus.NOT_FOUND:
-            return {
-                "type": "error",
-                "code": "invalid_message_id",
-                "message": "Message id not found. Please list emails first.",
-            }
-        if status == HTTPStatus.BAD_REQUEST:
-            return {
-                "type": "error",
-                "code": "invalid_request",
-                "message": "Invalid request parameters. Please list emails first.",
-            }
-        if status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
-            provider = MAIL_PROVIDER
-            message = (
-                f"Please sign in to your {provider.capitalize()} account to continue."
-                if provider
-                else "Please sign in to continue."
-            )
-            return {
-                "type": "error",
-                "code": "login_required",
-                "message": message,
-            }
-        if status in (
-            HTTPStatus.TOO_MANY_REQUESTS,
-            HTTPStatus.INTERNAL_SERVER_ERROR,
-            HTTPStatus.BAD_GATEWAY,
-            HTTPStatus.SERVICE_UNAVAILABLE,
-            HTTPStatus.GATEWAY_TIMEOUT,
-        ):
-            return {
-                "type": "error",
-                "code": "service_error",
-                "message": "Mail service error, please retry later.",
-            }
+        response = _STATUS_RESPONSES.get(status)
+        if response is not None:
+            return dict(response)
 
     if isinstance(exc, RuntimeError):
-        provider = MAIL_PROVIDER
-        message = (
-            f"Please sign in to your {provider.capitalize()} account to continue." if provider else "Please sign in to continue."
-        )
-        return {
-            "type": "error",
-            "code": "login_required",
-            "message": message,
-        }
+        return dict(_LOGIN_REQUIRED)
 
     logger.exception("Unexpected mail tool error")
-    return {
-        "type": "error",
-        "code": "unknown_error",
-        "message": "Unexpected mail error.",
-    }
+    return dict(_UNKNOWN_ERROR)
 
 
 def _require_user_id(user_id: str | None) -> str:
@@ -98,6 +114,49 @@ def _require_user_id(user_id: str | None) -> str:
     return user_id
 
 
+@contextmanager
+def _user_client(user_id: str | None) -> Iterator[Client]:
+    """Borrow the user's mail client, building and caching it on a miss or after expiry."""
+    user_id = _require_user_id(user_id)
+    with _MAIL_CLIENTS_LOCK:
+        user_lock = _USER_CLIENT_LOCKS.get(user_id)
+        if user_lock is None:
+            user_lock = _USER_CLIENT_LOCKS[user_id] = threading.Lock()
+    with user_lock:
+        now = time.monotonic()
+        with _MAIL_CLIENTS_LOCK:
+            cached = _MAIL_CLIENTS.get(user_id)
+            generation = _MAIL_CLIENT_GENERATION
+        if cached is not None and cached[0] > now:
+            client = cached[1]
+        else:
+            client = get_client_for_user(user_id)
+            with _MAIL_CLIENTS_LOCK:
+                if generation == _MAIL_CLIENT_GENERATION:
+                    _MAIL_CLIENTS.pop(user_id, None)
+                    if len(_MAIL_CLIENTS) >= _MAIL_CLIENT_CACHE_MAX:
+                        # Entries are inserted in expiry order, so the first one is the oldest.
+                        del _MAIL_CLIENTS[next(iter(_MAIL_CLIENTS))]
+                    _MAIL_CLIENTS[user_id] = (now + MAIL_CLIENT_TTL_SECONDS, client)
+        yield client
+
+
+def invalidate_mail_client(user_id: str) -> None:
+    """Drop the user's cached mail client after their tokens change."""
+    global _MAIL_CLIENT_GENERATION  # noqa: PLW0603
+    with _MAIL_CLIENTS_LOCK:
+        _MAIL_CLIENT_GENERATION += 1
+        _MAIL_CLIENTS.pop(user_id, None)
+
+
+def _tool_error_response(exc: Exception, user_id: str | None) -> dict[str, Any]:
+    """Map a tool error to a response, forgetting the user's client once sign-in is needed."""
+    response = _mail_error_response(exc)
+    if user_id and response["code"] == "login_required":
+        invalidate_mail_client(user_id)
+    return response
+
+
 # ---------------------------------------------------------------------------
 # Tool handlers
 # ---------------------------------------------------------------------------
@@ -106,10 +165,10 @@ def _require_user_id(user_id: str | None) -> str:
 def list_emails(max_results: int = 5, user_id: str | None = None) -> dict[str, Any]:
     """Return a summary of recent emails."""
     try:
-        client = get_client_for_user(_require_user_id(user_id))
-        messages = list(client.get_messages(max_results=max_results))
+        with _user_client(user_id) as client:
+            messages = list(client.get_messages(max_results=max_results))
     except Exception as exc:  # pragma: no cover - defensive guardrail  # noqa: BLE001
-        return _mail_error_response(exc)
+        return _tool_error_response(exc, user_id)
     return {
         "messages": [
             {
@@ -127,10 +186,10 @@ def list_emails(max_results: int = 5, user_id: str | None = None) -> dict[str, A
 def get_email(message_id: str, user_id: str | None = None) -> dict[str, Any]:
     """Return a full email by ID."""
     try:
-        client = get_client_for_user(_require_user_id(user_id))
-        msg = client.get_message(message_id)
+        with _user_client(user_id) as client:
+            msg = client.get_message(message_id)
     except Exception as exc:  # pragma: no cover - defensive guardrail  # noqa: BLE001
-        return _mail_error_response(exc)
+        return _tool_error_response(exc, user_id)
     return {
         "id": msg.id,
         "from": msg.from_,
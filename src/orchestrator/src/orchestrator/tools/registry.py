@@ -11,15 +11,21 @@ if TYPE_CHECKING:
 
 ToolHandler = Callable[..., Any]
 
-_TOOL_HANDLERS: dict[str, ToolHandler] = {}
+# Each handler is stored with whether it takes the caller's ``user_id``, decided once at
+# registration so ``run_tool`` does no per-call lookup.
+_TOOL_HANDLERS: dict[str, tuple[ToolHandler, bool]] = {}
 _TOOL_DEFINITIONS: list[ToolDefinition] = []
-_TOOLS_WITH_USER_CONTEXT = {
-    "list_emails",
-    "get_email",
-    "request_login",
-    "request_logout",
-    "check_status",
-}
+# Snapshot handed to every turn; rebuilt only after a new registration.
+_CACHED_DEFS: tuple[ToolDefinition, ...] | None = None
+_TOOLS_WITH_USER_CONTEXT = frozenset(
+    {
+        "list_emails",
+        "get_email",
+        "request_login",
+        "request_logout",
+        "check_status",
+    }
+)
 logger = logging.getLogger("orchestrator.tools")
 
 
@@ -33,26 +39,38 @@ def register_tool(definition: ToolDefinition, handler: ToolHandler) -> None:
     if definition.name in _TOOL_HANDLERS:
         msg = f"Tool already registered: {definition.name}"
         raise ValueError(msg)
+    global _CACHED_DEFS  # noqa: PLW0603
     _TOOL_DEFINITIONS.append(definition)
-    _TOOL_HANDLERS[definition.name] = handler
+    _TOOL_HANDLERS[definition.name] = (handler, definition.name in _TOOLS_WITH_USER_CONTEXT)
+    _CACHED_DEFS = None
 
 
-def list_definitions() -> list[ToolDefinition]:
-    """Return all registered tool definitions."""
-    return list(_TOOL_DEFINITIONS)
+def list_definitions() -> tuple[ToolDefinition, ...]:
+    """Return all registered tool definitions.
+
+    Tools are registered at import time, so the same immutable tuple is returned on every
+    call instead of copying the registry per request.
+    """
+    global _CACHED_DEFS  # noqa: PLW0603
+    cached = _CACHED_DEFS
+    if cached is None:
+        cached = _CACHED_DEFS = tuple(_TOOL_DEFINITIONS)
+    return cached
 
 
 def run_tool(name: str, arguments: dict[str, Any], *, user_id: str | None = None) -> object:
     """Execute a registered tool."""
-    handler = _TOOL_HANDLERS.get(name)
-    if handler is None:
+    entry = _TOOL_HANDLERS.get(name)
+    if entry is None:
         label = name or "unknown"
         return {"type": "error", "code": "unknown_tool", "message": f"Unknown tool: {label}"}
-    payload = dict(arguments)
-    if name in _TOOLS_WITH_USER_CONTEXT and user_id:
-        payload.setdefault("user_id", user_id)
+    handler, wants_user_id = entry
+    # ``**arguments`` already unpacks into fresh kwargs; only build a new dict when the
+    # caller's user id has to be injected.
+    if wants_user_id and user_id and "user_id" not in arguments:
+        arguments = {**arguments, "user_id": user_id}
     try:
-        return handler(**payload)
+        return handler(**arguments)
     except Exception as exc:  # pragma: no cover - defensive guardrail
         logger.exception("Tool failed (%s)", name)
         return {"type": "error", "code": "tool_failed", "message": str(exc), "tool": name}
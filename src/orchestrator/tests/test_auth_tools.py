@@ -3,60 +3,57 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import TYPE_CHECKING
+from contextlib import closing
+from typing import TYPE_CHECKING, Any
 from unittest.mock import Mock
 
-if TYPE_CHECKING:
-    from pathlib import Path
-
-    import pytest
-from orchestrator.tools import auth
-
-
-def test_check_status_logged_in(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Return already_logged_in when user is logged in."""
-    monkeypatch.setattr(auth, "_is_logged_in", lambda *_: True)
-    result = auth.check_status(user_id="u1", provider="google")
-    assert result["code"] == "already_logged_in"
-    assert "Google" in result["message"]
-
+import pytest
+from orchestrator.tools import auth, registry
 
-def test_check_status_not_logged_in(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Return not_logged_in when user is not logged in."""
-    monkeypatch.setattr(auth, "_is_logged_in", lambda *_: False)
-    result = auth.check_status(user_id="u1", provider="google")
-    assert result["code"] == "not_logged_in"
-    assert "Google" in result["message"]
+from orchestrator import db_pool
 
-
-def test_request_login_already_signed_in(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Short-circuit login when user is already signed in."""
-    monkeypatch.setattr(auth, "_is_logged_in", lambda *_: True)
-    result = auth.request_login(user_id="u1", provider="google")
-    assert result["code"] == "already_logged_in"
-
-
-def test_request_login_needs_action(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Request login action when user is not signed in."""
-    monkeypatch.setattr(auth, "_is_logged_in", lambda *_: False)
-    result = auth.request_login(user_id="u1", provider="google")
-    assert result["code"] == "login"
-    assert result["provider"] == "google"
-
-
-def test_request_logout_not_logged_in(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Return not_logged_in when logout is requested for a signed-out user."""
-    monkeypatch.setattr(auth, "_is_logged_in", lambda *_: False)
-    result = auth.request_logout(user_id="u1", provider="google")
-    assert result["code"] == "not_logged_in"
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
 
 
-def test_request_logout_needs_action(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Return logout action when user is signed in."""
-    monkeypatch.setattr(auth, "_is_logged_in", lambda *_: True)
-    result = auth.request_logout(user_id="u1", provider="google")
-    assert result["code"] == "logout"
-    assert result["provider"] == "google"
+@pytest.fixture(autouse=True)
+def _clear_login_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Start every test with an empty sign-in status cache."""
+    monkeypatch.setattr(auth, "_AUTH_STATUS_CACHE", {})
+
+
+@pytest.mark.parametrize(
+    ("tool", "logged_in", "expected"),
+    [
+        (auth.check_status, True, {"code": "already_logged_in"}),
+        (auth.check_status, False, {"code": "not_logged_in"}),
+        (auth.request_login, True, {"code": "already_logged_in"}),
+        (auth.request_login, False, {"code": "login", "provider": "google"}),
+        (auth.request_logout, False, {"code": "not_logged_in"}),
+        (auth.request_logout, True, {"code": "logout", "provider": "google"}),
+    ],
+    ids=[
+        "status-signed-in",
+        "status-signed-out",
+        "login-signed-in",
+        "login-needs-action",
+        "logout-signed-out",
+        "logout-needs-action",
+    ],
+)
+def test_auth_tool_codes(
+    monkeypatch: pytest.MonkeyPatch,
+    tool: Callable[..., dict[str, Any]],
+    logged_in: bool,  # noqa: FBT001
+    expected: dict[str, str],
+) -> None:
+    """Each auth tool answers with an action only when the sign-in state calls for one."""
+    monkeypatch.setattr(auth, "_is_logged_in", lambda *_: logged_in)
+    result = tool(user_id="u1", provider="google")
+    assert {key: result.get(key) for key in expected} == expected
+    if tool is auth.check_status:
+        assert "Google" in result["message"]
 
 
 def test_check_status_missing_provider() -> None:
@@ -78,6 +75,7 @@ def test_is_logged_in_handles_missing_user() -> None:
 
 def test_is_logged_in_handles_db_error(monkeypatch: pytest.MonkeyPatch) -> None:
     """Return None when sqlite errors occur."""
+    monkeypatch.setattr(db_pool, "_POOLS", {})
     monkeypatch.setattr(sqlite3, "connect", Mock(side_effect=sqlite3.Error("boom")))
     assert auth._is_logged_in("u1", "google") is None
 
@@ -86,11 +84,101 @@ def test_is_logged_in_reads_tokens(tmp_path: Path, monkeypatch: pytest.MonkeyPat
     """Return True/False based on token presence."""
     db_path = tmp_path / "auth.db"
     monkeypatch.setattr(auth, "AUTH_DB_PATH", str(db_path))
-    conn = sqlite3.connect(db_path)
-    conn.execute("CREATE TABLE oauth_tokens (user_id TEXT, provider TEXT)")
-    conn.execute("INSERT INTO oauth_tokens VALUES (?, ?)", ("u1", "google"))
-    conn.commit()
-    conn.close()
+    # Schema and rows land in a single transaction, so seeding costs one commit.
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        conn.execute("CREATE TABLE oauth_tokens (user_id TEXT, provider TEXT)")
+        conn.executemany(
+            "INSERT INTO oauth_tokens VALUES (?, ?)",
+            [("u1", "google"), ("u2", "microsoft")],
+        )
 
     assert auth._is_logged_in("u1", "google") is True
     assert auth._is_logged_in("u2", "google") is False
+    assert auth._is_logged_in("u2", "microsoft") is True
+
+
+def test_is_logged_in_reuses_pooled_connection(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Borrow the same WAL-mode pooled connection per DB path and close it on shutdown."""
+    db_path = tmp_path / "auth.db"
+    monkeypatch.setattr(auth, "AUTH_DB_PATH", str(db_path))
+    monkeypatch.setattr(db_pool, "_POOLS", {})
+
+    assert auth._is_logged_in("u1", "google") is False
+    pool = db_pool._POOLS[str(db_path)]
+    with pool.connection() as shared:
+        shared.execute(
+            "INSERT INTO oauth_tokens (user_id, provider, refresh_token, updated_at) VALUES (?, ?, ?, ?)",
+            ("u1", "google", "refresh", 0),
+        )
+        shared.commit()
+    auth.invalidate_auth_status("u1", "google")
+
+    assert auth._is_logged_in("u1", "google") is True
+    assert db_pool._POOLS[str(db_path)] is pool
+    with pool.connection() as conn:
+        assert conn is shared
+        assert tuple(conn.execute("PRAGMA journal_mode").fetchone()) == ("wal",)
+        assert tuple(conn.execute("PRAGMA mmap_size").fetchone()) in {(268435456,), (0,)}
+
+    db_pool.close_all()
+    assert db_pool._POOLS == {}
+
+
+def test_is_logged_in_caches_until_invalidated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Serve repeated lookups from the TTL cache until the tokens change or the entry expires."""
+    db_path = tmp_path / "auth.db"
+    monkeypatch.setattr(auth, "AUTH_DB_PATH", str(db_path))
+    monkeypatch.setattr(db_pool, "_POOLS", {})
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("CREATE TABLE oauth_tokens (user_id TEXT, provider TEXT)")
+        conn.commit()
+        assert auth._is_logged_in("u1", "google") is False
+
+        conn.execute("INSERT INTO oauth_tokens VALUES (?, ?)", ("u1", "google"))
+        conn.commit()
+        assert auth._is_logged_in("u1", "google") is False
+
+        auth.invalidate_auth_status("u1", "google")
+        assert auth._is_logged_in("u1", "google") is True
+
+        conn.execute("DELETE FROM oauth_tokens")
+        conn.commit()
+        monkeypatch.setattr(auth, "AUTH_STATUS_TTL_SECONDS", 0.0)
+        auth.invalidate_auth_status("u1", "google")
+        assert auth._is_logged_in("u1", "google") is False
+        conn.execute("INSERT INTO oauth_tokens VALUES (?, ?)", ("u1", "google"))
+        conn.commit()
+        assert auth._is_logged_in("u1", "google") is True
+    db_pool.close_all()
+
+
+def test_repeated_status_tool_calls_query_db_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Status tools run through the registry on every turn share one cached DB lookup."""
+    monkeypatch.setattr(auth, "AUTH_DB_PATH", str(tmp_path / "auth.db"))
+    monkeypatch.setattr(db_pool, "_POOLS", {})
+    get_conn = Mock(wraps=db_pool.get_conn)
+    monkeypatch.setattr(db_pool, "get_conn", get_conn)
+
+    for name in ("check_status", "request_login", "check_status"):
+        registry.run_tool(name, {"provider": "google"}, user_id="u1")
+
+    get_conn.assert_called_once()
+    db_pool.close_all()
+
+
+def test_is_logged_in_connects_once_per_db_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Repeated lookups open no new connections; pointing AUTH_DB_PATH elsewhere gets its own pool."""
+    monkeypatch.setattr(db_pool, "_POOLS", {})
+    real_connect = sqlite3.connect
+    connect = Mock(side_effect=real_connect)
+    monkeypatch.setattr(sqlite3, "connect", connect)
+
+    for path in ("first.db", "second.db"):
+        monkeypatch.setattr(auth, "AUTH_DB_PATH", str(tmp_path / path))
+        for _ in range(5):
+            monkeypatch.setattr(auth, "_AUTH_STATUS_CACHE", {})
+            assert auth._is_logged_in("u1", "google") is False
+
+    assert set(db_pool._POOLS) == {str(tmp_path / "first.db"), str(tmp_path / "second.db")}
+    assert connect.call_count == 2 * db_pool.POOL_MIN_SIZE
+    db_pool.close_all()
@@ -0,0 +1,166 @@
+"""Tests for the orchestrator's pooled SQLite connections."""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import TYPE_CHECKING
+from unittest.mock import Mock
+
+import orchestrator.google_auth_routes as auth_routes
+import pytest
+from orchestrator.tools import auth
+
+from orchestrator import db_pool
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _table_names(conn: sqlite3.Connection) -> set[str]:
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+
+def test_pool_creates_schema_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The schema is created when the pool is built, not on every borrow."""
+    init_schema = Mock(wraps=db_pool.init_schema)
+    monkeypatch.setattr(db_pool, "init_schema", init_schema)
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"))
+
+    for _ in range(3):
+        with pool.connection() as conn:
+            assert {"oauth_state", "oauth_tokens"} <= _table_names(conn)
+
+    init_schema.assert_called_once()
+    pool.close()
+
+
+def test_pool_hands_back_most_recent_connection(tmp_path: Path) -> None:
+    """Returned connections are reused LIFO and keep the WAL/busy-wait settings they opened with."""
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"))
+    with pool.connection() as first:
+        assert first.row_factory is None
+        assert tuple(first.execute("PRAGMA journal_mode").fetchone()) == ("wal",)
+        assert tuple(first.execute("PRAGMA synchronous").fetchone()) == (1,)
+        assert tuple(first.execute("PRAGMA foreign_keys").fetchone()) == (1,)
+        assert tuple(first.execute("PRAGMA busy_timeout").fetchone()) == (5000,)
+        assert tuple(first.execute("PRAGMA auto_vacuum").fetchone()) == (2,)  # INCREMENTAL
+    with pool.connection() as second:
+        assert second is first
+    pool.close()
+
+
+def test_pool_connections_cache_prepared_statements(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Pooled connections keep a large statement cache so the module-level SQL is parsed once."""
+    connect = Mock(side_effect=sqlite3.connect)
+    monkeypatch.setattr(sqlite3, "connect", connect)
+
+    db_pool.ConnectionPool(str(tmp_path / "auth.db"), min_size=1).close()
+
+    assert connect.call_args.kwargs["cached_statements"] == db_pool._CACHED_STATEMENTS
+    assert connect.call_args.kwargs["check_same_thread"] is False
+
+
+def test_pool_grows_to_max_then_times_out(tmp_path: Path) -> None:
+    """Borrowing past max_size waits for a free connection and then raises a sqlite3 error."""
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"), min_size=1, max_size=2, timeout=0.01)
+    with pool.connection() as first, pool.connection() as second:
+        assert first is not second
+        with pytest.raises(sqlite3.OperationalError, match="Timed out"), pool.connection():
+            pass
+    pool.close()
+
+
+def test_pool_releases_grow_slot_when_connect_fails(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A failed connect does not permanently consume a slot below max_size."""
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"), min_size=1, max_size=2)
+    with pool.connection():
+        real_connect = sqlite3.connect
+        monkeypatch.setattr(sqlite3, "connect", Mock(side_effect=sqlite3.Error("boom")))
+        with pytest.raises(sqlite3.Error, match="boom"), pool.connection():
+            pass
+        monkeypatch.setattr(sqlite3, "connect", real_connect)
+        with pool.connection() as grown:
+            assert grown is not None
+    pool.close()
+
+
+def test_pool_rolls_back_abandoned_transactions(tmp_path: Path) -> None:
+    """Uncommitted writes are rolled back before a connection returns to the pool."""
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"))
+
+    def abandon_insert() -> None:
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO oauth_state VALUES (?, ?, ?, ?)", ("s", "u", "google", 0))
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        abandon_insert()
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM oauth_state").fetchone()[0] == 0
+    pool.close()
+
+
+def test_close_closes_borrowed_connections_on_return(tmp_path: Path) -> None:
+    """Closing the pool closes idle connections now and borrowed ones when returned."""
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"))
+    with pool.connection() as borrowed:
+        pool.close()
+        borrowed.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        borrowed.execute("SELECT 1")
+
+
+def test_compact_reclaims_a_bounded_number_of_pages(tmp_path: Path) -> None:
+    """compact() hands at most INCREMENTAL_VACUUM_PAGES free pages back per call."""
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"))
+    with pool.connection() as conn:
+        conn.executemany(
+            "INSERT INTO oauth_state (state, user_id, provider, created_at) VALUES (?, ?, ?, 0)",
+            ((f"state-{i}", "x" * 500, "google") for i in range(2000)),
+        )
+        conn.execute("DELETE FROM oauth_state")
+        conn.commit()
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        db_pool.compact(conn)
+
+        free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    pool.close()
+    assert free_before > db_pool.INCREMENTAL_VACUUM_PAGES
+    assert free_before - free_after == db_pool.INCREMENTAL_VACUUM_PAGES
+
+
+def test_get_conn_shares_one_pool_per_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Str and Path spellings of one database share a pool until close_all."""
+    monkeypatch.setattr(db_pool, "_POOLS", {})
+    db_path = tmp_path / "auth.db"
+
+    with db_pool.get_conn(db_path) as conn:
+        assert {"oauth_state", "oauth_tokens"} <= _table_names(conn)
+    assert db_pool.get_pool(str(db_path)) is db_pool.get_pool(db_path)
+
+    db_pool.close_all()
+    assert db_pool._POOLS == {}
+
+
+@pytest.mark.parametrize(
+    ("sql", "params", "index"),
+    [
+        (auth._AUTH_STATUS_SQL, ("u1", "google"), "USING PRIMARY KEY (user_id=? AND provider=?)"),
+        (auth_routes._SQL_PRUNE_STATES, (0,), "idx_oauth_state_created_at"),
+        (auth_routes._SQL_CONSUME_STATE, ("s", "google", 0), "USING PRIMARY KEY (state=?)"),
+    ],
+    ids=["token-status", "state-prune", "state-consume"],
+)
+def test_schema_indexes_cover_hot_queries(tmp_path: Path, sql: str, params: tuple[object, ...], index: str) -> None:
+    """Status, prune, and consume queries search an index instead of scanning the table.
+
+    Both tables are WITHOUT ROWID, so key lookups search the primary key B-tree itself
+    rather than a separate autoindex.
+    """
+    pool = db_pool.ConnectionPool(str(tmp_path / "auth.db"))
+    with pool.connection() as conn:
+        details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    pool.close()
+    assert any(detail.startswith("SEARCH") and index in detail for detail in details), details
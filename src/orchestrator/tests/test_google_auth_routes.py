@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import json
 import sqlite3
-from contextlib import closing, nullcontext
+from contextlib import closing, contextmanager, nullcontext
 from http import HTTPStatus
 from types import SimpleNamespace
 from typing import TYPE_CHECKING, Any
@@ -15,121 +15,193 @@ import pytest
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from orchestrator.google_auth_routes import router
+from orchestrator.tools import auth
+
+from orchestrator import db_pool
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from pathlib import Path
 
 
-def _client_with_router() -> TestClient:
-    # Minimal FastAPI app mounting the router for testing.
+@pytest.fixture(scope="module")
+def router_client() -> Iterator[TestClient]:
+    """Minimal FastAPI app mounting the router, built once per module."""
     from fastapi import FastAPI
 
     app = FastAPI()
     app.include_router(router)
-    return TestClient(app)
+    client = TestClient(app)
+    yield client
+    client.close()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_auth_db(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Point the routes at a per-test database so none is created in the working directory."""
+    monkeypatch.setattr(auth_routes, "AUTH_DB_PATH", tmp_path / "auth.db")
+
+
+# Stands in for ``_open_db`` when the DB helpers are stubbed; nullcontext is reusable.
+_NO_DB = nullcontext()
+_MEMORY_AUTH_DB_URI = "file:oauth-routes-tests?mode=memory&cache=shared"
+
+
+@pytest.fixture(scope="module")
+def _memory_auth_schema() -> Iterator[sqlite3.Connection]:
+    """Create the auth schema once in a shared in-memory database kept alive for the module."""
+    keeper = sqlite3.connect(_MEMORY_AUTH_DB_URI, uri=True)
+    auth_routes._init_db(keeper)
+    try:
+        yield keeper
+    finally:
+        keeper.close()
+
+
+@pytest.fixture
+def mem_conn(_memory_auth_schema: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Fresh connection to the shared in-memory auth DB; rows are cleared after each test."""
+    conn = sqlite3.connect(_MEMORY_AUTH_DB_URI, uri=True)
+    try:
+        yield conn
+    finally:
+        conn.close()
+        with _memory_auth_schema:
+            _memory_auth_schema.execute("DELETE FROM oauth_state")
+            _memory_auth_schema.execute("DELETE FROM oauth_tokens")
 
 
-def test_login_missing_user_id() -> None:
+def test_login_missing_user_id(router_client: TestClient) -> None:
     """Reject login when user_id is missing."""
-    client = _client_with_router()
-    resp = client.get("/auth/google/login")
+    resp = router_client.get("/auth/google/login")
     assert resp.status_code in {HTTPStatus.UNPROCESSABLE_ENTITY, HTTPStatus.BAD_REQUEST}
 
 
-def test_login_missing_config(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_login_missing_config(router_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
     """Return 500 when login config is not set."""
-    client = _client_with_router()
     monkeypatch.setattr(auth_routes, "PUBLIC_BASE_URL", None)
-    resp = client.get("/auth/google/login", params={"user_id": "u1"})
+    resp = router_client.get("/auth/google/login", params={"user_id": "u1"})
     assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-def test_status_missing_user_id() -> None:
+def test_status_missing_user_id(router_client: TestClient) -> None:
     """Reject status checks when user_id is missing."""
-    client = _client_with_router()
-    resp = client.get("/auth/google/status")
+    resp = router_client.get("/auth/google/status")
     assert resp.status_code in {HTTPStatus.UNPROCESSABLE_ENTITY, HTTPStatus.BAD_REQUEST}
 
 
-def test_status_reports_logged_in(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+def test_status_reports_logged_in(router_client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     """Status should be true when a token exists."""
     db_path = tmp_path / "auth.db"
     monkeypatch.setattr(auth_routes, "AUTH_DB_PATH", db_path)
-    conn = auth_routes._open_db()
-    conn.execute(
-        "INSERT INTO oauth_tokens (user_id, provider, refresh_token, access_token, expires_at, scopes, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
-        ("u1", "google", "refresh", None, None, "[]", 0),
-    )
-    conn.commit()
-    conn.close()
-
-    client = _client_with_router()
-    resp = client.get("/auth/google/status", params={"user_id": "u1"})
+    with auth_routes._open_db() as conn:
+        conn.execute(
+            "INSERT INTO oauth_tokens (user_id, provider, refresh_token, access_token, expires_at, scopes, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ("u1", "google", "refresh", None, None, "[]", 0),
+        )
+        conn.commit()
+
+    resp = router_client.get("/auth/google/status", params={"user_id": "u1"})
     assert resp.status_code == HTTPStatus.OK
     assert resp.json() == {"logged_in": True}
+    assert router_client.get("/auth/google/status", params={"user_id": "u2"}).json() == {"logged_in": False}
+
+
+def test_status_is_served_from_the_auth_status_cache(router_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Repeated status checks reuse the auth tools' cached lookup until the tokens change."""
+    get_conn = Mock(wraps=db_pool.get_conn)
+    monkeypatch.setattr(db_pool, "get_conn", get_conn)
 
+    for _ in range(3):
+        assert router_client.get("/auth/google/status", params={"user_id": "u1"}).json() == {"logged_in": False}
+    get_conn.assert_called_once()
 
-def test_callback_missing_params() -> None:
+    with auth_routes._open_db() as conn, conn:
+        conn.execute(
+            "INSERT INTO oauth_tokens (user_id, provider, refresh_token, updated_at) VALUES (?, ?, ?, ?)",
+            ("u1", "google", "refresh", 0),
+        )
+    auth.invalidate_auth_status("u1", "google")
+
+    assert router_client.get("/auth/google/status", params={"user_id": "u1"}).json() == {"logged_in": True}
+
+
+def test_status_reports_db_errors(router_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Return 500 when the status lookup cannot reach the auth DB."""
+    monkeypatch.setattr(auth_routes, "lookup_auth_status", lambda *_: None)
+    resp = router_client.get("/auth/google/status", params={"user_id": "u1"})
+    assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def test_callback_missing_params(router_client: TestClient) -> None:
     """Reject callback when params are missing."""
-    client = _client_with_router()
-    resp = client.get("/auth/google/callback")
+    resp = router_client.get("/auth/google/callback")
     assert resp.status_code == HTTPStatus.BAD_REQUEST
 
 
-def test_callback_invalid_state(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_callback_invalid_state(router_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
     """Reject callback when state cannot be consumed."""
-    client = _client_with_router()
-    monkeypatch.setattr(auth_routes, "_open_db", lambda: closing(sqlite3.connect(":memory:")))
+    monkeypatch.setattr(auth_routes, "_open_db", lambda: _NO_DB)
     monkeypatch.setattr(auth_routes, "_consume_state", lambda *_, **__: None)
-    resp = client.get("/auth/google/callback", params={"state": "s", "code": "c"})
+    resp = router_client.get("/auth/google/callback", params={"state": "s", "code": "c"})
     assert resp.status_code == HTTPStatus.BAD_REQUEST
 
 
 def test_parse_scopes_strips_empty() -> None:
     """Parse comma-separated scopes, trimming empty items."""
-    assert auth_routes._parse_scopes("scope1, scope2, ,") == ["scope1", "scope2"]
+    assert auth_routes._parse_scopes(" scope1 , scope2, ,") == ("scope1", "scope2")
+    assert auth_routes._parse_scopes("scope1, scope2") is auth_routes._parse_scopes("scope1, scope2")
 
 
 def test_open_db_creates_tables(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     """Ensure auth tables exist after opening DB."""
     db_path = tmp_path / "auth.db"
     monkeypatch.setattr(auth_routes, "AUTH_DB_PATH", db_path)
-    conn = auth_routes._open_db()
-    rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
-    table_names = {row["name"] for row in rows}
-    conn.close()
+    with auth_routes._open_db() as conn:
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        journal_mode = conn.execute("SELECT * FROM pragma_journal_mode").fetchone()[0]
+        trusted_schema = conn.execute("PRAGMA trusted_schema").fetchone()[0]
+    table_names = {name for (name,) in rows}
     assert {"oauth_state", "oauth_tokens"} <= table_names
+    assert journal_mode == "wal"
+    assert trusted_schema == 0
 
 
-def test_store_and_consume_state_round_trip() -> None:
+def test_store_and_consume_state_round_trip(mem_conn: sqlite3.Connection) -> None:
     """Persist and consume OAuth state tokens."""
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
-    auth_routes._init_db(conn)
+    conn = mem_conn
     auth_routes._store_state(conn, "state1", "user1", "google", now=100)
     user_id = auth_routes._consume_state(conn, "state1", "google", now=100)
     assert user_id == "user1"
     assert auth_routes._consume_state(conn, "state1", "google", now=100) is None
-    conn.close()
 
 
-def test_consume_state_expires_old_entries(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Prune expired OAuth states."""
+def test_consume_state_expires_old_entries(mem_conn: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Expired OAuth states never validate, even before maintenance prunes them."""
     monkeypatch.setattr(auth_routes, "STATE_TTL_SECONDS", 10)
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
-    auth_routes._init_db(conn)
-    auth_routes._store_state(conn, "expired", "user1", "google", now=0)
-    result = auth_routes._consume_state(conn, "expired", "google", now=20)
+    auth_routes._store_state(mem_conn, "expired", "user1", "google", now=0)
+    result = auth_routes._consume_state(mem_conn, "expired", "google", now=20)
     assert result is None
-    conn.close()
 
 
-def test_get_existing_refresh_token() -> None:
+def test_run_db_maintenance_prunes_expired_states(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Maintenance deletes expired states (logins no longer do) and leaves fresh ones."""
+    monkeypatch.setattr(auth_routes, "AUTH_DB_PATH", tmp_path / "auth.db")
+    monkeypatch.setattr(auth_routes, "STATE_TTL_SECONDS", 10)
+    with auth_routes._open_db() as conn:
+        auth_routes._store_state(conn, "expired", "user1", "google", now=0)
+        auth_routes._store_state(conn, "fresh", "user1", "google", now=20)
+        assert conn.execute("SELECT COUNT(*) FROM oauth_state").fetchone()[0] == 2  # noqa: PLR2004
+
+    assert auth_routes.run_db_maintenance(now=20) == 1
+
+    with auth_routes._open_db() as conn:
+        assert [state for (state,) in conn.execute("SELECT state FROM oauth_state")] == ["fresh"]
+
+
+def test_get_existing_refresh_token(mem_conn: sqlite3.Connection) -> None:
     """Return refresh tokens when stored."""
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
-    auth_routes._init_db(conn)
+    conn = mem_conn
     conn.execute(
         "INSERT INTO oauth_tokens (user_id, provider, refresh_token, access_token, expires_at, scopes, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
         ("u1", "google", "refresh", None, None, "[]", 0),
@@ -137,14 +209,37 @@ def test_get_existing_refresh_token() -> None:
     conn.commit()
     assert auth_routes._get_existing_refresh_token(conn, "u1", "google") == "refresh"
     assert auth_routes._get_existing_refresh_token(conn, "u2", "google") is None
-    conn.close()
 
 
-def test_upsert_token_inserts_and_updates() -> None:
+def test_token_and_state_helpers_issue_one_statement_each(mem_conn: sqlite3.Connection) -> None:
+    """Each helper runs a single prepared statement (no select-then-write round trips)."""
+    conn = mem_conn
+    traced: list[str] = []
+    conn.set_trace_callback(traced.append)
+
+    auth_routes._upsert_token(
+        conn,
+        user_id="u1",
+        provider="google",
+        refresh_token="refresh",
+        access_token=None,
+        expires_at=None,
+        scopes=[],
+        now=0,
+    )
+    auth_routes._store_state(conn, "s1", "u1", "google", now=0)
+    auth_routes._consume_state(conn, "s1", "google", now=0)
+    auth_routes._get_existing_refresh_token(conn, "u1", "google")
+    conn.set_trace_callback(None)
+
+    statements = [sql.split()[0] for sql in traced if sql not in {"BEGIN ", "COMMIT"}]
+    assert statements == ["INSERT", "INSERT", "DELETE", "SELECT"]
+
+
+def test_upsert_token_inserts_and_updates(mem_conn: sqlite3.Connection) -> None:
     """Insert and update OAuth tokens."""
-    conn = sqlite3.connect(":memory:")
+    conn = mem_conn
     conn.row_factory = sqlite3.Row
-    auth_routes._init_db(conn)
     auth_routes._upsert_token(
         conn,
         user_id="u1",
@@ -176,7 +271,6 @@ def test_upsert_token_inserts_and_updates() -> None:
     assert row["expires_at"] == expires_at
     assert json.loads(row["scopes"]) == ["scope2"]
     assert row["updated_at"] == updated_at
-    conn.close()
 
 
 def test_build_flow_uses_config(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -192,13 +286,33 @@ def test_build_flow_uses_config(monkeypatch: pytest.MonkeyPatch) -> None:
     result = auth_routes._build_flow(state="state123")
 
     assert result is mock_flow
+    mock_flow.oauth2session.mount.assert_called_once_with("https://", auth_routes._TOKEN_ADAPTER)
     mock_factory.assert_called_once()
     _, kwargs = mock_factory.call_args
     assert kwargs["redirect_uri"] == "https://example.com/auth/google/callback"
-    assert kwargs["scopes"] == ["scope1", "scope2"]
+    assert kwargs["scopes"] == ("scope1", "scope2")
     assert kwargs["state"] == "state123"
 
 
+def test_build_flow_reuses_config_but_not_flows(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Repeated flows share one cached client config; each request still gets its own Flow."""
+    monkeypatch.setattr(auth_routes, "PUBLIC_BASE_URL", "https://example.com")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_CLIENT_ID", "client-reuse")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_CLIENT_SECRET", "secret")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_SCOPES", "scope1")
+    mock_factory = Mock(side_effect=lambda *_args, **_kwargs: Mock())
+    monkeypatch.setattr(auth_routes, "Flow", Mock(from_client_config=mock_factory))
+
+    first = auth_routes._build_flow(state="s1")
+    second = auth_routes._build_flow(state="s2")
+
+    assert first is not second
+    (first_config,), first_kwargs = mock_factory.call_args_list[0]
+    (second_config,), second_kwargs = mock_factory.call_args_list[1]
+    assert first_config is second_config
+    assert (first_kwargs["state"], second_kwargs["state"]) == ("s1", "s2")
+
+
 def test_build_flow_empty_scopes_raises(monkeypatch: pytest.MonkeyPatch) -> None:
     """Reject empty OAuth scope configuration."""
     monkeypatch.setattr(auth_routes, "PUBLIC_BASE_URL", "https://example.com")
@@ -211,7 +325,7 @@ def test_build_flow_empty_scopes_raises(monkeypatch: pytest.MonkeyPatch) -> None
 
 def test_oauth_login_redirects(monkeypatch: pytest.MonkeyPatch) -> None:
     """Login route returns a redirect to the provider."""
-    monkeypatch.setattr(auth_routes, "_open_db", lambda: nullcontext(object()))
+    monkeypatch.setattr(auth_routes, "_open_db", lambda: _NO_DB)
 
     def fake_store(*_args: Any, **_kwargs: Any) -> None:
         return None
@@ -254,13 +368,24 @@ def test_oauth_callback_persists_token(monkeypatch: pytest.MonkeyPatch) -> None:
         expiry = _DummyExpiry()
         scopes = None
 
+    borrowed: list[bool] = []
+
+    @contextmanager
+    def tracking_open_db() -> Iterator[object]:
+        borrowed.append(True)
+        try:
+            yield object()
+        finally:
+            borrowed.pop()
+
     class _DummyFlow:
         credentials = _DummyCreds()
 
         def fetch_token(self, **_: Any) -> None:
-            return None
+            # The network token exchange must not tie up a pooled DB connection.
+            assert borrowed == []
 
-    monkeypatch.setattr(auth_routes, "_open_db", lambda: nullcontext(object()))
+    monkeypatch.setattr(auth_routes, "_open_db", tracking_open_db)
 
     def fake_consume_state(*_args: Any, **_kwargs: Any) -> str:
         return "user1"
@@ -282,7 +407,72 @@ def test_oauth_callback_persists_token(monkeypatch: pytest.MonkeyPatch) -> None:
         captured.update(kwargs)
 
     monkeypatch.setattr(auth_routes, "_upsert_token", fake_upsert)
+    invalidated: list[tuple[str, ...]] = []
+    monkeypatch.setattr(auth_routes, "invalidate_auth_status", lambda *args: invalidated.append(args))
+    monkeypatch.setattr(auth_routes, "invalidate_mail_client", lambda *args: invalidated.append(args))
     response = auth_routes.oauth_callback(state="state", code="code")
     assert response.body == b"Google authorization complete. You can close this window."
     assert captured["user_id"] == "user1"
     assert captured["refresh_token"] == "refresh"
+    assert invalidated == [("user1", "google"), ("user1",)]
+
+
+def test_oauth_logout_deletes_tokens_and_invalidates_status(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Logout removes stored tokens and drops the cached sign-in status."""
+    db_path = tmp_path / "auth.db"
+    monkeypatch.setattr(auth_routes, "AUTH_DB_PATH", db_path)
+    with auth_routes._open_db() as conn:
+        auth_routes._upsert_token(
+            conn,
+            user_id="u1",
+            provider="google",
+            refresh_token="refresh",
+            access_token=None,
+            expires_at=None,
+            scopes=[],
+            now=0,
+        )
+    invalidated: list[tuple[str, ...]] = []
+    monkeypatch.setattr(auth_routes, "invalidate_auth_status", lambda *args: invalidated.append(args))
+    monkeypatch.setattr(auth_routes, "invalidate_mail_client", lambda *args: invalidated.append(args))
+
+    response = auth_routes.oauth_logout(user_id="u1")
+
+    assert response.body == b"Signed out. You can close this window."
+    assert invalidated == [("u1", "google"), ("u1",)]
+    with closing(sqlite3.connect(db_path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM oauth_tokens").fetchone() == (0,)
+
+
+def test_build_flow_reuses_validated_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Repeated flows share one validated client config until the settings change."""
+    monkeypatch.setattr(auth_routes, "PUBLIC_BASE_URL", "https://example.com/")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_CLIENT_ID", "client")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_CLIENT_SECRET", "secret")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_SCOPES", "scope1")
+    mock_factory = Mock()
+    monkeypatch.setattr(auth_routes, "Flow", Mock(from_client_config=mock_factory))
+
+    auth_routes._build_flow(state="a")
+    auth_routes._build_flow(state="b")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_CLIENT_ID", "other")
+    auth_routes._build_flow(state="c")
+
+    (first, _), (second, _), (third, third_kwargs) = mock_factory.call_args_list
+    assert first[0] is second[0]
+    assert third[0]["web"]["client_id"] == "other"
+    assert third_kwargs["redirect_uri"] == "https://example.com/auth/google/callback"
+
+
+def test_build_flow_token_exchange_uses_shared_adapter(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Real flows route the token endpoint through the shared, pooled HTTPS adapter."""
+    monkeypatch.setattr(auth_routes, "PUBLIC_BASE_URL", "https://example.com")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_CLIENT_ID", "client")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_CLIENT_SECRET", "secret")
+    monkeypatch.setattr(auth_routes, "GOOGLE_OAUTH_SCOPES", "scope1")
+
+    flows = [auth_routes._build_flow(state=state) for state in ("a", "b")]
+
+    token_uri = flows[0].client_config["token_uri"]
+    assert flows[0].oauth2session is not flows[1].oauth2session
+    assert all(flow.oauth2session.get_adapter(token_uri) is auth_routes._TOKEN_ADAPTER for flow in flows)
@@ -2,25 +2,51 @@
 
 from __future__ import annotations
 
+import time
+import weakref
+from dataclasses import dataclass
 from http import HTTPStatus
 from typing import TYPE_CHECKING, Any
 from unittest.mock import Mock
 
 import orchestrator.tools.mail as mail_tools
+import pytest
 from googleapiclient.errors import HttpError
 
 if TYPE_CHECKING:
-    import pytest
+    from collections.abc import Callable
 
 
+@pytest.fixture(scope="module")
+def http_errors() -> dict[HTTPStatus, HttpError]:
+    """Canned Gmail API errors, built once per module; the tools only read them."""
+
+    def make(status: HTTPStatus, reason: str, body: bytes) -> HttpError:
+        return HttpError(Mock(status=status, reason=reason), body)
+
+    return {
+        HTTPStatus.BAD_REQUEST: make(HTTPStatus.BAD_REQUEST, "Bad Request", b"bad request"),
+        HTTPStatus.UNAUTHORIZED: make(HTTPStatus.UNAUTHORIZED, "Unauthorized", b""),
+        HTTPStatus.NOT_FOUND: make(HTTPStatus.NOT_FOUND, "Not Found", b"not found"),
+        HTTPStatus.INTERNAL_SERVER_ERROR: make(HTTPStatus.INTERNAL_SERVER_ERROR, "Server Error", b"server error"),
+    }
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Give every test an empty per-user client cache."""
+    monkeypatch.setattr(mail_tools, "_MAIL_CLIENTS", {})
+    monkeypatch.setattr(mail_tools, "_USER_CLIENT_LOCKS", weakref.WeakValueDictionary())
+
+
+@dataclass(slots=True, frozen=True)
 class _DummyMsg:
-    def __init__(self, msg_id: str, from_: str, to: str, date: str, subject: str, body: str) -> None:  # noqa: PLR0913
-        self.id = msg_id
-        self.from_ = from_
-        self.to = to
-        self.date = date
-        self.subject = subject
-        self.body = body
+    id: str
+    from_: str
+    to: str
+    date: str
+    subject: str
+    body: str
 
 
 def test_list_emails_success(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -59,10 +85,12 @@ def test_list_emails_requires_user_id() -> None:
     assert result["code"] == "login_required"
 
 
-def test_get_email_invalid_message_id(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_get_email_invalid_message_id(
+    monkeypatch: pytest.MonkeyPatch,
+    http_errors: dict[HTTPStatus, HttpError],
+) -> None:
     """Map 404 errors to invalid_message_id responses."""
-    response = Mock(status=HTTPStatus.NOT_FOUND, reason="Not Found")
-    error = HttpError(response, b"not found")
+    error = http_errors[HTTPStatus.NOT_FOUND]
 
     def raise_error(*_args: Any, **_kwargs: Any) -> None:
         raise error
@@ -72,19 +100,15 @@ def test_get_email_invalid_message_id(monkeypatch: pytest.MonkeyPatch) -> None:
     assert result["code"] == "invalid_message_id"
 
 
-def test_mail_error_response_invalid_request() -> None:
+def test_mail_error_response_invalid_request(http_errors: dict[HTTPStatus, HttpError]) -> None:
     """Map bad requests to invalid_request responses."""
-    response = Mock(status=HTTPStatus.BAD_REQUEST, reason="Bad Request")
-    error = HttpError(response, b"bad request")
-    result = mail_tools._mail_error_response(error)
+    result = mail_tools._mail_error_response(http_errors[HTTPStatus.BAD_REQUEST])
     assert result["code"] == "invalid_request"
 
 
-def test_mail_error_response_service_error() -> None:
+def test_mail_error_response_service_error(http_errors: dict[HTTPStatus, HttpError]) -> None:
     """Map service errors to service_error responses."""
-    response = Mock(status=HTTPStatus.INTERNAL_SERVER_ERROR, reason="Server Error")
-    error = HttpError(response, b"server error")
-    result = mail_tools._mail_error_response(error)
+    result = mail_tools._mail_error_response(http_errors[HTTPStatus.INTERNAL_SERVER_ERROR])
     assert result["code"] == "service_error"
 
 
@@ -92,3 +116,111 @@ def test_mail_error_response_unknown_exception() -> None:
     """Fallback to unknown_error for unexpected exceptions."""
     result = mail_tools._mail_error_response(ValueError("boom"))
     assert result["code"] == "unknown_error"
+
+
+def _counting_factory(client: object) -> tuple[list[str], Callable[[str], object]]:
+    built: list[str] = []
+
+    def factory(user_id: str) -> object:
+        built.append(user_id)
+        return client
+
+    return built, factory
+
+
+def test_user_client_reused_across_tools(monkeypatch: pytest.MonkeyPatch) -> None:
+    """list_emails and get_email share one client per user; other users get their own.
+
+    The per-user locks are dropped once no call holds them.
+    """
+    msg = _DummyMsg("1", "a@example.com", "b@example.com", "today", "hello", "body")
+    client = Mock()
+    client.get_messages.return_value = [msg]
+    client.get_message.return_value = msg
+    built, factory = _counting_factory(client)
+    monkeypatch.setattr(mail_tools, "get_client_for_user", factory)
+
+    mail_tools.list_emails(user_id="u1")
+    mail_tools.get_email(message_id="1", user_id="u1")
+    mail_tools.list_emails(user_id="u2")
+
+    assert built == ["u1", "u2"]
+    assert client.get_message.call_count == 1
+    assert len(mail_tools._USER_CLIENT_LOCKS) == 0
+
+
+def test_user_client_rebuilt_after_ttl_or_invalidation(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Expired or invalidated clients are rebuilt on the next call."""
+    client = Mock()
+    client.get_messages.return_value = []
+    built, factory = _counting_factory(client)
+    monkeypatch.setattr(mail_tools, "get_client_for_user", factory)
+    clock = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+
+    mail_tools.list_emails(user_id="u1")
+    clock[0] += mail_tools.MAIL_CLIENT_TTL_SECONDS + 1
+    mail_tools.list_emails(user_id="u1")
+    mail_tools.invalidate_mail_client("u1")
+    mail_tools.list_emails(user_id="u1")
+
+    assert built == ["u1", "u1", "u1"]
+
+
+def test_login_required_error_drops_cached_client(
+    monkeypatch: pytest.MonkeyPatch,
+    http_errors: dict[HTTPStatus, HttpError],
+) -> None:
+    """An auth failure forgets the client, while other errors keep it cached."""
+    client = Mock()
+    built, factory = _counting_factory(client)
+    monkeypatch.setattr(mail_tools, "get_client_for_user", factory)
+
+    client.get_message.side_effect = http_errors[HTTPStatus.NOT_FOUND]
+    assert mail_tools.get_email(message_id="missing", user_id="u1")["code"] == "invalid_message_id"
+    assert "u1" in mail_tools._MAIL_CLIENTS
+
+    client.get_message.side_effect = http_errors[HTTPStatus.UNAUTHORIZED]
+    assert mail_tools.get_email(message_id="1", user_id="u1")["code"] == "login_required"
+    assert "u1" not in mail_tools._MAIL_CLIENTS
+    assert built == ["u1"]
+
+
+def test_client_built_during_invalidation_is_not_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A client built from a token that changed mid-build serves one call only."""
+    client = Mock()
+    client.get_messages.return_value = []
+
+    def factory(user_id: str) -> object:
+        mail_tools.invalidate_mail_client(user_id)
+        return client
+
+    monkeypatch.setattr(mail_tools, "get_client_for_user", factory)
+
+    assert mail_tools.list_emails(user_id="u1") == {"messages": []}
+    assert mail_tools._MAIL_CLIENTS == {}
+
+
+@pytest.mark.parametrize(
+    ("status", "code"),
+    [
+        (HTTPStatus.UNAUTHORIZED, "login_required"),
+        (HTTPStatus.FORBIDDEN, "login_required"),
+        (HTTPStatus.TOO_MANY_REQUESTS, "service_error"),
+        (HTTPStatus.GATEWAY_TIMEOUT, "service_error"),
+        (HTTPStatus.CONFLICT, "unknown_error"),
+    ],
+)
+def test_mail_error_response_status_table(status: HTTPStatus, code: str) -> None:
+    """HTTP statuses map to their response codes; unmapped ones fall back to unknown_error."""
+    result = mail_tools._mail_error_response(HttpError(Mock(status=status, reason=""), b""))
+    assert result["code"] == code
+
+
+def test_mail_error_response_returns_copies() -> None:
+    """Callers may mutate a response without changing the shared constants."""
+    first = mail_tools._mail_error_response(RuntimeError("no token"))
+    first["message"] = "changed"
+
+    second = mail_tools._mail_error_response(RuntimeError("no token"))
+    assert second["message"] == "Please sign in to your Google account to continue."
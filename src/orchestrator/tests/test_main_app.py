@@ -2,53 +2,194 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
 from http import HTTPStatus
-from typing import Any
+from importlib import resources
+from typing import TYPE_CHECKING, Any
 
 import orchestrator.main as app_module
+import pytest
 from fastapi.testclient import TestClient
+from orchestrator.models import IncomingMessage, OrchestratorReply
 from orchestrator.tools import registry
 
+from ai_client_api import content_block, message
+from orchestrator import db_pool, google_auth_routes
 
-def test_health() -> None:
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+@dataclass(slots=True, frozen=True)
+class _DummyBlock:
+    """Minimal content block mirroring the ``ContentBlock`` attributes the app reads."""
+
+    type: str
+    text: str | None = None
+    name: str | None = None
+    id: str | None = None
+    input: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        # Built field by field (dropping unset ones) instead of copying ``vars()``.
+        fields = {"type": self.type, "text": self.text, "name": self.name, "id": self.id, "input": self.input}
+        return {key: value for key, value in fields.items() if value is not None}
+
+
+@dataclass(slots=True, frozen=True)
+class _DummyMessage:
+    role: str
+    content: list[_DummyBlock]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"role": self.role, "content": [block.to_dict() for block in self.content]}
+
+
+@pytest.fixture(scope="module")
+def client() -> Iterator[TestClient]:
+    """One client per module; tests that need startup/shutdown open their own with ``with``."""
+    test_client = TestClient(app_module.app)
+    yield test_client
+    test_client.close()
+
+
+def test_health(client: TestClient) -> None:
     """Health endpoint returns ok."""
-    client = TestClient(app_module.app)
     resp = client.get("/health")
     assert resp.status_code == HTTPStatus.OK
     assert resp.json()["status"] == "ok"
 
 
-def test_handle_message_plain_response(monkeypatch: Any) -> None:
+def test_system_prompt_is_loaded_from_package_data() -> None:
+    """The system prompt ships inside the orchestrator package rather than a CWD-relative path."""
+    packaged = resources.files("orchestrator").joinpath("system.txt")
+
+    assert packaged.is_file()
+    assert app_module.SYSTEM_PROMPT
+    assert packaged.read_text(encoding="utf-8").strip() == app_module.SYSTEM_PROMPT
+
+
+def test_lifespan_builds_and_closes_auth_pool(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Startup builds the auth DB pool (creating the schema) and shutdown closes it."""
+    db_path = tmp_path / "auth.db"
+    monkeypatch.setattr(google_auth_routes, "AUTH_DB_PATH", db_path)
+    monkeypatch.setattr(db_pool, "_POOLS", {})
+
+    with TestClient(app_module.app):
+        assert str(db_path) in db_pool._POOLS
+        assert db_path.exists()
+
+    assert db_pool._POOLS == {}
+
+
+async def test_auth_db_maintenance_loop_runs_periodically(
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Each tick runs maintenance off the loop; a DB error is logged and the loop keeps going."""
+    monkeypatch.setattr(app_module, "AUTH_DB_MAINTENANCE_INTERVAL_SECONDS", 0)
+    calls: list[str] = []
+    done = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def fake_maintenance() -> int:
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            message = "database is locked"
+            raise sqlite3.OperationalError(message)
+        loop.call_soon_threadsafe(done.set)
+        return 0
+
+    monkeypatch.setattr(google_auth_routes, "run_db_maintenance", fake_maintenance)
+    task = asyncio.create_task(app_module._auth_db_maintenance_loop())
+    await asyncio.wait_for(done.wait(), timeout=5)
+    task.cancel()
+
+    assert len(calls) >= 2  # noqa: PLR2004
+    assert threading.main_thread().name not in calls
+    assert "Auth DB maintenance failed" in caplog.text
+
+
+def test_lifespan_warns_when_public_base_url_missing(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Startup flags a missing PUBLIC_BASE_URL but still serves chat."""
+    monkeypatch.setattr(google_auth_routes, "AUTH_DB_PATH", tmp_path / "auth.db")
+    monkeypatch.setattr(db_pool, "_POOLS", {})
+    monkeypatch.setattr(app_module, "PUBLIC_BASE_URL", None)
+
+    with caplog.at_level(logging.WARNING, logger="orchestrator"), TestClient(app_module.app) as client:
+        assert client.get("/health").status_code == HTTPStatus.OK
+    assert "PUBLIC_BASE_URL is not set" in caplog.text
+
+
+def test_build_auth_url_normalizes_base_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The base URL is validated and turned into the auth prefix once per configured value."""
+    app_module._auth_url_prefix.cache_clear()
+    monkeypatch.setattr(app_module, "PUBLIC_BASE_URL", "https://example.com/")
+
+    assert app_module._build_auth_url("login", "u1", "google") == "https://example.com/auth/google/login?user_id=u1"
+    assert app_module._build_auth_url("logout", "u1", "google") == "https://example.com/auth/google/logout?user_id=u1"
+    assert app_module._auth_url_prefix.cache_info().misses == 1
+
+    monkeypatch.setattr(app_module, "PUBLIC_BASE_URL", None)
+    with pytest.raises(RuntimeError, match="PUBLIC_BASE_URL is required"):
+        app_module._build_auth_url("login", "u1", "google")
+
+
+@pytest.mark.parametrize(
+    ("output", "expected"),
+    [
+        (
+            {"type": "action", "code": "login", "provider": "google"},
+            {"login_url": "https://example.com/auth/google/login?user_id=u1", "logout_url": None},
+        ),
+        (
+            {"type": "action", "code": "logout", "provider": "google"},
+            {"login_url": None, "logout_url": "https://example.com/auth/google/logout?user_id=u1"},
+        ),
+        ({"type": "action", "code": "reboot", "provider": "google"}, None),
+        ({"type": "action", "code": "login"}, None),
+        ({"type": "error", "code": "login", "provider": "google"}, None),
+        ("plain text", None),
+    ],
+    ids=["login", "logout", "unknown-code", "no-provider", "not-an-action", "not-a-dict"],
+)
+def test_resolve_tool_action_dispatches_on_code(
+    monkeypatch: pytest.MonkeyPatch,
+    output: object,
+    expected: dict[str, str | None] | None,
+) -> None:
+    """Only login/logout actions become auth replies; everything else is left to the model."""
+    monkeypatch.setattr(app_module, "PUBLIC_BASE_URL", "https://example.com")
+
+    reply = app_module._resolve_tool_action(output, "u1", " see link ")
+
+    if expected is None:
+        assert reply is None
+    else:
+        assert reply is not None
+        assert reply.reply == "see link"
+        assert reply.provider == "google"
+        assert {"login_url": reply.login_url, "logout_url": reply.logout_url} == expected
+
+
+def test_handle_message_plain_response(client: TestClient, monkeypatch: Any) -> None:
     """When AI returns a plain message without tools, should echo reply and persist history."""
-    client = TestClient(app_module.app)
-
-    class _DummyBlock:
-        def __init__(
-            self,
-            block_type: str,
-            text: str | None = None,
-            block_id: str | None = None,
-            tool_input: dict[str, Any] | None = None,
-        ) -> None:
-            self.type = block_type
-            self.text = text
-            self.id = block_id
-            self.input = tool_input or {}
-
-    class _DummyMessage:
-        def __init__(self, role: str, content: list[_DummyBlock]) -> None:
-            self.role = role
-            self.content = content
-
-        def to_dict(self) -> dict[str, Any]:
-            return {"role": self.role, "content": [vars(b) for b in self.content]}
 
     class _DummyAI:
         def generate_response(self, *_: Any, **__: Any) -> _DummyMessage:
-            return _DummyMessage(role="assistant", content=[_DummyBlock("text", "hi there")])
+            return _DummyMessage(role="assistant", content=[_DummyBlock("text", text="hi there")])
 
     monkeypatch.setattr(app_module, "get_client", lambda: _DummyAI())
-    monkeypatch.setattr(registry, "list_definitions", list)
+    monkeypatch.setattr(registry, "list_definitions", tuple)
 
     payload = {
         "provider": "discord",
@@ -65,32 +206,113 @@ def test_handle_message_plain_response(monkeypatch: Any) -> None:
     assert data.get("logout_url") is None
 
 
-def test_handle_message_tool_action(monkeypatch: Any) -> None:
+def test_ai_blocks_serialized_only_for_debug_logging(
+    client: TestClient, monkeypatch: Any, caplog: pytest.LogCaptureFixture
+) -> None:
+    """The per-block dump is a DEBUG log, so to_dict() is skipped at the default INFO level."""
+    reply = message(role="assistant", content=[content_block(block_type="text", text="hi")])
+    to_dict_calls: list[None] = []
+
+    class _AI:
+        def generate_response(self, *_: Any, **__: Any) -> Any:
+            return reply
+
+    original_to_dict = type(reply).to_dict
+
+    def counting_to_dict(self: Any) -> dict[str, Any]:
+        to_dict_calls.append(None)
+        return original_to_dict(self)
+
+    monkeypatch.setattr(type(reply), "to_dict", counting_to_dict)
+    monkeypatch.setattr(app_module, "get_client", _AI)
+    monkeypatch.setattr(app_module, "CONVERSATION_HISTORY", {})
+    monkeypatch.setattr(registry, "list_definitions", tuple)
+    payload = {"provider": "discord", "channel_id": "c1", "user_id": "u1", "content": "hello"}
+
+    with caplog.at_level(logging.INFO, logger="orchestrator"):
+        assert client.post("/events/message", json=payload).json()["reply"] == "hi"
+    assert to_dict_calls == []
+    assert "AI blocks" not in caplog.text
+
+    with caplog.at_level(logging.DEBUG, logger="orchestrator"):
+        client.post("/events/message", json=payload)
+    assert len(to_dict_calls) == 1
+    assert "AI blocks" in caplog.text
+
+
+def test_history_appends_text_only_turns(monkeypatch: Any) -> None:
+    """Each turn is filtered once on append; stored entries are reused and the oldest drop off."""
+    monkeypatch.setattr(app_module, "CONVERSATION_HISTORY", {})
+    monkeypatch.setattr(app_module, "HISTORY_MAX", 3)
+    text = content_block(block_type="text", text="hello")
+    tool_use = content_block(block_type="tool_use", tool_call_id="t1", name="check_status", tool_input={})
+
+    app_module._append_history("u1", [message(role="user", content=[text])])
+    first = app_module.CONVERSATION_HISTORY["u1"][0]
+    app_module._append_history(
+        "u1",
+        [
+            message(role="assistant", content=[tool_use]),
+            message(role="assistant", content=[text, tool_use]),
+            message(role="user", content=[text]),
+        ],
+    )
+
+    history = app_module._load_history("u1")
+    assert [msg.role for msg in history] == ["user", "assistant", "user"]
+    assert history[0] is first
+    assert all(block.type == "text" for msg in history for block in msg.content)
+
+    app_module._append_history("u1", [message(role="assistant", content=[text])])
+    assert [msg.role for msg in app_module._load_history("u1")] == ["assistant", "user", "assistant"]
+    assert app_module._load_history("unknown") == []
+
+
+def test_handle_messages_batch_replies_in_order(client: TestClient, monkeypatch: Any) -> None:
+    """Batched events are answered in the order received."""
+    seen: list[str] = []
+
+    async def fake_handle(incoming_message: Any) -> OrchestratorReply:
+        seen.append(incoming_message.content)
+        return OrchestratorReply(reply=incoming_message.content.upper())
+
+    monkeypatch.setattr(app_module, "handle_message", fake_handle)
+
+    batch = [{"provider": "discord", "channel_id": "c1", "user_id": "u1", "content": text} for text in ("first", "second")]
+    resp = client.post("/events/messages", json=batch)
+
+    assert resp.status_code == HTTPStatus.OK
+    assert [item["reply"] for item in resp.json()] == ["FIRST", "SECOND"]
+    assert seen == ["first", "second"]
+
+
+async def test_handle_messages_overlaps_turns_of_different_users(monkeypatch: Any) -> None:
+    """A slow turn only holds back later messages from the same user."""
+    started: list[str] = []
+    other_user_done = asyncio.Event()
+
+    async def fake_run_turn(incoming_message: IncomingMessage) -> OrchestratorReply:
+        started.append(incoming_message.content)
+        if incoming_message.content == "u1-first":
+            await asyncio.wait_for(other_user_done.wait(), timeout=1.0)
+        if incoming_message.user_id == "u2":
+            other_user_done.set()
+        return OrchestratorReply(reply=incoming_message.content)
+
+    monkeypatch.setattr(app_module, "_run_turn", fake_run_turn)
+    batch = [
+        IncomingMessage(provider="discord", channel_id="c1", user_id=user_id, content=content)
+        for user_id, content in (("u1", "u1-first"), ("u1", "u1-second"), ("u2", "u2-first"))
+    ]
+
+    replies = await app_module.handle_messages(batch)
+
+    assert [reply.reply for reply in replies] == ["u1-first", "u1-second", "u2-first"]
+    assert started == ["u1-first", "u2-first", "u1-second"]
+
+
+def test_handle_message_tool_action(client: TestClient, monkeypatch: Any) -> None:
     """When AI requests a tool and it returns a login action, should short-circuit with login_url."""
-    client = TestClient(app_module.app)
-
-    class _DummyBlock:
-        def __init__(
-            self,
-            block_type: str,
-            name: str | None = None,
-            block_id: str | None = None,
-            tool_input: dict[str, Any] | None = None,
-            text: str | None = None,
-        ) -> None:
-            self.type = block_type
-            self.name = name
-            self.id = block_id
-            self.input = tool_input or {}
-            self.text = text
-
-    class _DummyMessage:
-        def __init__(self, role: str, content: list[_DummyBlock]) -> None:
-            self.role = role
-            self.content = content
-
-        def to_dict(self) -> dict[str, Any]:
-            return {"role": self.role, "content": [vars(b) for b in self.content]}
 
     class _DummyAI:
         def generate_response(self, *_: Any, **__: Any) -> _DummyMessage:
@@ -100,14 +322,14 @@ def test_handle_message_tool_action(monkeypatch: Any) -> None:
                     _DummyBlock(
                         "tool_use",
                         name="request_login",
-                        block_id="t1",
-                        tool_input={"provider": "google"},
+                        id="t1",
+                        input={"provider": "google"},
                     )
                 ],
             )
 
     monkeypatch.setattr(app_module, "get_client", lambda: _DummyAI())
-    monkeypatch.setattr(registry, "list_definitions", list)
+    monkeypatch.setattr(registry, "list_definitions", tuple)
     monkeypatch.setattr(
         registry,
         "run_tool",
@@ -127,3 +349,108 @@ def test_handle_message_tool_action(monkeypatch: Any) -> None:
     data = resp.json()
     assert data["login_url"].startswith("https://example.com/auth/google/login")
     assert data["provider"] == "google"
+
+
+async def test_handle_message_runs_ai_and_tools_off_event_loop(monkeypatch: Any) -> None:
+    """Claude and tool calls run in worker threads, and one turn's tool calls overlap."""
+    monkeypatch.setattr(app_module, "CONVERSATION_HISTORY", {})
+    loop_thread = threading.get_ident()
+    both_tools_running = threading.Barrier(2, timeout=5)
+    tool_uses = [content_block(block_type="tool_use", tool_call_id=f"t{i}", name=f"tool{i}", tool_input={}) for i in (1, 2)]
+    replies = iter(
+        [
+            message(role="assistant", content=tool_uses),
+            message(role="assistant", content=[content_block(block_type="text", text="done")]),
+        ]
+    )
+    seen: list[list[str | None]] = []
+
+    class _DummyAI:
+        def generate_response(self, messages: list[Any], **_: Any) -> Any:
+            assert threading.get_ident() != loop_thread
+            seen.append([block.tool_use_id for block in messages[-1].content if block.type == "tool_result"])
+            return next(replies)
+
+    def fake_run_tool(name: str, *_: Any, **__: Any) -> str:
+        assert threading.get_ident() != loop_thread
+        both_tools_running.wait()
+        return name
+
+    monkeypatch.setattr(app_module, "get_client", _DummyAI)
+    monkeypatch.setattr(registry, "list_definitions", tuple)
+    monkeypatch.setattr(registry, "run_tool", fake_run_tool)
+
+    reply = await app_module.handle_message(IncomingMessage(provider="discord", channel_id="c1", user_id="u1", content="hi"))
+
+    assert reply.reply == "done"
+    assert seen == [[], ["t1", "t2"]]
+
+
+async def test_handle_message_skips_tools_after_an_auth_action(monkeypatch: Any) -> None:
+    """A turn with a login/logout call runs its tools in order and stops at the first action."""
+    monkeypatch.setattr(app_module, "CONVERSATION_HISTORY", {})
+    monkeypatch.setattr(app_module, "PUBLIC_BASE_URL", "https://example.com")
+    tool_uses = [
+        content_block(block_type="tool_use", tool_call_id="t1", name="request_login", tool_input={}),
+        content_block(block_type="tool_use", tool_call_id="t2", name="delete_email", tool_input={}),
+    ]
+    called: list[str] = []
+
+    class _DummyAI:
+        def generate_response(self, *_: Any, **__: Any) -> Any:
+            return message(role="assistant", content=tool_uses)
+
+    def fake_run_tool(name: str, *_: Any, **__: Any) -> dict[str, str]:
+        called.append(name)
+        return {"type": "action", "code": "login", "provider": "google"}
+
+    monkeypatch.setattr(app_module, "get_client", _DummyAI)
+    monkeypatch.setattr(registry, "list_definitions", tuple)
+    monkeypatch.setattr(registry, "run_tool", fake_run_tool)
+
+    reply = await app_module.handle_message(IncomingMessage(provider="discord", channel_id="c1", user_id="u1", content="hi"))
+
+    assert reply.login_url == "https://example.com/auth/google/login?user_id=u1"
+    assert called == ["request_login"]
+
+
+async def test_user_locks_serialize_turns_and_are_dropped_when_idle(monkeypatch: Any) -> None:
+    """Concurrent turns of one user share a lock, which is released from the map afterwards."""
+    active: list[str] = []
+    overlapped: list[bool] = []
+
+    async def fake_run_turn(incoming_message: IncomingMessage) -> OrchestratorReply:
+        overlapped.append(bool(active))
+        active.append(incoming_message.content)
+        await asyncio.sleep(0)
+        active.remove(incoming_message.content)
+        return OrchestratorReply(reply=incoming_message.content)
+
+    monkeypatch.setattr(app_module, "_run_turn", fake_run_turn)
+
+    replies = await asyncio.gather(
+        *(
+            app_module.handle_message(IncomingMessage(provider="discord", channel_id="c1", user_id="u1", content=text))
+            for text in ("a", "b")
+        )
+    )
+
+    assert [reply.reply for reply in replies] == ["a", "b"]
+    assert overlapped == [False, False]
+    assert "u1" not in app_module._USER_LOCKS
+
+
+def test_tool_output_to_text_encodes_compact_json() -> None:
+    """Tool outputs become compact UTF-8 JSON; strings pass through and unencodable values fall back to str()."""
+    circular: dict[str, object] = {}
+    circular["self"] = circular
+    output = {"type": "status", "subject": "Café", "ids": [1, 2]}
+    expected = '{"type":"status","subject":"Café","ids":[1,2]}'
+
+    assert app_module._tool_output_to_text(output) == expected
+    assert app_module._TOOL_OUTPUT_ENCODER.encode(output) == expected
+    assert app_module._tool_output_to_text("plain") == "plain"
+    assert app_module._tool_output_to_text({"when": {1, 2}}) == '{"when":"{1, 2}"}'
+    assert app_module._tool_output_to_text({1: "a", "b": {2: "c"}}) == '{"1":"a","b":{"2":"c"}}'
+    assert app_module._tool_output_to_text({("a", 1): "b"}) == str({("a", 1): "b"})
+    assert app_module._tool_output_to_text(circular) == str(circular)
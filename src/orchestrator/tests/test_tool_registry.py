@@ -39,6 +39,7 @@ def clean_registry(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
     """Reset registry state for isolated tests."""
     monkeypatch.setattr(registry, "_TOOL_HANDLERS", {})
     monkeypatch.setattr(registry, "_TOOL_DEFINITIONS", [])
+    monkeypatch.setattr(registry, "_CACHED_DEFS", None)
     return registry._TOOL_HANDLERS
 
 
@@ -54,8 +55,8 @@ def test_register_tool_duplicate_raises(clean_registry: dict[str, Any]) -> None:
         registry.register_tool(definition, handler)
 
 
-def test_list_definitions_returns_copy(clean_registry: dict[str, Any]) -> None:
-    """Expose a copy of definitions for callers."""
+def test_list_definitions_returns_immutable_snapshot(clean_registry: dict[str, Any]) -> None:
+    """Expose an immutable snapshot of definitions that is reused across calls."""
     definition = _DummyDefinition("demo")
 
     def handler() -> None:
@@ -63,9 +64,23 @@ def test_list_definitions_returns_copy(clean_registry: dict[str, Any]) -> None:
 
     registry.register_tool(definition, handler)
     definitions = registry.list_definitions()
-    assert len(definitions) == 1
-    assert definitions[0] is definition
-    assert definitions is not registry._TOOL_DEFINITIONS
+    assert isinstance(definitions, tuple)
+    assert definitions == (definition,)
+    assert registry.list_definitions() is definitions
+
+
+def test_register_tool_refreshes_cached_definitions(clean_registry: dict[str, Any]) -> None:
+    """A new registration invalidates the cached snapshot."""
+
+    def handler() -> None:
+        return None
+
+    registry.register_tool(_DummyDefinition("first"), handler)
+    before = registry.list_definitions()
+    registry.register_tool(_DummyDefinition("second"), handler)
+
+    assert [tool.name for tool in before] == ["first"]
+    assert [tool.name for tool in registry.list_definitions()] == ["first", "second"]
 
 
 def test_run_tool_unknown_returns_error(clean_registry: dict[str, Any]) -> None:
@@ -75,9 +90,24 @@ def test_run_tool_unknown_returns_error(clean_registry: dict[str, Any]) -> None:
     assert result["code"] == "unknown_tool"
 
 
-def test_run_tool_injects_user_id(monkeypatch: pytest.MonkeyPatch, clean_registry: dict[str, Any]) -> None:
+def test_register_tool_records_user_context(
+    monkeypatch: pytest.MonkeyPatch,
+    clean_registry: dict[str, Any],
+) -> None:
+    """Registration decides once whether a tool receives the caller's user_id."""
+    monkeypatch.setattr(registry, "_TOOLS_WITH_USER_CONTEXT", frozenset({"with_user"}))
+
+    def handler(**_: Any) -> None:
+        return None
+
+    registry.register_tool(_DummyDefinition("with_user"), handler)
+    registry.register_tool(_DummyDefinition("plain"), handler)
+
+    assert clean_registry == {"with_user": (handler, True), "plain": (handler, False)}
+
+
+def test_run_tool_injects_user_id(clean_registry: dict[str, Any]) -> None:
     """Inject user_id for tools that require user context."""
-    monkeypatch.setattr(registry, "_TOOLS_WITH_USER_CONTEXT", {"demo"})
     captured: dict[str, Any] = {}
 
     def handler(*, user_id: str, value: int) -> dict[str, Any]:
@@ -86,9 +116,30 @@ def test_run_tool_injects_user_id(monkeypatch: pytest.MonkeyPatch, clean_registr
         return {"ok": True}
 
     value = 3
-    registry._TOOL_HANDLERS["demo"] = handler
+    registry._TOOL_HANDLERS["demo"] = (handler, True)
     result = registry.run_tool("demo", {"value": value}, user_id="u1")
     assert isinstance(result, dict)
     assert result["ok"] is True
     assert captured["user_id"] == "u1"
     assert captured["value"] == value
+
+
+def test_run_tool_keeps_explicit_user_id_and_caller_arguments(clean_registry: dict[str, Any]) -> None:
+    """An explicit user_id wins over the caller context and arguments are never mutated."""
+    captured: dict[str, Any] = {}
+
+    def handler(**kwargs: Any) -> dict[str, Any]:
+        captured.update(kwargs)
+        return {"ok": True}
+
+    registry._TOOL_HANDLERS["demo"] = (handler, True)
+    explicit = {"user_id": "explicit"}
+    plain = {"value": 1}
+
+    registry.run_tool("demo", explicit, user_id="u1")
+    assert captured == {"user_id": "explicit"}
+    captured.clear()
+    registry.run_tool("demo", plain, user_id="u1")
+
+    assert captured == {"value": 1, "user_id": "u1"}
+    assert plain == {"value": 1}
@@ -3,20 +3,21 @@
 from __future__ import annotations
 
 import os
-import socket
-import sqlite3
-import subprocess
-import sys
 import time
 from http import HTTPStatus
-from pathlib import Path
 from typing import TYPE_CHECKING
 
+import orchestrator.main as app_module
 import pytest
-import requests
+from fastapi.testclient import TestClient
+from orchestrator.tools import auth
+
+from gmail_client_impl import gmail_impl
+from orchestrator import db_pool, google_auth_routes
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
+    from pathlib import Path
 
 pytestmark = [pytest.mark.e2e, pytest.mark.local_credentials]
 
@@ -27,16 +28,6 @@ REQUIRED_ENV = (
     "GOOGLE_OAUTH_CLIENT_SECRET",
     "GOOGLE_OAUTH_REFRESH_TOKEN",
 )
-HEALTH_TIMEOUT_SECONDS = 12.0
-REQUEST_TIMEOUT_SECONDS = 60.0
-MODULE_PATHS = (
-    "mail_client_api",
-    "gmail_client_impl",
-    "ai_client_api",
-    "claude_client_impl",
-    "discord_listener",
-    "orchestrator",
-)
 
 
 def _require_envs(names: tuple[str, ...]) -> dict[str, str]:
@@ -48,116 +39,57 @@ def _require_envs(names: tuple[str, ...]) -> dict[str, str]:
 
 
 def _seed_auth_db(db_path: Path, refresh_token: str) -> None:
+    # Build the file through the orchestrator's own pool so the seeded DB gets the same
+    # schema and PRAGMAs (WAL, incremental auto-vacuum) as one created by the server.
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(db_path) as conn:
-        conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS oauth_tokens (
-                user_id TEXT NOT NULL,
-                provider TEXT NOT NULL,
-                refresh_token TEXT NOT NULL,
-                access_token TEXT,
-                expires_at INTEGER,
-                scopes TEXT,
-                updated_at INTEGER NOT NULL,
-                PRIMARY KEY (user_id, provider)
-            );
-            """
-        )
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO oauth_tokens (
-                user_id, provider, refresh_token, access_token, expires_at, scopes, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (USER_ID, "google", refresh_token, None, None, None, int(time.time())),
-        )
-
-
-def _free_port() -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.bind(("127.0.0.1", 0))
-        return int(sock.getsockname()[1])
-
-
-def _pythonpath(root: Path) -> str:
-    paths = [str(root)] + [str(root / "src" / name / "src") for name in MODULE_PATHS]
-    existing = os.environ.get("PYTHONPATH")
-    if existing:
-        paths.append(existing)
-    return os.pathsep.join(paths)
-
-
-def _wait_for_health(base_url: str) -> None:
-    deadline = time.time() + HEALTH_TIMEOUT_SECONDS
-    while time.time() < deadline:
-        try:
-            response = requests.get(f"{base_url}/health", timeout=1.0)
-            if response.status_code == HTTPStatus.OK:
-                return
-        except requests.RequestException:
-            time.sleep(0.2)
-    raise AssertionError("Orchestrator did not become healthy in time.")  # noqa: TRY003, EM101
-
-
-@pytest.fixture
-def orchestrator_url(tmp_path: Path) -> Iterator[str]:
-    """Start the orchestrator with real credentials and return its base URL."""
+    pool = db_pool.ConnectionPool(str(db_path), min_size=1, max_size=1)
+    try:
+        with pool.connection() as conn, conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO oauth_tokens (
+                    user_id, provider, refresh_token, access_token, expires_at, scopes, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (USER_ID, "google", refresh_token, None, None, None, int(time.time())),
+            )
+    finally:
+        pool.close()
+
+
+@pytest.fixture(scope="module")
+def orchestrator_client(tmp_path_factory: pytest.TempPathFactory) -> Iterator[TestClient]:
+    """Serve the orchestrator app in-process against a seeded auth DB and real credentials.
+
+    One client (and one app lifespan) is shared by every e2e test in the module, so the
+    tests reuse the client's connection pool instead of setting one up per test.
+    """
     env = _require_envs(REQUIRED_ENV)
-    db_path = tmp_path / "auth.db"
+    db_path = tmp_path_factory.mktemp("e2e") / "auth.db"
     _seed_auth_db(db_path, env["GOOGLE_OAUTH_REFRESH_TOKEN"])
 
-    root = Path(__file__).resolve().parents[2]
-    base_url = f"http://127.0.0.1:{_free_port()}"
-    full_env = os.environ.copy()
-    full_env.update(env)
-    full_env.update(
-        {
-            "PYTHONPATH": _pythonpath(root),
-            "ORCHESTRATOR_AUTH_DB": str(db_path),
-            "PUBLIC_BASE_URL": base_url,
-        }
-    )
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # The modules read these settings at import, so point the attributes at the seeded DB.
+        monkeypatch.setattr(google_auth_routes, "AUTH_DB_PATH", db_path)
+        monkeypatch.setattr(auth, "AUTH_DB_PATH", str(db_path))
+        monkeypatch.setattr(gmail_impl.GmailClient, "AUTH_DB_PATH", db_path)
+        monkeypatch.setattr(app_module, "PUBLIC_BASE_URL", "http://testserver")
+        monkeypatch.setattr(google_auth_routes, "PUBLIC_BASE_URL", "http://testserver")
 
-    process = subprocess.Popen(  # noqa: S603
-        [
-            sys.executable,
-            "-m",
-            "uvicorn",
-            "orchestrator.main:app",
-            "--host",
-            "127.0.0.1",
-            "--port",
-            base_url.rsplit(":", 1)[1],
-        ],
-        cwd=str(root),
-        env=full_env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-    )
-    try:
-        _wait_for_health(base_url)
-        yield base_url
-    finally:
-        process.terminate()
-        try:
-            process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            process.kill()
+        with TestClient(app_module.app) as client:
+            yield client
 
 
-def test_orchestrator_email_flow(orchestrator_url: str) -> None:
+def test_orchestrator_email_flow(orchestrator_client: TestClient) -> None:
     """Orchestrator uses Claude + Gmail with real credentials."""
-    response = requests.post(
-        f"{orchestrator_url}/events/message",
+    response = orchestrator_client.post(
+        "/events/message",
         json={
             "provider": "discord",
             "channel_id": "e2e",
             "user_id": USER_ID,
             "content": "List my most recent email.",
         },
-        timeout=REQUEST_TIMEOUT_SECONDS,
     )
 
     assert response.status_code == HTTPStatus.OK
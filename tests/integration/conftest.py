@@ -0,0 +1,26 @@
+"""Shared configuration for the integration tests."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+_INTEGRATION_DIR = Path(__file__).parent
+# Every integration test stubs its external services, so all of them can run in CI.
+_MARKS = (pytest.mark.integration, pytest.mark.circleci)
+
+
+def pytest_collection_modifyitems(items: Sequence[pytest.Item]) -> None:
+    """Mark the tests collected from this directory as CI-safe integration tests.
+
+    The hook sees every item in the session, so tests elsewhere are left untouched.
+    """
+    for item in items:
+        if item.path.is_relative_to(_INTEGRATION_DIR):
+            for mark in _MARKS:
+                item.add_marker(mark)
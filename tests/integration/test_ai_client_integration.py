@@ -2,52 +2,78 @@
 
 from __future__ import annotations
 
-from typing import Any
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, Mock
 
 import pytest
-from claude_client_impl.claude_impl import ClaudeClient
 from claude_client_impl.models_impl import ClaudeContentBlock, ClaudeMessage
 
 import ai_client_api
 
-pytestmark = pytest.mark.integration
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
+# Requests only read the message, so one instance serves every test.
+_USER_MESSAGE = ClaudeMessage(role="user", content=[ClaudeContentBlock(block_type="text", text="hi")])
 
-@pytest.mark.circleci
-def test_ai_client_factory_returns_claude(monkeypatch: pytest.MonkeyPatch) -> None:
-    """ai_client_api.get_client returns ClaudeClient after implementation import."""
-    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
-    client = ai_client_api.get_client()
-    assert isinstance(client, ClaudeClient)
 
+@pytest.fixture(scope="module", autouse=True)
+def _anthropic_api_key() -> Iterator[None]:
+    """Set a fake API key once for the module and restore the real environment after it.
 
-@pytest.mark.circleci
-def test_generate_response_uses_sdk(monkeypatch: pytest.MonkeyPatch) -> None:
-    """ClaudeClient routes calls through the SDK client."""
-    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    Module scope (not session) keeps the fake key from leaking into the e2e suite, which
+    skips only when no key is set.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        yield
+
+
+@pytest.fixture(scope="module")
+def _anthropic_template() -> MagicMock:
+    """Spec'd SDK client mock, built once per module.
+
+    The SDK is imported here rather than at module top so collecting this file stays
+    as cheap as the deferred import in ``claude_impl``.
+    """
+    import anthropic
+
+    template = MagicMock(spec=anthropic.Anthropic)
+    template.messages.create.return_value = SimpleNamespace(content=[])
+    return template
 
-    captured: dict[str, Any] = {}
 
-    class _StubMessages:
-        def create(self, **kwargs: Any) -> Any:
-            captured.update(kwargs)
-            return type("Resp", (), {"content": []})()
+@pytest.fixture
+def anthropic_mock(_anthropic_template: MagicMock) -> MagicMock:
+    """Return the shared SDK mock with call records cleared; configured return values stay.
 
-    class _StubAnthropic:
-        def __init__(self, api_key: str) -> None:
-            self.api_key = api_key
-            self.messages = _StubMessages()
+    A shallow copy would still share the child mocks (and so their call records), so the
+    template is reset instead of copied.
+    """
+    _anthropic_template.reset_mock()
+    return _anthropic_template
 
-    monkeypatch.setattr("claude_client_impl.claude_impl.anthropic.Anthropic", _StubAnthropic)
+
+def test_ai_client_factory_returns_claude() -> None:
+    """ai_client_api.get_client returns ClaudeClient after implementation import."""
+    from claude_client_impl.claude_impl import ClaudeClient
+
+    client = ai_client_api.get_client()
+    assert isinstance(client, ClaudeClient)
+
+
+def test_generate_response_uses_sdk(monkeypatch: pytest.MonkeyPatch, anthropic_mock: MagicMock) -> None:
+    """ClaudeClient routes calls through the SDK client."""
+    sdk_factory = Mock(return_value=anthropic_mock)
+    monkeypatch.setattr("claude_client_impl.claude_impl.anthropic.Anthropic", sdk_factory)
 
     client = ai_client_api.get_client()
-    message = ClaudeMessage(
-        role="user",
-        content=[ClaudeContentBlock(block_type="text", text="hi")],
-    )
 
-    result = client.generate_response(messages=[message])
+    result = client.generate_response(messages=[_USER_MESSAGE])
 
     assert isinstance(result, ClaudeMessage)
-    assert captured["messages"][0]["role"] == "user"
-    assert captured["messages"][0]["content"][0]["text"] == "hi"
+    sdk_factory.assert_called_once_with(api_key="test-key")
+    sent = anthropic_mock.messages.create.call_args.kwargs
+    assert sent["messages"][0]["role"] == "user"
+    assert sent["messages"][0]["content"][0]["text"] == "hi"
@@ -2,74 +2,102 @@
 
 from __future__ import annotations
 
-import importlib
-import sys
-from types import SimpleNamespace
 from typing import TYPE_CHECKING
+from unittest.mock import AsyncMock
 
+import discord
 import pytest
+from orchestrator.models import OrchestratorReply
+from pydantic import ConfigDict
 
-pytestmark = pytest.mark.integration
 
+class _FrozenReply(OrchestratorReply):
+    """An orchestrator reply that cannot be mutated, so one instance can serve every test."""
 
-if TYPE_CHECKING:
-    from collections.abc import Callable
-    from pathlib import Path
-    from types import ModuleType
+    model_config = ConfigDict(frozen=True)
 
 
-def _load_listener(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> ModuleType:
-    monkeypatch.setenv("DISCORD_BOT_TOKEN", "test-token")
-    monkeypatch.setenv("PUBLIC_BASE_URL", "https://example.com")
-    monkeypatch.setenv("AUTH_PROVIDERS", "google")
-    monkeypatch.setenv("ORCHESTRATOR_AUTH_DB", str(tmp_path / "auth.db"))
+_HELLO_REPLY = _FrozenReply(reply="hello")
 
-    if "discord_listener.main" in sys.modules:
-        del sys.modules["discord_listener.main"]
 
-    import discord_listener.main as module
+class _FakeAuthor:
+    """A human (non-bot) message author."""
 
-    return importlib.reload(module)
+    __slots__ = ("bot", "id")
 
+    def __init__(self, author_id: int) -> None:
+        self.bot = False
+        self.id = author_id
 
-@pytest.mark.asyncio
-@pytest.mark.circleci
-async def test_on_message_invokes_orchestrator(
-    monkeypatch: pytest.MonkeyPatch,
-    tmp_path: Path,
-) -> None:
-    """on_message uses the orchestrator client and sends a reply."""
-    listener = _load_listener(monkeypatch, tmp_path)
-    sent_payload: dict[str, object] = {}
 
-    def fake_send(_url: str, incoming: object, *_args: object, **_kwargs: object) -> object:
-        sent_payload["incoming"] = incoming
-        return SimpleNamespace(reply="hello", login_url=None, logout_url=None, provider=None)
+class _FakeChannel:
+    """A DM channel whose ``send`` records the listener's replies."""
+
+    __slots__ = ("id", "send", "type")
+
+    def __init__(self, channel_id: int) -> None:
+        self.id = channel_id
+        self.type = discord.ChannelType.private
+        self.send = AsyncMock()
+
+
+class _FakeMessage:
+    """The subset of ``discord.Message`` that ``on_message`` reads."""
+
+    __slots__ = ("author", "channel", "content", "id")
+
+    def __init__(self, channel: _FakeChannel, author: _FakeAuthor, content: str, message_id: int) -> None:
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.id = message_id
+
 
-    async def fake_to_thread(
-        fn: Callable[..., object],
-        *args: object,
-        **kwargs: object,
-    ) -> object:
-        return fn(*args, **kwargs)
+_AUTHOR = _FakeAuthor(42)
 
-    class DummyDMChannel:
-        def __init__(self) -> None:
-            self.id = 101
-            self.sent: list[tuple[tuple[object, ...], dict[str, object]]] = []
 
-        async def send(self, *args: object, **kwargs: object) -> None:
-            self.sent.append((args, kwargs))
+def _dm_message(content: str) -> _FakeMessage:
+    """Build a direct message from a human user; only the channel's ``send`` mock is per call."""
+    return _FakeMessage(_FakeChannel(101), _AUTHOR, content, 99)
 
-    monkeypatch.setattr(listener.discord, "DMChannel", DummyDMChannel)
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+
+@pytest.fixture(scope="session")
+def listener_module() -> ModuleType:
+    """Import the listener once per session under test settings.
+
+    The settings are read at import time, so the environment only needs to hold while the
+    module body runs. Tests patch attributes through ``monkeypatch``, which undoes them, so
+    nothing forces a re-import between tests.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("DISCORD_BOT_TOKEN", "test-token")
+        monkeypatch.setenv("PUBLIC_BASE_URL", "https://example.com")
+        monkeypatch.setenv("AUTH_PROVIDERS", "google")
+        monkeypatch.delenv("REQUIRE_LOGIN", raising=False)
+        monkeypatch.delenv("ORCHESTRATOR_BATCH_MAX", raising=False)
+        import discord_listener.main as module
+    return module
+
+
+async def test_on_message_invokes_orchestrator(
+    monkeypatch: pytest.MonkeyPatch,
+    listener_module: ModuleType,
+) -> None:
+    """on_message uses the orchestrator client and sends a reply."""
+    listener = listener_module
+    fake_send = AsyncMock(return_value=_HELLO_REPLY)
     monkeypatch.setattr(listener, "_send_to_orchestrator", fake_send)
-    monkeypatch.setattr(listener.asyncio, "to_thread", fake_to_thread)
 
-    channel = DummyDMChannel()
-    author = SimpleNamespace(bot=False, id=42)
-    message = SimpleNamespace(channel=channel, author=author, content="hi", id=99)
+    message = _dm_message("hi")
 
     await listener.on_message(message)
 
-    assert channel.sent[0][0][0] == "hello"
-    assert sent_payload["incoming"] is not None
+    message.channel.send.assert_awaited_once_with("hello")
+    fake_send.assert_awaited_once()
+    assert fake_send.await_args is not None
+    _url, incoming = fake_send.await_args.args
+    assert incoming.content == "hi"
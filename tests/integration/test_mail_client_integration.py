@@ -2,37 +2,50 @@
 
 from __future__ import annotations
 
-import pytest
+import base64
+from typing import TYPE_CHECKING
+
 from gmail_client_impl.message_impl import GmailMessage
 
 import mail_client_api
 from gmail_client_impl import gmail_impl
 
-pytestmark = pytest.mark.integration
+if TYPE_CHECKING:
+    import pytest
+
+# Encoded once at import: the raw payload Gmail would return for a minimal message.
+_RAW_EMAIL_B64 = base64.urlsafe_b64encode(b"From: di@example.com\r\nSubject: Factory Test\r\n\r\nBody").decode()
+
+
+def _stub_gmail_client_class() -> type[gmail_impl.GmailClient]:
+    """Subclass the current GmailClient with one that skips OAuth.
+
+    Built per test rather than at import: other suites reload ``gmail_impl``, which
+    replaces the class a module-level stub would have inherited from.
+    """
+
+    class _StubGmailClient(gmail_impl.GmailClient):
+        def __init__(self, *_args: object, **_kwargs: object) -> None:
+            self.service = object()  # type: ignore[assignment]
+
+    return _StubGmailClient
 
 
-@pytest.mark.circleci
 def test_mail_client_factory_returns_gmail(monkeypatch: pytest.MonkeyPatch) -> None:
     """mail_client_api.get_client returns GmailClient without real auth."""
-    def fake_init(self: gmail_impl.GmailClient, *args: object, **kwargs: object) -> None:
-        self.service = object() # type: ignore[assignment]
-
-    monkeypatch.setattr(gmail_impl.GmailClient, "__init__", fake_init)
+    real_client_class = gmail_impl.GmailClient
+    stub_class = _stub_gmail_client_class()
+    monkeypatch.setattr(gmail_impl, "GmailClient", stub_class)
 
     client = mail_client_api.get_client()
 
-    assert isinstance(client, gmail_impl.GmailClient)
+    assert isinstance(client, stub_class)
+    assert isinstance(client, real_client_class)
 
 
-@pytest.mark.circleci
 def test_message_factory_returns_gmail_message() -> None:
     """mail_client_api.get_message returns GmailMessage."""
-    import base64
-
-    email_content = "From: di@example.com\r\nSubject: Factory Test\r\n\r\nBody"
-    encoded_data = base64.urlsafe_b64encode(email_content.encode()).decode()
-
-    msg = mail_client_api.get_message(msg_id="di123", raw_data=encoded_data)
+    msg = mail_client_api.get_message(msg_id="di123", raw_data=_RAW_EMAIL_B64)
 
     assert isinstance(msg, GmailMessage)
     assert msg.subject == "Factory Test"